@@ -0,0 +1,84 @@
+"""
+Compares the query count and wall time of the compatibility matrix calculation against the original per (shift, user)
+query implementation on a seeded in-memory SQLite database.
+
+Usage:
+    python -m benchmarks.calculator_compatibility --volunteers 200 --shifts 50
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", 'sqlite:///:memory:')
+
+from sqlalchemy import event
+
+from benchmarks.seed import seed_roster
+from domain import Base, Engine, session_scope, UnavailabilityTime
+from services.optimiser.calculator import Calculator
+
+
+def legacy_compatibility(calculator: Calculator):
+    """
+    The original implementation, one unavailability query per (shift, user) pair.
+    """
+    compatibilities = []
+    for shift in calculator._shifts_:
+        shift_compatibility = []
+        for user in calculator._users_:
+            user_available = True
+            unavailability_records = calculator._session_.query(UnavailabilityTime).filter(
+                UnavailabilityTime.userId == user.id
+            ).all()
+            for record in unavailability_records:
+                if record.start < shift.endTime and record.end > shift.startTime:
+                    user_available = False
+            shift_compatibility.append(user_available)
+        compatibilities.append(shift_compatibility)
+    return compatibilities
+
+
+def measure(function, *args):
+    queries = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', count)
+    try:
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(Engine, 'before_cursor_execute', count)
+    return result, {'queries': len(queries), 'seconds': round(elapsed, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--volunteers', type=int, default=200)
+    parser.add_argument('--shifts', type=int, default=50)
+    parser.add_argument('--windows', type=int, default=5, help='Unavailability windows per volunteer.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-legacy', action='store_true', help='Only measure the current implementation.')
+    args = parser.parse_args()
+
+    Base.metadata.create_all(Engine)
+    with session_scope() as session:
+        # The legacy implementation does not know about recurring windows, so only one-off windows are seeded
+        seed_roster(session, args.volunteers, args.shifts, args.windows, args.seed, recurring_windows_per_volunteer=0)
+        calculator = Calculator(session)
+
+        report = {'volunteers': args.volunteers, 'shifts': args.shifts, 'windows': args.windows}
+        current, report['current'] = measure(calculator.calculate_compatibility)
+        if not args.skip_legacy:
+            legacy, report['legacy'] = measure(legacy_compatibility, calculator)
+            report['matches'] = current.tolist() == legacy
+        session.rollback()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Profiles the imports of application:app with python -X importtime in a fresh interpreter, and reports the total import
+time, the slowest modules and whether any of the dependencies that should only be loaded on first use were imported.
+
+Usage:
+    python -m benchmarks.importtime --top 20 --output report.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+# Only loaded on first use by services/optimiser, services/notification_service, services/secrets and services/mail
+LAZY_MODULES = ('numpy', 'minizinc', 'firebase_admin', 'boto3', 'sendgrid', 'ics')
+
+
+def profile(module: str) -> list:
+    """
+    @param module: The module to import.
+    @return: The (name, self microseconds, cumulative microseconds) of every module imported on the way.
+    """
+    env = dict(os.environ)
+    env.setdefault("SQLALCHEMY_DATABASE_URI", 'sqlite:///:memory:')
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], env=env,
+                            capture_output=True, text=True, check=True)
+    imports = []
+    for line in output.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(own), int(cumulative)))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='application', help='The module to profile the import of.')
+    parser.add_argument('--top', type=int, default=20, help='The number of slowest modules to report.')
+    parser.add_argument('--output', help='The file to write the JSON report to, printed when omitted.')
+    args = parser.parse_args()
+
+    imports = profile(args.module)
+    names = {name for name, _, _ in imports}
+    slowest = sorted(imports, key=lambda entry: entry[2], reverse=True)[:args.top]
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'module': args.module,
+        'modules': len(imports),
+        'total_seconds': round(sum(own for _, own, _ in imports) / 1e6, 4),
+        'slowest': [{'module': name, 'self_seconds': round(own / 1e6, 4), 'cumulative_seconds': round(total / 1e6, 4)}
+                    for name, own, total in slowest],
+        'eager_lazy_modules': [module for module in LAZY_MODULES if module in names],
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
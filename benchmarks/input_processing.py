@@ -0,0 +1,193 @@
+"""
+Compares the query count and wall time of the availability and clash matrices of an asset request against the
+original per volunteer and per vehicle pair implementations on a seeded in-memory SQLite database.
+
+The original comparison gives up on daily windows after their first occurrence, so the two availability matrices
+only agree when the roster is seeded without recurring windows (--recurring 0). The report counts the cells in which
+they differ.
+
+Usage:
+    python -m benchmarks.input_processing --volunteers 3000 --vehicles 100
+"""
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", 'sqlite:///:memory:')
+
+import numpy as np
+
+from benchmarks.calculator_compatibility import measure
+from benchmarks.seed import seed_roster
+from domain import Base, Engine, session_scope, AssetRequest, AssetRequestVehicle, User, UserType
+from services.optimiser import input_processing
+
+
+def legacy_availability(session, request_id):
+    """
+    The original implementation, one unavailability query per volunteer and a window by window comparison per vehicle.
+    """
+    A = session.query(AssetRequestVehicle).filter(AssetRequestVehicle.request_id == request_id).count()
+    V = session.query(User.role).filter(User.role == "VOLUNTEER").count()
+    availability_matrix = np.full((V, A), True, dtype=bool)
+
+    vehicle_list = input_processing.get_vehicle_list(session, request_id)
+    vehicle_time_list = []
+    for v in vehicle_list:
+        vehicle_time = input_processing.get_vehicle_time(session, v)
+        vehicle_time_list.append(vehicle_time)
+
+    v_role_list = session.query(User.id).filter(User.role == "VOLUNTEER").all()
+
+    for r in range(0, len(v_role_list)):
+        temp_matrix = np.full(A, True, dtype=bool)
+        user_id = v_role_list[r][0]
+        unavailability_list = input_processing.time_unavailability_list(session, user_id)
+        for a in range(0, A):
+            a_time = vehicle_time_list[a]
+            for u_l in unavailability_list:
+                user_unavailability = []
+                user_unavailability.append(u_l[0])
+                user_unavailability.append(u_l[1])
+                periodicity = u_l[2]
+                result = legacy_time_availability(user_unavailability, a_time, periodicity)
+                if not result:
+                    temp_matrix[a] = False
+                    break
+                else:
+                    continue
+
+        availability_matrix[r] = temp_matrix
+    return availability_matrix
+
+
+def legacy_time_availability(user_unavailability, vehicle_time, periodicity):
+    """
+    The original comparison of an unavailability window and a vehicle, before it was replaced with the recurrence
+    module.
+    """
+    user_unavailability_start = user_unavailability[0]
+    user_unavailability_end = user_unavailability[1]
+    vehicle_time_start = vehicle_time[0]
+    vehicle_time_end = vehicle_time[1]
+
+    if vehicle_time_end < user_unavailability_start:
+        return True
+
+    # repeat once
+    if periodicity == 3 or periodicity == 0:
+        if user_unavailability_start <= vehicle_time_start <= user_unavailability_end:
+            return False
+        elif user_unavailability_start <= vehicle_time_end <= user_unavailability_end:
+            return False
+        elif vehicle_time_start <= user_unavailability_start and vehicle_time_end >= user_unavailability_end:
+            return False
+        elif vehicle_time_start >= user_unavailability_start and vehicle_time_end <= user_unavailability_end:
+            return False
+        else:
+            return True
+
+    # repeat weekly
+    elif periodicity == 2:
+        while vehicle_time_start > user_unavailability_end:
+            user_unavailability_start = user_unavailability_start + timedelta(weeks=1)
+            user_unavailability_end = user_unavailability_end + timedelta(weeks=1)
+        if user_unavailability_start <= vehicle_time_start <= user_unavailability_end:
+            return False
+        elif user_unavailability_start <= vehicle_time_end <= user_unavailability_end:
+            return False
+        elif vehicle_time_start <= user_unavailability_start and vehicle_time_end >= user_unavailability_end:
+            return False
+        elif vehicle_time_start >= user_unavailability_start and vehicle_time_end <= user_unavailability_end:
+            return False
+        else:
+            return True
+
+    # repeat daily
+    elif periodicity == 1:
+        while vehicle_time_start > user_unavailability_end:
+            user_unavailability_start = user_unavailability_start + timedelta(days=1)
+            user_unavailability_start = user_unavailability_start + timedelta(days=1)
+            if user_unavailability_start <= vehicle_time_start <= user_unavailability_end:
+                return False
+            elif user_unavailability_start <= vehicle_time_end <= user_unavailability_end:
+                return False
+            elif vehicle_time_start <= user_unavailability_start and vehicle_time_end >= user_unavailability_end:
+                return False
+            elif vehicle_time_start >= user_unavailability_start and vehicle_time_end <= user_unavailability_end:
+                return False
+            else:
+                return True
+    else:
+        return True
+
+
+def legacy_clashes(session, request_id):
+    """
+    The original implementation, one query per vehicle and a comparison per vehicle pair.
+    """
+    vehicle_list = input_processing.get_vehicle_list(session, request_id)
+    vehicle_times = [input_processing.get_vehicle_time(session, v) for v in vehicle_list]
+    clashes_matrix = np.full((len(vehicle_list), len(vehicle_list)), False, dtype=bool)
+    for a in range(len(vehicle_list)):
+        for b in range(len(vehicle_list)):
+            if a != b:
+                clashes_matrix[a][b] = input_processing.if_clash(vehicle_times[a], vehicle_times[b])
+    return clashes_matrix
+
+
+def seed_request(session, vehicles: int, seed: int) -> int:
+    """
+    Adds an asset request with vehicles spread over the four week period the roster is seeded over.
+    @return: The id of the request.
+    """
+    rng = random.Random(seed)
+    admin = session.query(User).filter(User.role == UserType.ROOT_ADMIN).first()
+    request = AssetRequest(user_id=admin.id, title='bench')
+    session.add(request)
+    session.flush()
+    start = datetime(2024, 1, 1)
+    for _ in range(vehicles):
+        vehicle_start = start + timedelta(hours=rng.randrange(28 * 24))
+        session.add(AssetRequestVehicle(request_id=request.id, from_date_time=vehicle_start,
+                                        to_date_time=vehicle_start + timedelta(hours=rng.choice([4, 8, 12]))))
+    session.flush()
+    return request.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--volunteers', type=int, default=3000)
+    parser.add_argument('--vehicles', type=int, default=100)
+    parser.add_argument('--windows', type=int, default=5, help='One-off unavailability windows per volunteer.')
+    parser.add_argument('--recurring', type=int, default=1, help='Recurring unavailability windows per volunteer.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-legacy', action='store_true', help='Only measure the current implementation.')
+    args = parser.parse_args()
+
+    Base.metadata.create_all(Engine)
+    with session_scope() as session:
+        seed_roster(session, args.volunteers, 0, args.windows, args.seed,
+                    recurring_windows_per_volunteer=args.recurring)
+        request_id = seed_request(session, args.vehicles, args.seed)
+
+        report = {'volunteers': args.volunteers, 'vehicles': args.vehicles, 'windows': args.windows,
+                  'recurring': args.recurring}
+        # The inputs of the request are loaded once per session, they are measured on their own
+        _, report['inputs'] = measure(input_processing.load_request_inputs, session, request_id)
+        availability, report['availability'] = measure(input_processing.get_input_availability, session, request_id)
+        clashes, report['clashes'] = measure(input_processing.get_input_clashes, session, request_id)
+        if not args.skip_legacy:
+            legacy, report['legacy_availability'] = measure(legacy_availability, session, request_id)
+            report['availability_differences'] = int((legacy != availability).sum())
+            legacy, report['legacy_clashes'] = measure(legacy_clashes, session, request_id)
+            report['clashes_matches'] = bool((legacy == clashes).all())
+        session.rollback()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
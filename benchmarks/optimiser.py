@@ -0,0 +1,110 @@
+"""
+Times every phase of an optimiser run (loading, the compatibility, mastery and skill requirement matrices, solving and
+saving the result) on seeded synthetic rosters in a SQLite database, and writes the timings as a JSON report.
+
+Every size is given as VOLUNTEERSxSHIFTSxROLES and is run on a freshly seeded database.
+
+Usage:
+    python -m benchmarks.optimiser --sizes 50x20x5 200x50x8 --output report.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import time
+from datetime import datetime
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", 'sqlite:///:memory:')
+
+from benchmarks.seed import seed_roster
+from domain import Base, Engine, session_scope
+from repository.fcm_token_repository import FCMTokenRepository
+from repository.optimiser_run_repository import SEQUENTIAL_PHASES
+from repository.shift_repository import ShiftRepository
+from services.optimiser.optimiser import Optimiser
+
+
+def parse_size(size: str) -> tuple:
+    """
+    @param size: A size in the form VOLUNTEERSxSHIFTSxROLES, e.g. 200x50x8.
+    @return: The number of volunteers, shifts and roles.
+    """
+    try:
+        volunteers, shifts, roles = (int(part) for part in size.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected VOLUNTEERSxSHIFTSxROLES, got {size}")
+    return volunteers, shifts, roles
+
+
+def run(volunteers: int, shifts: int, roles: int, args) -> dict:
+    """
+    Seeds a fresh database and runs the optimiser on it once.
+    @return: The problem size, the timings of every phase and the summary of the solution.
+    """
+    Base.metadata.drop_all(Engine)
+    Base.metadata.create_all(Engine)
+
+    start = time.perf_counter()
+    with session_scope() as session:
+        seed_roster(session, volunteers, shifts, windows_per_volunteer=args.windows, seed=args.seed, roles=roles,
+                    positions_per_shift=args.positions, recurring_windows_per_volunteer=args.recurring)
+    seconds = round(time.perf_counter() - start, 4)
+
+    with session_scope() as session:
+        optimiser = Optimiser(session=session, repository=ShiftRepository(), debug=False,
+                              fcm_token_repository=FCMTokenRepository(), formulation=args.formulation,
+                              engine=args.engine, time_budget=args.time_budget, reduce=not args.no_presolve)
+        solution = optimiser.solve()
+        optimiser.save_result(solution)
+
+    return {
+        'volunteers': volunteers,
+        'shifts': shifts,
+        'roles': roles,
+        'seed_seconds': seconds,
+        'timings': optimiser.timings,
+        'total_seconds': round(sum(optimiser.timings.get(phase, 0) for phase in SEQUENTIAL_PHASES), 4),
+        'result': optimiser.summarise(solution),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(50, 20, 5), (200, 50, 8)],
+                        help='The VOLUNTEERSxSHIFTSxROLES sizes to run.')
+    parser.add_argument('--windows', type=int, default=5, help='One-off unavailability windows per volunteer.')
+    parser.add_argument('--recurring', type=int, default=1, help='Recurring unavailability windows per volunteer.')
+    parser.add_argument('--positions', type=int, default=3, help='Maximum number of positions per shift.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', choices=Optimiser.ENGINES, default=Optimiser.AUTO)
+    parser.add_argument('--formulation', choices=Optimiser.FORMULATIONS, default=Optimiser.SPARSE)
+    parser.add_argument('--no-presolve', action='store_true', help='Solve the full problem without reducing it.')
+    parser.add_argument('--time-budget', type=float, default=None, help='Seconds the solver may run for.')
+    parser.add_argument('--output', help='The file to write the JSON report to, printed when omitted.')
+    parser.add_argument('--verbose', action='store_true', help='Keep the log output of the optimiser.')
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'database': Engine.url.get_backend_name(),
+        'engine': args.engine,
+        'formulation': args.formulation,
+        'presolve': not args.no_presolve,
+        'seed': args.seed,
+        'runs': [run(volunteers, shifts, roles, args) for volunteers, shifts, roles in args.sizes],
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
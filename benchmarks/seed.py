@@ -0,0 +1,69 @@
+import random
+from datetime import datetime, timedelta
+
+from domain import User, UserType, ShiftRequest, ShiftStatus, UnavailabilityTime, Role, UserRole, ShiftPosition
+from services.optimiser import recurrence
+
+
+def seed_roster(session, volunteers: int, shifts: int, windows_per_volunteer: int = 5, seed: int = 0,
+                start: datetime = datetime(2024, 1, 1), roles: int = 5, roles_per_volunteer: int = 2,
+                positions_per_shift: int = 3, recurring_windows_per_volunteer: int = 1):
+    """
+    Seeds a database with a deterministic, randomly generated roster of volunteers, roles, submitted shifts with
+    their positions, and unavailability windows spread over a four week period.
+
+    @param session: The session to add the records to. The caller is responsible for committing.
+    @param volunteers: The number of volunteers to create.
+    @param shifts: The number of submitted shifts to create.
+    @param windows_per_volunteer: The number of one-off unavailability windows each volunteer gets.
+    @param seed: The seed for the random number generator, the same seed always produces the same roster.
+    @param start: The start of the period the shifts and windows are spread over.
+    @param roles: The number of roles to create.
+    @param roles_per_volunteer: The maximum number of roles each volunteer can perform.
+    @param positions_per_shift: The maximum number of positions each shift requires.
+    @param recurring_windows_per_volunteer: The number of daily or weekly unavailability windows each volunteer gets,
+    they start before the period so that only their repetitions fall inside it.
+    """
+    rng = random.Random(seed)
+    period_hours = 28 * 24
+
+    admin = User(role=UserType.ROOT_ADMIN, first_name='bench', last_name='admin', email='bench-admin',
+                 mobile_number='bench-admin')
+    session.add(admin)
+    session.flush()
+
+    users = [User(role=UserType.VOLUNTEER, first_name='bench', last_name=str(i), email=f'bench-{i}',
+                  mobile_number=f'bench-{i}') for i in range(volunteers)]
+    role_records = [Role(code=f'bench-{i}', name=f'Bench role {i}') for i in range(roles)]
+    session.add_all(users)
+    session.add_all(role_records)
+    session.flush()
+
+    for i in range(shifts):
+        shift_start = start + timedelta(hours=rng.randrange(period_hours))
+        shift = ShiftRequest(user_id=admin.id, title=f'bench {i}', startTime=shift_start,
+                             endTime=shift_start + timedelta(hours=rng.choice([4, 8, 12])),
+                             status=ShiftStatus.SUBMITTED)
+        session.add(shift)
+        if role_records and positions_per_shift > 0:
+            session.flush()
+            for _ in range(rng.randint(1, positions_per_shift)):
+                session.add(ShiftPosition(shift_id=shift.id, role_code=rng.choice(role_records).code))
+
+    for user in users:
+        for role in rng.sample(role_records, rng.randint(0, min(roles_per_volunteer, len(role_records)))):
+            session.add(UserRole(user_id=user.id, role_id=role.id))
+
+        for i in range(windows_per_volunteer):
+            window_start = start + timedelta(hours=rng.randrange(period_hours))
+            session.add(UnavailabilityTime(userId=user.id, title=f'bench {i}', periodicity=recurrence.ONE_OFF,
+                                           start=window_start,
+                                           end=window_start + timedelta(hours=rng.randrange(1, 48)), status=True))
+
+        for i in range(recurring_windows_per_volunteer):
+            window_start = start - timedelta(days=rng.randrange(1, 365), hours=rng.randrange(24))
+            session.add(UnavailabilityTime(userId=user.id, title=f'bench recurring {i}',
+                                           periodicity=rng.choice([recurrence.DAILY, recurrence.WEEKLY]),
+                                           start=window_start,
+                                           end=window_start + timedelta(hours=rng.randrange(1, 4)), status=True))
+    session.flush()
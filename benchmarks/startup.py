@@ -0,0 +1,59 @@
+"""
+Measures how long a fresh process takes to import application:app and to serve its first request, the work every
+gunicorn worker does before it can take traffic. Every repeat runs in a new interpreter so nothing is cached between
+them.
+
+Usage:
+    python -m benchmarks.startup --repeats 5 --path /
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in the child interpreter, the database connections opened while importing show work done at import time
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from application import app
+imported = time.perf_counter()
+from domain.pool import pool_metrics
+connects = pool_metrics.connects
+with app.test_client() as client:
+    status = client.get(sys.argv[1]).status_code
+served = time.perf_counter()
+print(json.dumps({'import_seconds': round(imported - start, 4), 'first_request_seconds': round(served - imported, 4),
+                  'status': status, 'connections_at_import': connects}))
+"""
+
+
+def probe(path: str) -> dict:
+    """
+    @param path: The path of the first request.
+    @return: The timings of one fresh interpreter.
+    """
+    env = dict(os.environ)
+    env.setdefault("SQLALCHEMY_DATABASE_URI", 'sqlite:///:memory:')
+    output = subprocess.run([sys.executable, '-c', PROBE, path], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--path', default='/', help='The path of the first request.')
+    args = parser.parse_args()
+
+    runs = [probe(args.path) for _ in range(args.repeats)]
+    report = {'python': sys.version.split()[0], 'path': args.path, 'repeats': args.repeats, 'runs': runs}
+    for key in ('import_seconds', 'first_request_seconds'):
+        values = [run[key] for run in runs]
+        report[key] = {'median': round(statistics.median(values), 4), 'min': round(min(values), 4),
+                       'max': round(max(values), 4)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,6 @@
 from flask import Blueprint
 from flask_restful import reqparse, Resource, fields, marshal_with, Api
 
-from services.optimiser import Optimiser
 from domain import session_scope
 
 from services.jwk import requires_auth
@@ -23,6 +22,7 @@ class Recommendation(Resource):
         if args["requestId"] is None:
             return
 
+        from services.optimiser import Optimiser
         with session_scope() as session:
             o = Optimiser(session, args['requestId'], False)
             result = o.solve()
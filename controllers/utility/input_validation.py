@@ -60,6 +60,12 @@ def type_positive(value):
 def type_natural(value):
     return inputs.natural(value)
 
+def type_positive_float(value):
+    value = float(value)
+    if value <= 0:
+        raise ValueError("Expected a number greater than 0, you gave us: '{}'.".format(value))
+    return value
+
 def type_fixed(value, decimals):
     return round(value, decimals)
     
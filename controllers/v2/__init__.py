@@ -6,3 +6,4 @@ from .unavailability import *
 from .shift import *
 from .fcm_tokens import *
 from .optimiser import *
+from .metrics import *
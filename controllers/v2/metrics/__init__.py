@@ -0,0 +1,2 @@
+from .api import *
+from .response_models import pool_metrics_response_model
@@ -0,0 +1,22 @@
+import logging
+from flask_restful import Resource, marshal
+from .response_models import pool_metrics_response_model
+from services.jwk import requires_auth, has_role
+from domain import UserType, Engine
+from domain.pool import pool_metrics
+from controllers.v2.v2_blueprint import v2_api
+
+
+class PoolMetricsResource(Resource):
+
+    @requires_auth
+    @has_role(UserType.ROOT_ADMIN)
+    def get(self):
+        try:
+            return marshal(pool_metrics.snapshot(Engine.pool), pool_metrics_response_model), 200
+        except Exception as e:
+            logging.error(f"Error retrieving connection pool metrics: {e}")
+            return {"message": "Internal server error"}, 500
+
+
+v2_api.add_resource(PoolMetricsResource, '/v2/metrics/pool')
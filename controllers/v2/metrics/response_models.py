@@ -0,0 +1,18 @@
+from flask_restful import fields
+
+pool_metrics_response_model = {
+    'pool': fields.String,
+    'size': fields.Integer,
+    'checked_in': fields.Integer,
+    'checked_out': fields.Integer,
+    'overflow': fields.Integer,
+    'connects': fields.Integer,
+    'checkouts': fields.Integer,
+    'checkins': fields.Integer,
+    'invalidations': fields.Integer,
+    'timeouts': fields.Integer,
+    'checkout_attempts': fields.Integer,
+    'checkout_seconds': fields.Float,
+    'average_checkout_seconds': fields.Float,
+    'max_checkout_seconds': fields.Float
+}
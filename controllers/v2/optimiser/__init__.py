@@ -1,2 +1,2 @@
 from .api import *
-from .response_models import optimiser_response_model
+from .response_models import optimiser_response_model, optimiser_job_response_model, optimiser_run_response_model
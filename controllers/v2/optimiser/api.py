@@ -1,67 +1,116 @@
 import logging
-from flask_restful import Resource, marshal_with, reqparse
-from repository.fcm_token_repository import FCMTokenRepository
-from .response_models import optimiser_response_model
-from repository.shift_repository import ShiftRepository
-from services.jwk import requires_auth, is_user_or_has_role
-from domain import UserType, session_scope
+from flask import request
+from flask_restful import Resource, marshal_with, reqparse, marshal
+from repository.optimiser_job_repository import OptimiserJobRepository
+from repository.optimiser_run_repository import OptimiserRunRepository
+from .response_models import optimiser_response_model, optimiser_job_response_model, optimiser_run_response_model
+from services.jwk import requires_auth, is_user_or_has_role, has_role, JWKService
+from domain import UserType
 from controllers.v2.v2_blueprint import v2_api
-from services.optimiser.optimiser import Optimiser
+from controllers.utility import type_positive_float
+from services.optimiser.options import DENSE, AUTO, FORMULATIONS, ENGINES
 
 
 # Initialise parser for potential arguments in future extensions (if needed)
 parser = reqparse.RequestParser()
 parser.add_argument('debug', type=bool, required=False, help="Optional debug mode flag.")
+parser.add_argument('formulation', type=str, required=False, choices=FORMULATIONS,
+                    help="Optional model formulation, either 'dense' (default) or 'sparse'.")
+parser.add_argument('parallel', type=bool, required=False,
+                    help="Optional flag to solve independent clusters of shifts in parallel.")
+parser.add_argument('incremental', type=bool, required=False,
+                    help="Optional flag to keep existing bookings and only fill new shifts and open positions.")
+parser.add_argument('time_budget', type=type_positive_float, required=False,
+                    help="Optional number of seconds after which the best roster found so far is used.")
+parser.add_argument('engine', type=str, required=False, choices=ENGINES,
+                    help="Optional engine, 'auto' (default) chooses between 'minizinc' and 'matching' by size, "
+                         "'portfolio' races several solvers and keeps the first proven optimum.")
+parser.add_argument('force', type=bool, required=False,
+                    help="Optional flag to solve again even if the same inputs have been solved before.")
+
+
+run_parser = reqparse.RequestParser()
+run_parser.add_argument('limit', type=int, required=False, default=50, location='args',
+                        help="Optional maximum number of runs to return, the most recent first.")
 
 
 class OptimiserResource(Resource):
 
-    optimiser_repository: ShiftRepository
-    fcm_token_repository: FCMTokenRepository
+    optimiser_job_repository: OptimiserJobRepository
 
-    def __init__(
-            self,
-            optimiser_repository: ShiftRepository = ShiftRepository(),
-            fcm_token_repository: FCMTokenRepository = FCMTokenRepository()
-    ):
-        self.optimiser_repository = optimiser_repository
-        self.fcm_token_repository = fcm_token_repository
+    def __init__(self, optimiser_job_repository: OptimiserJobRepository = OptimiserJobRepository()):
+        self.optimiser_job_repository = optimiser_job_repository
 
     @requires_auth
     @is_user_or_has_role(None, UserType.ROOT_ADMIN)
     @marshal_with(optimiser_response_model)  # Use the marshalling model
     def post(self):
-        # Parse debug argument
-        try:
-            args = parser.parse_args()
-        except Exception:
-            args = {}
-        # Default debug to False if it's not provided or the body is empty
-        debug = args.get('debug', False)
+        # An empty body runs the optimiser with the defaults, invalid options are rejected with a 400
+        args = parser.parse_args() if request.get_json(silent=True) is not None else {}
+        options = {
+            'debug': args.get('debug') or False,
+            'formulation': args.get('formulation') or DENSE,
+            'parallel': args.get('parallel') or False,
+            'incremental': args.get('incremental') or False,
+            'time_budget': args.get('time_budget'),
+            'engine': args.get('engine') or AUTO,
+            'force': args.get('force') or False
+        }
 
         try:
-            with session_scope() as session:
-                # Initialise and run the optimiser
-                optimiser = Optimiser(
-                    session=session,
-                    repository=self.optimiser_repository,
-                    debug=debug,
-                    fcm_token_repository=self.fcm_token_repository
-                )
-
-                result = optimiser.solve()
-                optimiser.save_result(result)
-
-                # Return raw data, the marshaller will format it
-                return {
-                    "message": "Optimisation completed successfully",
-                    "result": str(result)
-                }
+            # The optimiser is run by a separate worker process, see services/optimiser/worker.py
+            user_id = JWKService.decode_user_id()
+            job_id = self.optimiser_job_repository.create_job(options, user_id if user_id > 0 else None)
+            return {
+                "message": "Optimisation queued",
+                "job_id": job_id
+            }, 202
 
         except Exception as e:
-            logging.error(f"Error running optimiser: {e}")
+            logging.error(f"Error queueing optimiser job: {e}")
             return {"message": "Internal server error", "result": str(e)}, 500
 
 
+class OptimiserJobResource(Resource):
+
+    optimiser_job_repository: OptimiserJobRepository
+
+    def __init__(self, optimiser_job_repository: OptimiserJobRepository = OptimiserJobRepository()):
+        self.optimiser_job_repository = optimiser_job_repository
+
+    @requires_auth
+    @has_role(UserType.ROOT_ADMIN)
+    def get(self, job_id: int):
+        try:
+            job = self.optimiser_job_repository.get_job(job_id)
+            if job is None:
+                return {"message": f"Optimiser job {job_id} not found"}, 404
+            return marshal(job, optimiser_job_response_model), 200
+        except Exception as e:
+            logging.error(f"Error retrieving optimiser job {job_id}: {e}")
+            return {"message": "Internal server error"}, 500
+
+
+class OptimiserRunResource(Resource):
+
+    optimiser_run_repository: OptimiserRunRepository
+
+    def __init__(self, optimiser_run_repository: OptimiserRunRepository = OptimiserRunRepository()):
+        self.optimiser_run_repository = optimiser_run_repository
+
+    @requires_auth
+    @has_role(UserType.ROOT_ADMIN)
+    def get(self):
+        args = run_parser.parse_args()
+        try:
+            runs = self.optimiser_run_repository.get_runs(max(args['limit'], 1))
+            return marshal(runs, optimiser_run_response_model), 200
+        except Exception as e:
+            logging.error(f"Error retrieving optimiser runs: {e}")
+            return {"message": "Internal server error"}, 500
+
+
 # Register the OptimiserResource in the blueprint
 v2_api.add_resource(OptimiserResource, '/v2/optimiser')
+v2_api.add_resource(OptimiserJobResource, '/v2/optimiser/<int:job_id>')
+v2_api.add_resource(OptimiserRunResource, '/v2/optimiser/runs')
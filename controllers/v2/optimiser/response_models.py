@@ -2,5 +2,38 @@ from flask_restful import fields
 
 optimiser_response_model = {
     'message': fields.String,
-    'result': fields.Raw
+    'result': fields.Raw,
+    'job_id': fields.Integer
+}
+
+optimiser_job_response_model = {
+    'id': fields.Integer,
+    'status': fields.String,
+    'options': fields.Raw,
+    'timings': fields.Raw,
+    'result': fields.Raw,
+    'error': fields.String,
+    'created': fields.DateTime(dt_format='iso8601'),
+    'started': fields.DateTime(dt_format='iso8601'),
+    'finished': fields.DateTime(dt_format='iso8601')
+}
+
+optimiser_run_response_model = {
+    'id': fields.Integer,
+    'job_id': fields.Integer,
+    'options': fields.Raw,
+    'status': fields.String,
+    'objective': fields.Float,
+    'gap': fields.Float,
+    'assignments': fields.Integer,
+    'shifts': fields.Integer,
+    'volunteers': fields.Integer,
+    'roles': fields.Integer,
+    'positions': fields.Integer,
+    'compatible_pairs': fields.Integer,
+    'winner': fields.String,
+    'timings': fields.Raw,
+    'total_seconds': fields.Float,
+    'error': fields.String,
+    'created': fields.DateTime(dt_format='iso8601')
 }
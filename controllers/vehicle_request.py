@@ -5,8 +5,6 @@ from .utility import *
 from domain import session_scope
 from repository.asset_request_vehicle_repository import *
 
-from services.optimiser.input_processing import *
-
 from services.jwk import requires_auth
 
 
@@ -93,6 +91,7 @@ class GetInputA(Resource):
         parser = reqparse.RequestParser()
         parser.add_argument('requestID', type=int, required=True)
         request_id = parser.parse_args()["requestID"]
+        from services.optimiser.input_processing import get_input_A
         with session_scope() as session:
             result_A = get_input_A(session, request_id)
             return {"number": result_A}
@@ -105,6 +104,7 @@ class GetInputR(Resource):
     @requires_auth
     @marshal_with(r_fields)
     def get(self):
+        from services.optimiser.input_processing import get_input_R
         with session_scope() as session:
             result_R = get_input_R(session)
             return {"number": result_R}
@@ -121,6 +121,7 @@ class GetInputP(Resource):
         parser.add_argument('requestID', type=int, required=True)
         request_id = parser.parse_args()["requestID"]
 
+        from services.optimiser.input_processing import get_input_P
         with session_scope() as session:
             result_P = get_input_P(session, request_id)
             return {"number": result_P}
@@ -133,6 +134,7 @@ class GetInputV(Resource):
     @requires_auth
     @marshal_with(v_fields)
     def get(self):
+        from services.optimiser.input_processing import get_input_V
         with session_scope() as session:
             result_V = get_input_V(session)
             return {"number": result_V}
@@ -145,6 +147,7 @@ class GetInputQ(Resource):
     @requires_auth
     @marshal_with(q_fields)
     def get(self):
+        from services.optimiser.input_processing import get_input_Q
         with session_scope() as session:
             result_Q = get_input_Q(session)
             return {"number": result_Q}
@@ -0,0 +1,22 @@
+#!/bin/bash
+# Runs the web server and the optimiser worker side by side and stops the container as soon as either of them exits,
+# so a crashed worker is restarted with the container instead of leaving optimiser jobs queued forever.
+set -e
+
+# Alembic owns the schema, pending migrations are applied once per container before either process starts.
+alembic upgrade head
+
+python3 -m services.optimiser.worker &
+worker=$!
+gunicorn -b 0.0.0.0:5000 --workers=2 --threads=2 --timeout=120 --log-level=debug --pythonpath / application:app &
+server=$!
+
+# Forward stop signals to both processes, the shell is PID 1 and would otherwise swallow them.
+trap 'kill -TERM "$worker" "$server" 2>/dev/null' TERM INT
+
+set +e
+wait -n "$worker" "$server"
+status=$?
+kill -TERM "$worker" "$server" 2>/dev/null
+wait
+exit "$status"
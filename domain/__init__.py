@@ -1,4 +1,4 @@
-from .base import session_scope
+from .base import session_scope, unit_of_work, on_commit
 from .base import Base, Engine
 from .type import *
 from .entity import *
\ No newline at end of file
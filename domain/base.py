@@ -1,4 +1,5 @@
 from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 
 from sqlalchemy.ext.declarative import declarative_base
@@ -6,6 +7,7 @@ import os
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
+from domain.pool import pool_metrics, pool_options
 from services.secrets import SecretService
 
 # secret = SecretService(f"database/{os.environ.get('env', 'dev')}/fireapp")
@@ -27,7 +29,9 @@ else:
                                                                         os.environ.get('password'),
                                                                         os.environ.get('host'),
                                                                         os.environ.get('port'),
-                                                                        os.environ.get('dbname')), echo=False)
+                                                                        os.environ.get('dbname')), echo=False,
+                           **pool_options())
+pool_metrics.attach(Engine)
 Session.configure(bind=Engine)
 
 # Configure Declarative Base for ORM
@@ -45,12 +49,103 @@ def receive_before_update(mapper, connection, target):
     target.update_date_time = datetime.now()
 
 
-Base.metadata.create_all(Engine)
+# The unit of work of the current job or request, while one is active every session_scope joins its session.
+_unit_of_work = ContextVar('unit_of_work', default=None)
+
+
+class UnitOfWork:
+    """
+    A session shared by every repository used within a unit_of_work block, and the callbacks to run once its
+    transaction is committed.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.after_commit = []
+
+
+class JoinedSession:
+    """
+    The session of the active unit of work as seen by a session_scope that joined it. The work of the scope runs in a
+    savepoint: committing only flushes it and rolling back only undoes the work of the scope, the unit of work commits
+    everything at its end.
+    """
+
+    def __init__(self, session):
+        self._session = session
+        self._savepoint = session.begin_nested()
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    def commit(self):
+        self._session.flush()
+
+    def rollback(self):
+        if self._savepoint.is_active:
+            self._savepoint.rollback()
+
+    def close(self):
+        pass
+
+    def release(self):
+        if self._savepoint.is_active:
+            self._savepoint.commit()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Provide a single session and transaction that every session_scope inside the block joins, so that the work of
+    several repositories is committed at once over one connection. A unit of work inside another one joins it.
+    """
+    if _unit_of_work.get() is not None:
+        with session_scope() as session:
+            yield session
+        return
+
+    unit = UnitOfWork(Session())
+    token = _unit_of_work.set(unit)
+    try:
+        yield unit.session
+        unit.session.commit()
+    except:
+        unit.session.rollback()
+        raise
+    finally:
+        _unit_of_work.reset(token)
+        unit.session.close()
+
+    for callback in unit.after_commit:
+        callback()
+
+
+def on_commit(callback):
+    """
+    Runs a callback once the active unit of work is committed, it is discarded if the unit of work is rolled back.
+    Without an active unit of work the callback runs straight away.
+    """
+    unit = _unit_of_work.get()
+    if unit is None:
+        callback()
+    else:
+        unit.after_commit.append(callback)
 
 
 @contextmanager
 def session_scope():
     """Provide a transactional scope around a series of operations."""
+    unit = _unit_of_work.get()
+    if unit is not None:
+        session = JoinedSession(unit.session)
+        try:
+            yield session
+            session.release()
+        except:
+            session.rollback()
+            raise
+        return
+
     session = Session()
     try:
         yield session
@@ -0,0 +1,36 @@
+"""
+Creates the tables of every entity that do not exist yet, for local development and test databases only. Alembic owns
+the schema everywhere else, so deployed databases are changed with 'alembic upgrade head' and never with this command.
+
+Usage:
+    python -m domain.bootstrap [--drop]
+"""
+import argparse
+import logging
+
+from domain import Base, Engine
+
+logger = logging.getLogger(__name__)
+
+
+def create_schema(drop: bool = False) -> None:
+    """
+    @param drop: If every table is dropped before the tables are created.
+    """
+    if drop:
+        Base.metadata.drop_all(Engine)
+    Base.metadata.create_all(Engine)
+    logger.info(f"Schema created on {Engine.url.get_backend_name()}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--drop', action='store_true', help='Drop every table first, this deletes all data.')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    create_schema(args.drop)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,4 +15,7 @@ from .chatbot_input import ChatbotInput
 from .shift_request import ShiftRequest
 from .shift_request_volunteer import ShiftRequestVolunteer
 from .shift_position import ShiftPosition
-from .fcm_tokens import FCMToken
\ No newline at end of file
+from .fcm_tokens import FCMToken
+from .optimiser_job import OptimiserJob
+from .optimiser_run import OptimiserRun
+from .optimiser_solution import OptimiserSolution
\ No newline at end of file
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum, JSON, Text
+
+from domain.type import OptimiserJobStatus
+from domain.base import Base
+
+
+class OptimiserJob(Base):
+    __tablename__ = 'optimiser_job'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('user.id'), name='user_id', nullable=True)
+    status = Column(Enum(OptimiserJobStatus), name='status', default=OptimiserJobStatus.QUEUED, nullable=False)
+    # The arguments the optimiser is run with, e.g. the model formulation
+    options = Column(JSON, name='options', nullable=True)
+    # Seconds spent in each phase of the run, keyed by phase name
+    timings = Column(JSON, name='timings', nullable=True)
+    # Summary of the solution, e.g. the solver status and number of assignments
+    result = Column(JSON, name='result', nullable=True)
+    error = Column(Text, name='error', nullable=True)
+    started_at = Column(DateTime, name='started_datetime', nullable=True)
+    finished_at = Column(DateTime, name='finished_datetime', nullable=True)
+    update_date_time = Column(DateTime, name='last_update_datetime', default=datetime.now(), nullable=False)
+    insert_date_time = Column(DateTime, name='created_datetime', default=datetime.now(), nullable=False)
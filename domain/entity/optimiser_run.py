@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Float, Text
+
+from domain.base import Base
+
+
+class OptimiserRun(Base):
+    __tablename__ = 'optimiser_run'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey('optimiser_job.id'), name='job_id', nullable=True)
+    # The arguments the optimiser was run with, e.g. the model formulation and engine
+    options = Column(JSON, name='options', nullable=True)
+    # The solver status, or FAILED if the run raised an error
+    status = Column(String(32), name='status', nullable=False)
+    objective = Column(Float, name='objective', nullable=True)
+    gap = Column(Float, name='gap', nullable=True)
+    assignments = Column(Integer, name='assignments', nullable=True)
+    # Problem dimensions
+    shifts = Column(Integer, name='shifts', nullable=True)
+    volunteers = Column(Integer, name='volunteers', nullable=True)
+    roles = Column(Integer, name='roles', nullable=True)
+    positions = Column(Integer, name='positions', nullable=True)
+    compatible_pairs = Column(Integer, name='compatible_pairs', nullable=True)
+    # The portfolio configuration whose solution was used, if the portfolio engine was used
+    winner = Column(String(64), name='winner', nullable=True)
+    # Seconds spent in each phase of the run, keyed by phase name
+    timings = Column(JSON, name='timings', nullable=True)
+    total_seconds = Column(Float, name='total_seconds', nullable=True)
+    error = Column(Text, name='error', nullable=True)
+    update_date_time = Column(DateTime, name='last_update_datetime', default=datetime.now(), nullable=False)
+    insert_date_time = Column(DateTime, name='created_datetime', default=datetime.now(), nullable=False)
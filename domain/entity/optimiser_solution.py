@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Float
+
+from domain.base import Base
+
+
+class OptimiserSolution(Base):
+    __tablename__ = 'optimiser_solution'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Hash of the model version, formulation and input matrices the solution was found for
+    fingerprint = Column(String(64), name='fingerprint', nullable=False, unique=True)
+    # A [shift index, volunteer index, role index] list for every assignment
+    assignments = Column(JSON, name='assignments', nullable=False)
+    status = Column(String(32), name='status', nullable=False)
+    objective = Column(Float, name='objective', nullable=True)
+    bound = Column(Float, name='bound', nullable=True)
+    update_date_time = Column(DateTime, name='last_update_datetime', default=datetime.now(), nullable=False)
+    insert_date_time = Column(DateTime, name='created_datetime', default=datetime.now(), nullable=False)
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+def pool_options() -> dict:
+    """
+    Reads the connection pool settings from the environment.
+
+    SQLALCHEMY_POOL_SIZE: The number of connections kept open, defaults to 5.
+    SQLALCHEMY_MAX_OVERFLOW: The number of connections opened beyond the pool size under load, defaults to 10.
+    SQLALCHEMY_POOL_TIMEOUT: Seconds to wait for a free connection before giving up, defaults to 30.
+    SQLALCHEMY_POOL_RECYCLE: Seconds after which a connection is replaced, defaults to 3600 which is below the MySQL
+    wait_timeout so the server never closes a pooled connection first.
+    SQLALCHEMY_POOL_PRE_PING: If connections are tested before they are handed out, defaults to true.
+    @return: The keyword arguments for create_engine.
+    """
+    return {
+        'poolclass': MeteredQueuePool,
+        'pool_size': int(os.environ.get('SQLALCHEMY_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('SQLALCHEMY_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('SQLALCHEMY_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('SQLALCHEMY_POOL_RECYCLE', 3600)),
+        'pool_pre_ping': os.environ.get('SQLALCHEMY_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    }
+
+
+class PoolMetrics:
+    """
+    Counters of the connection pool, gathered from the SQLAlchemy pool events.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.checkout_attempts = 0
+            self.checkout_seconds = 0.0
+            self.max_checkout_seconds = 0.0
+
+    def increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_checkout(self, seconds: float):
+        with self._lock:
+            self.checkout_attempts += 1
+            self.checkout_seconds += seconds
+            self.max_checkout_seconds = max(self.max_checkout_seconds, seconds)
+
+    def attach(self, engine):
+        """
+        Listens to the pool events of an engine.
+        """
+        event.listen(engine, 'connect', lambda *args: self.increment('connects'))
+        event.listen(engine, 'checkout', lambda *args: self.increment('checkouts'))
+        event.listen(engine, 'checkin', lambda *args: self.increment('checkins'))
+        event.listen(engine, 'invalidate', lambda *args: self.increment('invalidations'))
+
+    def snapshot(self, pool) -> dict:
+        """
+        @param pool: The pool to report the current state of.
+        @return: The counters, and the size and usage of the pool where the pool class reports them.
+        """
+        with self._lock:
+            metrics = {
+                'pool': pool.__class__.__name__,
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'checkout_attempts': self.checkout_attempts,
+                'checkout_seconds': round(self.checkout_seconds, 4),
+                'average_checkout_seconds': round(self.checkout_seconds / self.checkout_attempts, 6)
+                if self.checkout_attempts else 0.0,
+                'max_checkout_seconds': round(self.max_checkout_seconds, 4),
+            }
+        if isinstance(pool, QueuePool):
+            metrics.update({
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+            })
+        return metrics
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    """
+    A QueuePool that records the latency of every checkout. The latency covers waiting for a free connection, opening
+    a new one when the pool grows and the pre-ping, so it is an upper bound of the time spent waiting in the queue.
+    The pool events only fire once a connection has been handed out, so the latency is measured around connect().
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except TimeoutError:
+            pool_metrics.increment('timeouts')
+            raise
+        finally:
+            pool_metrics.record_checkout(time.perf_counter() - start)
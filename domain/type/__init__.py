@@ -10,3 +10,4 @@ from .reset_password import ResetPassword
 from .shift_record import ShiftRecord
 from .shift_status import ShiftStatus
 from .shift_volunteer_status import ShiftVolunteerStatus
+from .optimiser_job_status import OptimiserJobStatus
\ No newline at end of file
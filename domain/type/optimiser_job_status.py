@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class OptimiserJobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
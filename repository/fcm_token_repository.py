@@ -1,5 +1,5 @@
 import logging
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
 from domain.entity.fcm_tokens import FCMToken
 from domain import session_scope
@@ -82,6 +82,50 @@ class FCMTokenRepository:
 
                 raise e
 
+    def get_fcm_tokens(self, user_ids: Iterable[int]) -> Dict[int, List[str]]:
+        """
+        Get the FCM tokens of many users with a single query
+
+        :param user_ids: The user ids
+        :return: The FCM tokens of every user that has at least one, keyed by user id.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return {}
+        with session_scope() as session:
+            try:
+                tokens = session.query(FCMToken.user_id, FCMToken.fcm_token) \
+                    .filter(FCMToken.user_id.in_(user_ids)) \
+                    .all()
+                fcm_tokens = {}
+                for user_id, fcm_token in tokens:
+                    fcm_tokens.setdefault(user_id, []).append(fcm_token)
+                return fcm_tokens
+
+            except SQLAlchemyError as e:
+                logging.error(f"Database error while retrieving FCM tokens for {len(user_ids)} users: {e}")
+                raise e
+
+    def notify_users(self, user_ids: Iterable[int], title: str, body: str, data: Optional[dict] = None) -> int:
+        """
+        Notify many users with the same notification. The tokens of all users are loaded at once and the notification
+        is sent as batched multicast messages, every user is notified once however often they appear in user_ids.
+
+        :param user_ids: The user ids
+        :param title: The title of the notification
+        :param body: The body of the notification
+        :param data: The data of the notification (optional)
+        :return: The number of devices the notification was delivered to.
+        """
+        fcm_tokens = self.get_fcm_tokens(user_ids)
+        token_list = [token for tokens in fcm_tokens.values() for token in tokens]
+        if not token_list:
+            logging.info("No active FCM token found for the users to notify")
+            return 0
+
+        notification_service = NotificationService()
+        return notification_service.send_multicast(token_list, title, body, data)
+
     def notify_user(
             self,
             user_id: Optional[int] = None,
@@ -0,0 +1,117 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import update
+
+from domain import session_scope, OptimiserJob, OptimiserJobStatus
+
+
+class OptimiserJobRepository:
+
+    def __init__(self):
+        pass
+
+    def create_job(self, options: dict, user_id: Optional[int] = None) -> int:
+        """
+        Queues a new optimiser job.
+
+        :param options: The arguments the optimiser should be run with.
+        :param user_id: The user that requested the job.
+        :return: The id of the queued job.
+        """
+        with session_scope() as session:
+            job = OptimiserJob(user_id=user_id, status=OptimiserJobStatus.QUEUED, options=options)
+            session.add(job)
+            session.flush()
+            logging.info(f"Optimiser job {job.id} queued.")
+            return job.id
+
+    def get_job(self, job_id: int) -> Optional[dict]:
+        """
+        :param job_id: The id of the job.
+        :return: The job as a dictionary, or None if no job with the given id exists.
+        """
+        with session_scope() as session:
+            job = session.query(OptimiserJob).filter(OptimiserJob.id == job_id).first()
+            if job is None:
+                return None
+            return {
+                'id': job.id,
+                'status': job.status.value,
+                'options': job.options,
+                'timings': job.timings,
+                'result': job.result,
+                'error': job.error,
+                'created': job.insert_date_time,
+                'started': job.started_at,
+                'finished': job.finished_at,
+            }
+
+    def claim_next_job(self) -> Optional[Tuple[int, dict]]:
+        """
+        Marks the oldest queued job as running. The status is only changed if the job is still queued, so when several
+        workers race for the same job exactly one of them claims it.
+
+        :return: The id and options of the claimed job, or None if there is nothing to run.
+        """
+        with session_scope() as session:
+            job = session.query(OptimiserJob.id, OptimiserJob.options) \
+                .filter(OptimiserJob.status == OptimiserJobStatus.QUEUED) \
+                .order_by(OptimiserJob.id) \
+                .first()
+            if job is None:
+                return None
+
+            now = datetime.now()
+            claimed = session.execute(
+                update(OptimiserJob)
+                .where(OptimiserJob.id == job.id, OptimiserJob.status == OptimiserJobStatus.QUEUED)
+                .values(status=OptimiserJobStatus.RUNNING, started_at=now, update_date_time=now)
+            ).rowcount
+            if claimed != 1:
+                return None
+            return job.id, job.options or {}
+
+    def fail_stale_jobs(self, older_than: timedelta) -> int:
+        """
+        Marks jobs that have been running for longer than the given time as failed. A worker that stopped while running
+        a job leaves it running forever, and a job that crashed its worker should not be claimed again.
+
+        :param older_than: How long a job may run before it is considered abandoned.
+        :return: The number of jobs marked as failed.
+        """
+        now = datetime.now()
+        with session_scope() as session:
+            failed = session.execute(
+                update(OptimiserJob)
+                .where(OptimiserJob.status == OptimiserJobStatus.RUNNING, OptimiserJob.started_at < now - older_than)
+                .values(status=OptimiserJobStatus.FAILED, finished_at=now, update_date_time=now,
+                        error='The worker stopped before the job finished.')
+            ).rowcount
+        if failed:
+            logging.warning(f"{failed} abandoned optimiser jobs marked as failed.")
+        return failed
+
+    def complete_job(self, job_id: int, timings: dict, result: dict) -> None:
+        """
+        Marks a job as done and stores the timings and summary of the run.
+        """
+        self._finish_job(job_id, OptimiserJobStatus.DONE, timings=timings, result=result)
+
+    def fail_job(self, job_id: int, error: str, timings: Optional[dict] = None) -> None:
+        """
+        Marks a job as failed and stores the error that stopped it.
+        """
+        self._finish_job(job_id, OptimiserJobStatus.FAILED, timings=timings, error=error)
+
+    def _finish_job(self, job_id: int, status: OptimiserJobStatus, **values) -> None:
+        with session_scope() as session:
+            job = session.query(OptimiserJob).filter(OptimiserJob.id == job_id).first()
+            if job is None:
+                logging.error(f"Optimiser job {job_id} not found.")
+                raise ValueError(f"Optimiser job {job_id} not found.")
+            job.status = status
+            job.finished_at = datetime.now()
+            for key, value in values.items():
+                setattr(job, key, value)
@@ -0,0 +1,82 @@
+import logging
+from typing import List, Optional
+
+from domain import session_scope, OptimiserRun
+
+# The phases of a run that follow each other, the solver reports phases inside of 'solve' that are not part of the total
+SEQUENTIAL_PHASES = ('load', 'compatibility', 'mastery', 'skill_requirement', 'presolve', 'cache', 'solve', 'save',
+                     'notify')
+
+
+class OptimiserRunRepository:
+
+    def __init__(self):
+        pass
+
+    def create_run(self, options: dict, summary: Optional[dict], timings: Optional[dict], job_id: Optional[int] = None,
+                   error: Optional[str] = None) -> int:
+        """
+        Records the dimensions, outcome and phase timings of an optimiser run.
+
+        :param options: The arguments the optimiser was run with.
+        :param summary: The summary of the solution returned by Optimiser.summarise, None if the run failed before it
+        was solved.
+        :param timings: Seconds spent in each phase of the run.
+        :param job_id: The job the run was made for.
+        :param error: The error that stopped the run, if any.
+        :return: The id of the recorded run.
+        """
+        summary = summary or {}
+        timings = timings or {}
+        with session_scope() as session:
+            run = OptimiserRun(
+                job_id=job_id,
+                options=options,
+                status='FAILED' if error is not None else summary.get('status'),
+                objective=summary.get('objective'),
+                gap=summary.get('gap'),
+                assignments=summary.get('assignments'),
+                shifts=summary.get('shifts'),
+                volunteers=summary.get('volunteers'),
+                roles=summary.get('roles'),
+                positions=summary.get('positions'),
+                compatible_pairs=summary.get('compatible_pairs'),
+                winner=summary.get('winner'),
+                timings=timings,
+                total_seconds=round(sum(timings[phase] for phase in SEQUENTIAL_PHASES if phase in timings), 4),
+                error=error
+            )
+            session.add(run)
+            session.flush()
+            logging.info(f"Optimiser run {run.id} recorded.")
+            return run.id
+
+    def get_runs(self, limit: int = 50) -> List[dict]:
+        """
+        :param limit: The maximum number of runs to return.
+        :return: The most recent runs as dictionaries, newest first.
+        """
+        with session_scope() as session:
+            runs = session.query(OptimiserRun) \
+                .order_by(OptimiserRun.id.desc()) \
+                .limit(limit) \
+                .all()
+            return [{
+                'id': run.id,
+                'job_id': run.job_id,
+                'options': run.options,
+                'status': run.status,
+                'objective': run.objective,
+                'gap': run.gap,
+                'assignments': run.assignments,
+                'shifts': run.shifts,
+                'volunteers': run.volunteers,
+                'roles': run.roles,
+                'positions': run.positions,
+                'compatible_pairs': run.compatible_pairs,
+                'winner': run.winner,
+                'timings': run.timings,
+                'total_seconds': run.total_seconds,
+                'error': run.error,
+                'created': run.insert_date_time,
+            } for run in runs]
@@ -0,0 +1,49 @@
+import logging
+from typing import Optional
+
+from domain import session_scope, OptimiserSolution
+
+
+class OptimiserSolutionRepository:
+
+    def __init__(self):
+        pass
+
+    def get_solution(self, fingerprint: str) -> Optional[dict]:
+        """
+        :param fingerprint: The fingerprint of the optimiser inputs.
+        :return: The stored solution for the inputs as a dictionary, or None if the inputs have not been solved before.
+        """
+        with session_scope() as session:
+            solution = session.query(OptimiserSolution) \
+                .filter(OptimiserSolution.fingerprint == fingerprint) \
+                .first()
+            if solution is None:
+                return None
+            return {
+                'assignments': [tuple(assignment) for assignment in solution.assignments],
+                'status': solution.status,
+                'objective': solution.objective,
+                'bound': solution.bound,
+            }
+
+    def save_solution(self, fingerprint: str, assignments: list, status: str, objective: Optional[float] = None,
+                      bound: Optional[float] = None) -> None:
+        """
+        Stores the solution found for a fingerprint. A solution that is already stored for the fingerprint is kept, as
+        identical inputs have equally good solutions.
+        """
+        with session_scope() as session:
+            exists = session.query(OptimiserSolution.id) \
+                .filter(OptimiserSolution.fingerprint == fingerprint) \
+                .first()
+            if exists is not None:
+                logging.info(f"A solution for fingerprint {fingerprint} is already stored.")
+                return
+            session.add(OptimiserSolution(
+                fingerprint=fingerprint,
+                assignments=[list(assignment) for assignment in assignments],
+                status=status,
+                objective=objective,
+                bound=bound
+            ))
@@ -1,5 +1,8 @@
 import logging
-from typing import List, Optional
+from collections import deque
+from typing import Iterable, List, Optional
+
+from sqlalchemy import insert, update
 
 from datetime import datetime
 
@@ -173,6 +176,37 @@ class ShiftRepository:
                 logging.error(f"Error updating shift {shift_id} to PENDING: {e}")
                 raise
 
+    def update_shifts_pending(self, shift_ids: Iterable[int]) -> int:
+        """
+        Updates the status of many shifts to 'PENDING' with a single statement.
+
+        Parameters:
+        ----------
+        shift_ids : Iterable[int]
+            The IDs of the shifts to update.
+
+        Returns:
+        -------
+        int
+            The number of shifts that were updated.
+        """
+        shift_ids = set(shift_ids)
+        if not shift_ids:
+            return 0
+        with session_scope() as session:
+            try:
+                updated = session.execute(
+                    update(ShiftRequest)
+                    .where(ShiftRequest.id.in_(shift_ids))
+                    .values(status=ShiftStatus.PENDING, update_date_time=datetime.now())
+                ).rowcount
+                logging.info(f"{updated} shifts updated to PENDING.")
+                return updated
+            except Exception as e:
+                session.rollback()
+                logging.error(f"Error updating {len(shift_ids)} shifts to PENDING: {e}")
+                raise
+
     def update_shift_status(self, user_id: int, shift_id: int, new_status: ShiftVolunteerStatus) -> bool:
         """
             Updates the status of a volunteer's shift request in the database.
@@ -234,20 +268,63 @@ class ShiftRepository:
                 logging.error(f"Error updating shift request for user {user_id} and shift_id {shift_id}: {e}")
                 return False
 
-    def save_shift_assignments(self, assignments: List[dict]) -> None:
+    def save_shift_assignments(self, assignments: List[dict]) -> List[dict]:
         """
         Saves multiple shift assignments and creates unavailability records in bulk,
         checking for conflicts before saving.
 
+        The whole batch is checked with a fixed number of queries: the accepted shifts of every user in the batch and
+        the open positions of every shift in the batch are each loaded once. Overlaps, including overlaps between
+        assignments of the same batch, are then detected in memory and the records are inserted with one executemany
+        statement per table.
+
         Parameters:
         ----------
         assignments : List[dict]
             A list of dictionaries containing assignment data.
+
+        Returns:
+        -------
+        List[dict]
+            The assignments that were saved, assignments that conflict or have no open position are left out.
         """
+        if not assignments:
+            return []
+
         with session_scope() as session:
             try:
+                user_ids = {assignment['user_id'] for assignment in assignments}
+                shift_ids = {assignment['shift_id'] for assignment in assignments}
+
+                # The (shift id, start, end) of the shifts each user is already accepted on
+                booked_shifts = {}
+                accepted = session.query(ShiftRequestVolunteer.user_id, ShiftRequest.id, ShiftRequest.startTime,
+                                         ShiftRequest.endTime) \
+                    .join(ShiftRequest, ShiftRequest.id == ShiftRequestVolunteer.request_id) \
+                    .filter(ShiftRequestVolunteer.user_id.in_(user_ids)) \
+                    .filter(ShiftRequestVolunteer.status == ShiftVolunteerStatus.ACCEPTED) \
+                    .all()
+                for user_id, booked_id, shift_start, shift_end in accepted:
+                    booked_shifts.setdefault(user_id, []).append((booked_id, shift_start, shift_end))
+
+                # The positions of each shift and role that no volunteer holds yet, in id order
+                booked_positions = session.query(ShiftRequestVolunteer.position_id) \
+                    .filter(ShiftRequestVolunteer.request_id.in_(shift_ids)) \
+                    .filter(ShiftRequestVolunteer.status.in_((ShiftVolunteerStatus.ACCEPTED,
+                                                              ShiftVolunteerStatus.PENDING)))
+                open_positions = {}
+                positions = session.query(ShiftPosition.id, ShiftPosition.shift_id, ShiftPosition.role_code) \
+                    .filter(ShiftPosition.shift_id.in_(shift_ids)) \
+                    .filter(ShiftPosition.id.not_in(booked_positions)) \
+                    .order_by(ShiftPosition.id) \
+                    .all()
+                for position_id, shift_id, role_code in positions:
+                    open_positions.setdefault((shift_id, role_code), deque()).append(position_id)
+
+                now = datetime.now()
                 shift_volunteers = []
                 unavailability_records = []
+                saved = []
 
                 for assignment in assignments:
                     user_id = assignment['user_id']
@@ -256,57 +333,50 @@ class ShiftRepository:
                     shift_start = assignment['shift_start']
                     shift_end = assignment['shift_end']
 
-                    # Check for conflicts
-                    has_conflict = self.check_conflict_shifts(
-                        session=session,
-                        user_id=user_id,
-                        shift_id=shift_id,
-                        shift_start=shift_start,
-                        shift_end=shift_end
-                    )
-
-                    if has_conflict:
+                    # Check for conflicts with the other accepted shifts of the user and with the assignments saved
+                    # earlier in this batch, another position on the same shift is not a conflict
+                    user_shifts = booked_shifts.setdefault(user_id, [])
+                    if any(booked_id != shift_id and shift_start < booked_end and shift_end > booked_start
+                           for booked_id, booked_start, booked_end in user_shifts):
                         logging.info(f"Conflict detected for user {user_id} on shift {shift_id}. Assignment skipped.")
                         continue  # Skip this assignment
 
-                    # Fetch the ShiftPosition based on shift_id and role_code
-                    shift_position = session.query(ShiftPosition).filter_by(
-                        shift_id=shift_id,
-                        role_code=role_code
-                    ).first()
-
-                    if not shift_position:
-                        logging.error(f"ShiftPosition not found for shift_id {shift_id} and role_code {role_code}.")
+                    # Take the first open ShiftPosition based on shift_id and role_code
+                    shift_positions = open_positions.get((shift_id, role_code))
+                    if not shift_positions:
+                        logging.error(f"No open ShiftPosition for shift_id {shift_id} and role_code {role_code}.")
                         continue  # Skip this assignment
-
-                    # Create ShiftRequestVolunteer object
-                    shift_volunteer = ShiftRequestVolunteer(
-                        user_id=user_id,
-                        request_id=shift_id,
-                        position_id=shift_position.id,
-                        status=ShiftVolunteerStatus.ACCEPTED,
-                        update_date_time=datetime.now(),
-                        insert_date_time=datetime.now(),
-                    )
-                    shift_volunteers.append(shift_volunteer)
-
-                    # Create UnavailabilityTime object
-                    unavailability_record = UnavailabilityTime(
-                        userId=user_id,
-                        title=f"Shift {shift_id}",
-                        periodicity=3,
-                        start=shift_start,
-                        end=shift_end,
-                        is_shift=True
-                    )
-                    unavailability_records.append(unavailability_record)
-
-                # Bulk save all records
-                session.bulk_save_objects(shift_volunteers)
-                session.bulk_save_objects(unavailability_records)
+                    position_id = shift_positions.popleft()
+
+                    user_shifts.append((shift_id, shift_start, shift_end))
+
+                    shift_volunteers.append({
+                        'user_id': user_id,
+                        'request_id': shift_id,
+                        'position_id': position_id,
+                        'status': ShiftVolunteerStatus.ACCEPTED,
+                        'last_update_datetime': now,
+                        'created_datetime': now,
+                    })
+                    unavailability_records.append({
+                        'userId': user_id,
+                        'title': f"Shift {shift_id}",
+                        'periodicity': 3,
+                        'start': shift_start,
+                        'end': shift_end,
+                        'status': True,
+                        'is_shift': True,
+                    })
+                    saved.append(assignment)
+
+                # Insert all records with one executemany statement per table
+                if saved:
+                    session.execute(insert(ShiftRequestVolunteer.__table__), shift_volunteers)
+                    session.execute(insert(UnavailabilityTime.__table__), unavailability_records)
 
                 session.commit()
-                logging.info(f"Successfully saved {len(shift_volunteers)} shift assignments.")
+                logging.info(f"Successfully saved {len(saved)} shift assignments.")
+                return saved
 
             except Exception as e:
                 session.rollback()
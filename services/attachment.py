@@ -1,6 +1,3 @@
-from ics import Calendar, Event
-
-
 class AttachmentService:
 
     def __init__(self):
@@ -8,6 +5,7 @@ class AttachmentService:
 
     @staticmethod
     def generate(title, start_date, end_date):
+        from ics import Calendar, Event
         c = Calendar()
         e = Event()
         e.name = title
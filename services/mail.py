@@ -2,9 +2,6 @@ import base64
 import os
 from datetime import datetime
 
-from sendgrid import SendGridAPIClient, FileContent, FileType, FileName, Disposition, ContentId, Attachment
-from sendgrid.helpers.mail import Mail
-
 from services.attachment import AttachmentService
 from services.secrets import SecretService
 
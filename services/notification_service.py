@@ -1,13 +1,20 @@
 import logging
 import os
-import firebase_admin
-from firebase_admin import credentials, messaging, exceptions
+from concurrent.futures import ThreadPoolExecutor
+
 from typing import List, Optional
 
+# FCM accepts at most 500 tokens in a single multicast message
+MULTICAST_LIMIT = 500
+
 
 class NotificationService:
 
     def __init__(self):
+        # firebase_admin is only imported once a notification is sent, it is slow to import and pulls in the Google
+        # API clients
+        import firebase_admin
+        from firebase_admin import credentials
 
         if not firebase_admin._apps:
             cred_path = f"{os.getcwd()}/google-credentials.json"
@@ -23,6 +30,8 @@ class NotificationService:
         :param body: The body content of the notification.
         :param data: Optional additional data for the notification.
         """
+        from firebase_admin import messaging, exceptions
+
         if not fcm_token_list:
             logging.warning("No FCM tokens provided. Cannot send notification.")
 
@@ -41,3 +50,46 @@ class NotificationService:
                 logging.error(f"Firebase error for token {token}: {e}")
             except Exception as e:
                 logging.error(f"Error sending message to token {token}: {e}")
+
+    def send_multicast(self, fcm_token_list: List[str], title: str, body: str, data: Optional[dict] = None,
+                       max_workers: int = 4) -> int:
+        """
+        Send the same message to many devices. The tokens are split into multicast batches which are sent concurrently
+        on a bounded thread pool.
+
+        :param fcm_token_list: List of FCM tokens to send the notification to.
+        :param title: The title of the notification.
+        :param body: The body content of the notification.
+        :param data: Optional additional data for the notification.
+        :param max_workers: The maximum number of batches sent at the same time.
+        :return: The number of devices the notification was delivered to.
+        """
+        from firebase_admin import messaging, exceptions
+
+        if not fcm_token_list:
+            logging.warning("No FCM tokens provided. Cannot send notification.")
+            return 0
+
+        batches = [fcm_token_list[i:i + MULTICAST_LIMIT] for i in range(0, len(fcm_token_list), MULTICAST_LIMIT)]
+
+        def send(tokens: List[str]) -> int:
+            message = messaging.MulticastMessage(
+                notification=messaging.Notification(title=title, body=body),
+                data=data or {},
+                tokens=tokens
+            )
+            try:
+                response = messaging.send_each_for_multicast(message)
+                if response.failure_count:
+                    logging.warning(f"Failed to send message to {response.failure_count} of {len(tokens)} tokens")
+                return response.success_count
+            except exceptions.FirebaseError as e:
+                logging.error(f"Firebase error for a batch of {len(tokens)} tokens: {e}")
+            except Exception as e:
+                logging.error(f"Error sending message to a batch of {len(tokens)} tokens: {e}")
+            return 0
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            delivered = sum(executor.map(send, batches))
+        logging.info(f"Successfully sent message to {delivered} of {len(fcm_token_list)} tokens")
+        return delivered
@@ -1,3 +1,10 @@
 # The 3rd movie is always the best.
 # ... no its not?
-from .optimiser import Optimiser
\ No newline at end of file
+
+
+def __getattr__(name):
+    # The optimiser imports numpy, MiniZinc and the solver engines, so it is only loaded once it is used
+    if name == 'Optimiser':
+        from .optimiser import Optimiser
+        return Optimiser
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,15 @@
 import json
 from datetime import timedelta, datetime
 from typing import List
-from sqlalchemy import orm, func, alias
+from sqlalchemy import orm, func, or_, and_
+import numpy as np
 
 from domain import (User, Role, UserRole, UserType, AssetTypeRole, ShiftRequest, ShiftPosition,
-                    UnavailabilityTime, ShiftStatus)
+                    UnavailabilityTime, ShiftStatus, ShiftRequestVolunteer, ShiftVolunteerStatus)
+from services.optimiser import recurrence
+
+# Volunteers holding a position with one of these statuses are booked on it, the position is no longer open.
+BOOKED = (ShiftVolunteerStatus.ACCEPTED, ShiftVolunteerStatus.PENDING)
 
 
 class Calculator:
@@ -25,9 +30,14 @@ class Calculator:
     # function.
     _session_ = None
 
+    # In incremental mode existing bookings are kept, only open positions are optimised and the time volunteers are
+    # already booked for is unavailable.
+    _incremental_ = False
+
 
-    def __init__(self, session: orm.session):
+    def __init__(self, session: orm.session, incremental: bool = False):
         self._session_ = session
+        self._incremental_ = incremental
 
         # Fetch all the request data that will be used in the optimisation functions once.
         self.__get_request_data()
@@ -70,9 +80,16 @@ class Calculator:
             .filter(User.role != UserType.ADMIN and User.role != UserType.ROOT_ADMIN) \
             .all())
 
-        self._shifts_ = self._session_.query(ShiftRequest) \
-            .filter(ShiftRequest.status == ShiftStatus.SUBMITTED) \
-            .all()
+        shifts = self._session_.query(ShiftRequest)
+        if self._incremental_:
+            # Newly submitted shifts, and shifts that were optimised before but still have open positions
+            open_shifts = self._session_.query(ShiftPosition.shift_id).filter(self.__is_open_position())
+            shifts = shifts.filter(or_(ShiftRequest.status == ShiftStatus.SUBMITTED,
+                                       and_(ShiftRequest.status == ShiftStatus.PENDING,
+                                            ShiftRequest.id.in_(open_shifts))))
+        else:
+            shifts = shifts.filter(ShiftRequest.status == ShiftStatus.SUBMITTED)
+        self._shifts_ = shifts.all()
 
         self._positions_ = self._session_.query(ShiftPosition) \
             .all()
@@ -81,46 +98,97 @@ class Calculator:
             .filter(Role.deleted == False) \
             .all()
 
-    def calculate_compatibility(self) -> List[List[bool]]:
+    def __is_open_position(self):
         """
-        Generates a 2D array of compatibilities between volunteers' unavailability and the requirements of the shift.
+        @return: A filter for the shift positions that no volunteer is booked on.
         """
-        compatibilities = []
-
-        # Iterate through each shift in the request
-        for shift in self._shifts_:
-            # Each shift gets its own row in the result set.
-            shift_compatibility = []
-
-            # Define the shift start and end times
-            shift_start = shift.startTime
-            shift_end = shift.endTime
+        booked_positions = self._session_.query(ShiftRequestVolunteer.position_id) \
+            .filter(ShiftRequestVolunteer.status.in_(BOOKED))
+        return ShiftPosition.id.not_in(booked_positions)
 
-            # Iterate through the users
-            for user in self._users_:
-                # Start by assuming the user is available
-                user_available = True
-
-                # Query unavailability times for the current user
-                unavailability_records = self._session_.query(UnavailabilityTime).filter(
-                    UnavailabilityTime.userId == user.id
-                ).all()
-
-                # Check if any unavailability overlaps with the entire shift period
-                for record in unavailability_records:
-                    if record.start < shift_end and record.end > shift_start:
-                        user_available = False
+    def calculate_compatibility(self) -> np.ndarray:
+        """
+        Generates a 2D array of compatibilities between volunteers' unavailability and the requirements of the shift.
 
-                # Append the user's availability for this shift
-                shift_compatibility.append(user_available)
+        All active unavailability windows for the candidate volunteers are fetched in a single query. Each volunteer's
+        one-off windows are then indexed by start time with a running maximum of their end times, so every shift can be
+        checked against a volunteer with a binary search instead of a query. Recurring windows are checked against all
+        shifts at once using their closed-form next occurrence. In incremental mode the shifts a volunteer is already
+        booked on are treated as one-off windows, so no volunteer is double booked.
+        @return: A boolean array of shape (shifts, volunteers), True where the volunteer is available for the shift.
+        """
+        compatibilities = np.ones((len(self._shifts_), len(self._users_)), dtype=bool)
+        if not self._shifts_ or not self._users_:
+            return compatibilities
+
+        shift_starts = np.array([shift.startTime for shift in self._shifts_], dtype='datetime64[us]')
+        shift_ends = np.array([shift.endTime for shift in self._shifts_], dtype='datetime64[us]')
+
+        # Only windows that could overlap at least one shift are relevant, everything else is filtered by the database.
+        # Recurring windows keep repeating after their first occurrence so only their start can be used to filter.
+        windows = self._session_.query(UnavailabilityTime.userId, UnavailabilityTime.start, UnavailabilityTime.end,
+                                       UnavailabilityTime.periodicity) \
+            .filter(UnavailabilityTime.status == True) \
+            .filter(UnavailabilityTime.start < max(shift.endTime for shift in self._shifts_)) \
+            .filter(or_(UnavailabilityTime.end > min(shift.startTime for shift in self._shifts_),
+                        UnavailabilityTime.periodicity.in_(recurrence.RECURRING))) \
+            .order_by(UnavailabilityTime.userId, UnavailabilityTime.start) \
+            .all()
 
-            # Append the shift compatibilities to the overall result
-            compatibilities.append(shift_compatibility)
+        if self._incremental_:
+            booked = self._session_.query(ShiftRequestVolunteer.user_id, ShiftRequest.startTime, ShiftRequest.endTime) \
+                .join(ShiftRequest, ShiftRequest.id == ShiftRequestVolunteer.request_id) \
+                .filter(ShiftRequestVolunteer.status.in_(BOOKED)) \
+                .filter(ShiftRequest.startTime < max(shift.endTime for shift in self._shifts_)) \
+                .filter(ShiftRequest.endTime > min(shift.startTime for shift in self._shifts_)) \
+                .all()
+            windows = windows + [(user_id, start, end, recurrence.ONE_OFF) for user_id, start, end in booked]
+
+        # Group the windows per user, keeping one-off and recurring windows apart.
+        one_off_windows = {}
+        recurring_windows = {}
+        for user_id, start, end, periodicity in windows:
+            if periodicity in recurrence.NON_RECURRING:
+                one_off_windows.setdefault(user_id, ([], []))
+                one_off_windows[user_id][0].append(start)
+                one_off_windows[user_id][1].append(end)
+            elif periodicity in recurrence.RECURRING:
+                recurring_windows.setdefault(user_id, []).append((start, end, periodicity))
+
+        for user_index, user in enumerate(self._users_):
+            overlapping = np.zeros(len(self._shifts_), dtype=bool)
+
+            if user.id in one_off_windows:
+                starts, ends = one_off_windows[user.id]
+                starts = np.array(starts, dtype='datetime64[us]')
+                # The windows from the database are already sorted, only booked shifts can be out of order.
+                order = np.argsort(starts, kind='stable')
+                starts = starts[order]
+                # The running maximum of the end times means that the last window starting before a shift ends tells
+                # us whether any earlier window is still open when the shift starts.
+                max_ends = np.maximum.accumulate(np.array(ends, dtype='datetime64[us]')[order])
+
+                # Number of windows that start before each shift ends.
+                started = np.searchsorted(starts, shift_ends, side='left')
+                overlapping = started > 0
+                overlapping[overlapping] = max_ends[started[overlapping] - 1] > shift_starts[overlapping]
+
+            if user.id in recurring_windows:
+                starts, ends, periodicities = zip(*recurring_windows[user.id])
+                overlapping |= recurrence.overlaps_many(
+                    np.array(starts, dtype='datetime64[us]')[:, None],
+                    np.array(ends, dtype='datetime64[us]')[:, None],
+                    np.array(periodicities)[:, None],
+                    shift_starts[None, :],
+                    shift_ends[None, :],
+                    closed=False
+                ).any(axis=0)
+
+            compatibilities[:, user_index] = ~overlapping
 
-        # Return the 2D array of compatibilities
         return compatibilities
 
-    def calculate_skill_requirement(self) -> List[List[int]]:
+    def calculate_skill_requirement(self) -> np.ndarray:
         """
         Returns a 2D array showing the number of people required for each skill in an asset shift. Example:
                             Driver Pilot  Ninja
@@ -128,43 +196,37 @@ class Calculator:
                Shift 1  [[1,       0,      0]
                Shift 2  [0,       1,      1]]
                Shift 3  [0,       2,      2]]
-        @return: List of lists containing the required number of people for each role in each shift.
+        The counts come from a single aggregate query over the positions of the submitted shifts, grouped by shift and
+        role. In incremental mode only the open positions are counted.
+        @return: An integer array of shape (shifts, roles) containing the required number of people for each role in
+        each shift.
         """
-        rtn = []
-        # Iterate through each shift
-        for shift in self._shifts_:
-            this_position = []
-            # Iterate through each shift_position
-            for role in self._roles_:
-                # Use the get_role_count function to query the number of people required for this role in the current
-                # shift
-                role_count = self.get_role_count(shift.id, role.code)
+        requirements = np.zeros((len(self._shifts_), len(self._roles_)), dtype=int)
+        if not self._shifts_ or not self._roles_:
+            return requirements
 
-                # Append the role count to the current shift's list
-                this_position.append(role_count)
+        shift_index = {shift.id: index for index, shift in enumerate(self._shifts_)}
+        role_index = {role.code: index for index, role in enumerate(self._roles_)}
 
-            # Append the list of role counts for this shift to the return list
-            rtn.append(this_position)
-
-        return rtn
-
-    def get_role_count(self, shift_request_id, role_code):
-        """
-        given a shift id and a role code, return the number of people required for that specific role
-        this is done by counting the entries of shift positions that match the role
-        """
-        query = self._session_.query(func.count(ShiftPosition.id)) \
+        role_counts = self._session_.query(ShiftPosition.shift_id, ShiftPosition.role_code,
+                                           func.count(ShiftPosition.id)) \
             .join(Role, Role.code == ShiftPosition.role_code) \
-            .filter(Role.deleted == False) \
-            .filter(Role.code == role_code) \
-            .filter(ShiftPosition.shift_id == shift_request_id) \
-
-        result = self._session_.query(func.count('*')).select_from(alias(query)).scalar()
-        if result is None:
-            result = 0
-        return result
-
-    def calculate_mastery(self):
+            .join(ShiftRequest, ShiftRequest.id == ShiftPosition.shift_id) \
+            .filter(Role.deleted == False)
+        if self._incremental_:
+            role_counts = role_counts \
+                .filter(ShiftRequest.status.in_((ShiftStatus.SUBMITTED, ShiftStatus.PENDING))) \
+                .filter(self.__is_open_position())
+        else:
+            role_counts = role_counts.filter(ShiftRequest.status == ShiftStatus.SUBMITTED)
+        role_counts = role_counts.group_by(ShiftPosition.shift_id, ShiftPosition.role_code).all()
+
+        for shift_id, role_code, count in role_counts:
+            if shift_id in shift_index and role_code in role_index:
+                requirements[shift_index[shift_id], role_index[role_code]] = count
+        return requirements
+
+    def calculate_mastery(self) -> np.ndarray:
         """
         For all active roles, return a 2D array of what user can perform what roles.
         For example, if the database has two users, both can drive but only 1 is advanced, the result would look like:
@@ -173,16 +235,25 @@ class Calculator:
                       ----------------------------
               User 1 [[T,         F,          F]
               User 2  [T,         T,          F]]
-        @return: A 2D array explaining what users can perform what roles.
+        All user to role pairs are loaded in a single query and scattered into the array by index.
+        @return: A boolean array of shape (volunteers, roles) explaining what users can perform what roles.
         """
-        rtn = []
-        for user in self._users_:
-            user_role = []
-            for role in self._roles_:
-                user_has_role = self._session_.query(UserRole) \
-                    .filter(UserRole.user == user) \
-                    .filter(UserRole.role == role) \
-                    .first()
-                user_role.append(user_has_role is not None)
-            rtn.append(user_role)
-        return rtn
+        mastery = np.zeros((len(self._users_), len(self._roles_)), dtype=np.bool_)
+        if not self._users_ or not self._roles_:
+            return mastery
+
+        user_index = {user.id: index for index, user in enumerate(self._users_)}
+        role_index = {role.id: index for index, role in enumerate(self._roles_)}
+
+        user_roles = self._session_.query(UserRole.user_id, UserRole.role_id) \
+            .join(Role, Role.id == UserRole.role_id) \
+            .filter(Role.deleted == False) \
+            .filter(UserRole.user_id.in_(user_index)) \
+            .all()
+
+        pairs = [(user_index[user_id], role_index[role_id]) for user_id, role_id in user_roles
+                 if user_id in user_index and role_id in role_index]
+        if pairs:
+            rows, columns = zip(*pairs)
+            mastery[list(rows), list(columns)] = True
+        return mastery
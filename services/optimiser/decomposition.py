@@ -0,0 +1,60 @@
+"""
+Splits an optimisation problem into independent clusters of shifts.
+
+Two shifts only influence each other when their time windows overlap and at least one volunteer could work either of
+them. The shift-overlap graph connects those pairs, and each connected component can be solved on its own without
+changing the combined result.
+"""
+from typing import List
+
+import numpy as np
+
+
+def shift_candidates(compatibility_2d, mastery_2d, skill_requirements_2d) -> np.ndarray:
+    """
+    Calculates which volunteers could fill at least one position of each shift.
+
+    @param compatibility_2d: The (shifts, volunteers) compatibility matrix.
+    @param mastery_2d: The (volunteers, roles) mastery matrix.
+    @param skill_requirements_2d: The (shifts, roles) skill requirement matrix.
+    @return: A boolean (shifts, volunteers) matrix.
+    """
+    required = np.asarray(skill_requirements_2d) > 0
+    qualified = (required.astype(int) @ np.asarray(mastery_2d, dtype=int).T) > 0
+    return np.asarray(compatibility_2d, dtype=bool) & qualified
+
+
+def shift_components(shift_starts, shift_ends, candidates) -> List[np.ndarray]:
+    """
+    Finds the connected components of the shift-overlap graph, where two shifts are connected if their time windows
+    overlap and they share at least one candidate volunteer.
+
+    @param shift_starts: The start of each shift.
+    @param shift_ends: The end of each shift.
+    @param candidates: A boolean (shifts, volunteers) matrix of the volunteers that could work each shift.
+    @return: The sorted shift indexes of each component, ordered by their first shift index.
+    """
+    shift_starts = np.asarray(shift_starts, dtype='datetime64[us]')
+    shift_ends = np.asarray(shift_ends, dtype='datetime64[us]')
+    candidates = np.asarray(candidates, dtype=bool)
+    parent = list(range(len(shift_starts)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    # Sweep over the shifts in start order, only the shifts still running when a shift starts can overlap it.
+    running = []
+    for index in np.argsort(shift_starts, kind='stable'):
+        running = [other for other in running if shift_ends[other] > shift_starts[index]]
+        for other in running:
+            if (candidates[index] & candidates[other]).any():
+                parent[find(index)] = find(other)
+        running.append(index)
+
+    components = {}
+    for index in range(len(parent)):
+        components.setdefault(find(index), []).append(index)
+    return [np.array(component) for component in sorted(components.values())]
@@ -1,27 +1,148 @@
+from dataclasses import dataclass
+
 from domain import AssetRequestVehicle, Role, AssetRequestVolunteer, User, Qualification, UnavailabilityTime
-from sqlalchemy import orm, func, alias
+from sqlalchemy import orm, func, alias, select, event
 import numpy as np
 import datetime
 
+from services.optimiser import recurrence
+
+
+@dataclass(frozen=True)
+class RequestInputs:
+    """
+    The vehicles and positions of an asset request and the requirement matrices built from them. Vehicles are ordered
+    by id and positions by vehicle then id, the arrays are read only so a bundle can be shared.
+    """
+    A: int
+    P: int
+    Q: int
+    R: int
+    # The id, start and end of every vehicle, (A,)
+    vehicle_ids: np.ndarray
+    vehicle_starts: np.ndarray
+    vehicle_ends: np.ndarray
+    # The id of every position, (P,)
+    position_ids: np.ndarray
+    # If position p of vehicle a requires qualification q, (A, P, Q)
+    qualrequirements: np.ndarray
+    # If position p of vehicle a requires role r, (A, P, R)
+    rolerequirements: np.ndarray
+    # If the position with the p-th smallest id belongs to vehicle a, (P, A)
+    posrequirements: np.ndarray
+
+
+# The keys of the session info the loaded inputs are kept under
+CACHE_KEYS = ('request_inputs', 'input_counts')
+
+
+@event.listens_for(orm.Session, 'after_flush')
+@event.listens_for(orm.Session, 'after_commit')
+@event.listens_for(orm.Session, 'after_soft_rollback')
+def clear_cached_inputs(session, *args):
+    """
+    Drops the inputs kept in a session once it writes, commits or rolls back, so later calls see the changes.
+    """
+    for key in CACHE_KEYS:
+        session.info.pop(key, None)
+
+
+def cached_inputs(session, key) -> dict:
+    """
+    @return: The inputs kept in the session under the given key. Pending changes have not been flushed yet, so inputs
+    loaded before them are dropped too.
+    """
+    if session.new or session.dirty or session.deleted:
+        clear_cached_inputs(session)
+    return session.info.setdefault(key, {})
+
+
+def load_counts(session):
+    """
+    Counts the roles and qualifications in a single query, the counts are kept in the session until it changes.
+    @return: The number of roles and the number of qualifications.
+    """
+    cache = cached_inputs(session, 'input_counts')
+    if 'counts' not in cache:
+        cache['counts'] = session.query(select(func.count(Role.id)).scalar_subquery(),
+                                        select(func.count(Qualification.id)).scalar_subquery()).one()
+    return cache['counts']
+
+
+def load_request_inputs(session, request_id) -> RequestInputs:
+    """
+    Loads the vehicles, positions, roles and qualifications of an asset request in three queries and builds every
+    requirement matrix from them. The bundle is kept in the session until it writes, commits or rolls back, so every
+    get_input_* function called with the same session in between shares it.
+    @param session: The SQLAlchemy session to use.
+    @param request_id: The id of the asset request.
+    @return: The inputs of the request.
+    """
+    cache = cached_inputs(session, 'request_inputs')
+    if request_id in cache:
+        return cache[request_id]
+
+    vehicles = session.query(AssetRequestVehicle.id, AssetRequestVehicle.from_date_time,
+                             AssetRequestVehicle.to_date_time) \
+        .filter(AssetRequestVehicle.request_id == request_id) \
+        .order_by(AssetRequestVehicle.id) \
+        .all()
+    positions = session.query(AssetRequestVolunteer.id, AssetRequestVolunteer.vehicle_id,
+                              AssetRequestVolunteer.role_id, AssetRequestVolunteer.qualification_id) \
+        .join(AssetRequestVehicle, AssetRequestVehicle.id == AssetRequestVolunteer.vehicle_id) \
+        .filter(AssetRequestVehicle.request_id == request_id) \
+        .order_by(AssetRequestVolunteer.vehicle_id, AssetRequestVolunteer.id) \
+        .all()
+    R, Q = load_counts(session)
+
+    A, P = len(vehicles), len(positions)
+    vehicle_ids = np.array([vehicle.id for vehicle in vehicles], dtype=np.int64)
+    position_ids = np.array([position.id for position in positions], dtype=np.int64)
+    # The index of the vehicle of every position, vehicle ids are sorted so they can be searched
+    position_vehicles = np.searchsorted(vehicle_ids, [position.vehicle_id for position in positions]).astype(np.int64)
+    # Ids are 1-based indexes into the roles and qualifications, a position without one requires nothing
+    role_ids = np.array([position.role_id or 0 for position in positions], dtype=np.int64)
+    qualification_ids = np.array([position.qualification_id or 0 for position in positions], dtype=np.int64)
+    p = np.arange(P)
+
+    qualrequirements = np.full((A, P, Q), False, dtype=bool)
+    required = (qualification_ids >= 1) & (qualification_ids <= Q)
+    qualrequirements[position_vehicles[required], p[required], qualification_ids[required] - 1] = True
+
+    rolerequirements = np.full((A, P, R), False, dtype=bool)
+    required = (role_ids >= 1) & (role_ids <= R)
+    rolerequirements[position_vehicles[required], p[required], role_ids[required] - 1] = True
+
+    posrequirements = np.full((P, A), False, dtype=bool)
+    posrequirements[p, position_vehicles[np.argsort(position_ids, kind='stable')]] = True
+
+    inputs = RequestInputs(
+        A=A, P=P, Q=Q, R=R,
+        vehicle_ids=vehicle_ids,
+        vehicle_starts=np.array([vehicle.from_date_time for vehicle in vehicles], dtype='datetime64[us]'),
+        vehicle_ends=np.array([vehicle.to_date_time for vehicle in vehicles], dtype='datetime64[us]'),
+        position_ids=position_ids,
+        qualrequirements=qualrequirements,
+        rolerequirements=rolerequirements,
+        posrequirements=posrequirements,
+    )
+    for array in (inputs.vehicle_ids, inputs.vehicle_starts, inputs.vehicle_ends, inputs.position_ids,
+                  inputs.qualrequirements, inputs.rolerequirements, inputs.posrequirements):
+        array.setflags(write=False)
+    cache[request_id] = inputs
+    return inputs
+
 
 def get_input_A(session, request_id):
-    asset_list_count = session.query(AssetRequestVehicle).filter(AssetRequestVehicle.request_id == request_id).count()
-    return asset_list_count
+    return load_request_inputs(session, request_id).A
 
 
 def get_input_R(session):
-    role_list_count = session.query(Role).count()
-    return role_list_count
+    return load_counts(session)[0]
 
 
 def get_input_P(session, request_id):
-    asset_list = session.query(AssetRequestVehicle.id).filter(AssetRequestVehicle.request_id == request_id).all()
-    position_count = 0
-    for v_id in asset_list:
-        asset_position_count = session.query(AssetRequestVolunteer).filter(
-            AssetRequestVolunteer.vehicle_id == v_id[0]).count()
-        position_count += asset_position_count
-    return position_count
+    return load_request_inputs(session, request_id).P
 
 
 def get_input_V(session):
@@ -30,76 +151,19 @@ def get_input_V(session):
 
 
 def get_input_Q(session):
-    qualification_list_count = session.query(Qualification).count()
-    return qualification_list_count
+    return load_counts(session)[1]
 
 
 def get_input_qualrequirements(session, request_id):
-    A = get_input_A(session, request_id)
-    P = get_input_P(session, request_id)
-    Q = get_input_Q(session)
-    qualrequirements_matrix = np.full((A, P, Q), False, dtype=bool)
-    vehicle_list = get_vehicle_list(session, request_id)
-    mark = 0
-    for a in range(0, A):
-        position_list = get_position_list(session, vehicle_list[a])
-        position_in_vehicle = len(position_list)
-        for p in range(0, position_in_vehicle):
-            qualification_id = get_position_qualification(session, position_list[p])
-            if qualification_id == None:
-                continue
-            else:
-                for q in range(0, Q):
-                    if q == qualification_id - 1:
-                        qualrequirements_matrix[a][p + mark][q] = True
-                        break
-                    else:
-                        continue
-        mark += position_in_vehicle
-    return qualrequirements_matrix
+    return load_request_inputs(session, request_id).qualrequirements
 
 
 def get_input_rolerequirements(session, request_id):
-    A = get_input_A(session, request_id)
-    P = get_input_P(session, request_id)
-    R = get_input_R(session)
-    rolerequirements_matrix = np.full((A, P, R), False, dtype=bool)
-    vehicle_list = get_vehicle_list(session, request_id)
-    mark = 0
-    for a in range(0, A):
-        position_list = get_position_list(session, vehicle_list[a])
-        position_in_vehicle = len(position_list)
-        for p in range(0, position_in_vehicle):
-            role_id = get_position_role(session, position_list[p])
-            for r in range(0, R):
-                if r == role_id - 1:
-                    rolerequirements_matrix[a][p + mark][r] = True
-                    break
-                else:
-                    continue
-        mark += position_in_vehicle
-    return rolerequirements_matrix
+    return load_request_inputs(session, request_id).rolerequirements
 
 
 def get_input_posrequirements(session, request_id):
-    A = get_input_A(session, request_id)
-    P = get_input_P(session, request_id)
-    vehicle_list = get_vehicle_list(session, request_id)
-    posrequirements_matrix = np.full((P, A), False, dtype=bool)
-    request_position = get_position_list_all(session, request_id)
-
-    for p in range(0, len(request_position)):
-        p_id = request_position[p]
-        temp_matrix = np.full(A, False, dtype=bool)
-        temp_asset = get_position_vehicle(session, p_id)
-        for a in range(0, A):
-            if vehicle_list[a] == temp_asset:
-                temp_matrix[a] = True
-                break
-            else:
-                continue
-        posrequirements_matrix[p] = temp_matrix
-    return posrequirements_matrix
+    return load_request_inputs(session, request_id).posrequirements
 
 
 def get_qualification_list(session):
@@ -115,7 +179,8 @@ def get_input_qualability(session):
     Q = get_input_Q(session)
     qualification_type = get_qualification_list(session)
     qualability_matrix = np.full((V, Q), False, dtype=bool)
-    v_qualification_list = session.query(User.qualifications).filter(User.role == "VOLUNTEER").all()
+    v_qualification_list = session.query(User.qualifications).filter(User.role == "VOLUNTEER").order_by(User.id) \
+        .all()
 
     for q in range(0, len(v_qualification_list)):
         temp_matrix = np.full(Q, False, dtype=bool)
@@ -142,7 +207,7 @@ def get_input_roleability(session):
 
     role_type = get_role_list(session)
     roleability_matrix = np.full((V, R), False, dtype=bool)
-    v_role_list = session.query(User.possibleRoles).filter(User.role == "VOLUNTEER").all()
+    v_role_list = session.query(User.possibleRoles).filter(User.role == "VOLUNTEER").order_by(User.id).all()
 
     for r in range(0, len(v_role_list)):
         temp_matrix = np.full(R, False, dtype=bool)
@@ -156,38 +221,48 @@ def get_input_roleability(session):
 
 
 def get_input_availability(session, request_id):
-    A = get_input_A(session, request_id)
-    V = get_input_V(session)
-    availability_matrix = np.full((V, A), True, dtype=bool)
-
-    vehicle_list = get_vehicle_list(session, request_id)
-    vehicle_time_list = []
-    for v in vehicle_list:
-        vehicle_time = get_vehicle_time(session, v)
-        vehicle_time_list.append(vehicle_time)
-
-    v_role_list = session.query(User.id).filter(User.role == "VOLUNTEER").all()
-
-    for r in range(0, len(v_role_list)):
-        temp_matrix = np.full(A, True, dtype=bool)
-        user_id = v_role_list[r][0]
-        unavailability_list = time_unavailability_list(session, user_id)
-        for a in range(0, A):
-            a_time = vehicle_time_list[a]
-            for u_l in unavailability_list:
-                user_unavailability = []
-                user_unavailability.append(u_l[0])
-                user_unavailability.append(u_l[1])
-                periodicity = u_l[2]
-                result = if_time_availability(user_unavailability, a_time, periodicity)
-                if not result:
-                    temp_matrix[a] = False
-                    break
-                else:
-                    continue
-
-        availability_matrix[r] = temp_matrix
-    return availability_matrix
+    """
+    Builds the (volunteers, vehicles) availability matrix of an asset request. The unavailability of every volunteer is
+    loaded in one query, limited to the windows that can reach the time span of the request, and tested against every
+    vehicle at once; recurring windows are moved to their occurrence nearest each vehicle rather than expanded.
+    Volunteers are ordered by id, like the rows of the qualification and role ability matrices.
+    """
+    inputs = load_request_inputs(session, request_id)
+    volunteer_ids = np.array([user_id for user_id, in session.query(User.id).filter(User.role == "VOLUNTEER")
+                             .order_by(User.id)], dtype=np.int64)
+    unavailable = np.full((len(volunteer_ids), inputs.A), False, dtype=bool)
+    if inputs.A == 0 or len(volunteer_ids) == 0:
+        return ~unavailable
+
+    request_start = inputs.vehicle_starts.min().item()
+    request_end = inputs.vehicle_ends.max().item()
+    windows = session.query(UnavailabilityTime.userId, UnavailabilityTime.start, UnavailabilityTime.end,
+                            UnavailabilityTime.periodicity) \
+        .join(User, User.id == UnavailabilityTime.userId) \
+        .filter(User.role == "VOLUNTEER", UnavailabilityTime.status) \
+        .filter(UnavailabilityTime.start <= request_end) \
+        .filter((UnavailabilityTime.end >= request_start) |
+                UnavailabilityTime.periodicity.in_(recurrence.RECURRING)) \
+        .all()
+    if not windows:
+        return ~unavailable
+
+    user_ids, starts, ends, periodicities = zip(*windows)
+    rows = np.searchsorted(volunteer_ids, user_ids)
+    starts = np.array(starts, dtype='datetime64[us]')
+    ends = np.array(ends, dtype='datetime64[us]')
+    periodicities = np.array(periodicities)
+    # Every window against every vehicle, (windows, vehicles). Most windows do not repeat and only need an interval
+    # comparison, the occurrences of recurring windows are found by recurrence.overlaps_many.
+    recurring = np.isin(periodicities, recurrence.RECURRING)
+    once = np.isin(periodicities, recurrence.NON_RECURRING)
+    clashes = (starts[once, None] <= inputs.vehicle_ends[None, :]) \
+        & (ends[once, None] >= inputs.vehicle_starts[None, :])
+    np.logical_or.at(unavailable, rows[once], clashes)
+    clashes = recurrence.overlaps_many(starts[recurring, None], ends[recurring, None], periodicities[recurring, None],
+                                       inputs.vehicle_starts[None, :], inputs.vehicle_ends[None, :], closed=True)
+    np.logical_or.at(unavailable, rows[recurring], clashes)
+    return ~unavailable
 
 
 def time_unavailability_list(session, user_id):
@@ -199,78 +274,23 @@ def time_unavailability_list(session, user_id):
 
 
 def if_time_availability(user_unavailability, vehicle_time, periodicity):
-    user_unavailability_start = user_unavailability[0]
-    user_unavailability_end = user_unavailability[1]
-    vehicle_time_start = vehicle_time[0]
-    vehicle_time_end = vehicle_time[1]
-
-    if vehicle_time_end < user_unavailability_start:
-        return True
-
-    # repeat once
-    # Todo: Fix the database, as both 3 and 0 are representing the non-repeat action,
-    #  we need to modify that only 0 or only 3 shows up the non-repeat action
-    if periodicity == 3 or periodicity == 0:
-        if user_unavailability_start <= vehicle_time_start <= user_unavailability_end:
-            return False
-        elif user_unavailability_start <= vehicle_time_end <= user_unavailability_end:
-            return False
-        elif vehicle_time_start <= user_unavailability_start and vehicle_time_end >= user_unavailability_end:
-            return False
-        elif vehicle_time_start >= user_unavailability_start and vehicle_time_end <= user_unavailability_end:
-            return False
-        else:
-            return True
-
-    # repeat weekly
-    elif periodicity == 2:
-        while vehicle_time_start > user_unavailability_end:
-            user_unavailability_start = user_unavailability_start + datetime.timedelta(weeks=1)
-            user_unavailability_end = user_unavailability_end + datetime.timedelta(weeks=1)
-        if user_unavailability_start <= vehicle_time_start <= user_unavailability_end:
-            return False
-        elif user_unavailability_start <= vehicle_time_end <= user_unavailability_end:
-            return False
-        elif vehicle_time_start <= user_unavailability_start and vehicle_time_end >= user_unavailability_end:
-            return False
-        elif vehicle_time_start >= user_unavailability_start and vehicle_time_end <= user_unavailability_end:
-            return False
-        else:
-            return True
-
-    # repeat daily
-    elif periodicity == 1:
-        while vehicle_time_start > user_unavailability_end:
-            user_unavailability_start = user_unavailability_start + datetime.timedelta(days=1)
-            user_unavailability_start = user_unavailability_start + datetime.timedelta(days=1)
-            if user_unavailability_start <= vehicle_time_start <= user_unavailability_end:
-                return False
-            elif user_unavailability_start <= vehicle_time_end <= user_unavailability_end:
-                return False
-            elif vehicle_time_start <= user_unavailability_start and vehicle_time_end >= user_unavailability_end:
-                return False
-            elif vehicle_time_start >= user_unavailability_start and vehicle_time_end <= user_unavailability_end:
-                return False
-            else:
-                return True
-    else:
-        return True
+    """
+    Checks if a volunteer is available for a vehicle given one of their (possibly recurring) unavailability windows.
+    Windows that only touch the vehicle time at their boundaries still count as a clash.
+    """
+    return not recurrence.overlaps(user_unavailability[0], user_unavailability[1], periodicity,
+                                   vehicle_time[0], vehicle_time[1], closed=True)
 
 
 def get_input_clashes(session, request_id):
-    A = get_input_A(session, request_id)
-    clashes_matrix = np.full((A, A), False, dtype=bool)
-    vehicle_list = get_vehicle_list(session, request_id)
-    vehicle_time_list = []
-    for v_id in vehicle_list:
-        vehicle_time_list.append(get_vehicle_time(session, v_id))
-    for a in range(0, A):
-        for b in range(0, A):
-            if a == b:
-                continue
-            else:
-                result = if_clash(vehicle_time_list[a], vehicle_time_list[b])
-                clashes_matrix[a][b] = result
+    """
+    Builds the (vehicles, vehicles) matrix of vehicles whose times overlap, including those that only touch at their
+    boundaries. A vehicle does not clash with itself.
+    """
+    inputs = load_request_inputs(session, request_id)
+    starts, ends = inputs.vehicle_starts, inputs.vehicle_ends
+    clashes_matrix = (starts[:, None] <= ends[None, :]) & (starts[None, :] <= ends[:, None])
+    np.fill_diagonal(clashes_matrix, False)
     return clashes_matrix
 
 
@@ -0,0 +1,88 @@
+"""
+Solves the assignment problem as a maximum bipartite matching instead of a MiniZinc model.
+
+A volunteer can fill at most one position per shift and shifts do not constrain each other, so each shift is an
+independent matching between its required positions and the volunteers that are compatible with the shift and
+qualified for the role of the position. The Hopcroft-Karp algorithm finds a maximum matching for every shift, which
+fills as many positions as the sparse formulation does at its optimum.
+"""
+from collections import deque
+from typing import List
+
+import numpy as np
+
+from services.optimiser.solution import Solution, OPTIMAL
+
+
+def maximum_matching(adjacency: List[List[int]], right_count: int) -> List[int]:
+    """
+    Finds a maximum matching of a bipartite graph with the Hopcroft-Karp algorithm.
+
+    @param adjacency: The right vertices each left vertex is connected to.
+    @param right_count: The number of right vertices.
+    @return: The right vertex matched to each left vertex, or -1 if it is unmatched.
+    """
+    match_left = [-1] * len(adjacency)
+    match_right = [-1] * right_count
+
+    def augment(left, distance):
+        for right in adjacency[left]:
+            other = match_right[right]
+            if other == -1 or (distance[other] == distance[left] + 1 and augment(other, distance)):
+                match_left[left] = right
+                match_right[right] = left
+                return True
+        # No augmenting path continues through this vertex during the current phase
+        distance[left] = -1
+        return False
+
+    while True:
+        # Layer the graph by the distance from the unmatched left vertices along alternating paths
+        distance = [0 if right == -1 else -1 for right in match_left]
+        queue = deque(left for left, right in enumerate(match_left) if right == -1)
+        found = False
+        while queue:
+            left = queue.popleft()
+            for right in adjacency[left]:
+                other = match_right[right]
+                if other == -1:
+                    found = True
+                elif distance[other] == -1:
+                    distance[other] = distance[left] + 1
+                    queue.append(other)
+        if not found:
+            return match_left
+
+        for left in range(len(adjacency)):
+            if match_left[left] == -1:
+                augment(left, distance)
+
+
+def solve(compatibility_2d, mastery_2d, skill_requirements_2d) -> Solution:
+    """
+    Fills as many positions as possible by matching the positions of every shift to volunteers.
+
+    @param compatibility_2d: The (shifts, volunteers) compatibility matrix.
+    @param mastery_2d: The (volunteers, roles) mastery matrix.
+    @param skill_requirements_2d: The (shifts, roles) skill requirement matrix.
+    @return: The optimal solution, its objective is the number of filled positions.
+    """
+    compatibility_2d = np.asarray(compatibility_2d, dtype=bool)
+    qualified = np.asarray(mastery_2d, dtype=bool).T
+    skill_requirements_2d = np.asarray(skill_requirements_2d, dtype=int)
+    num_volunteers = compatibility_2d.shape[1]
+
+    assignments = []
+    bound = 0
+    for shift_index, required in enumerate(skill_requirements_2d):
+        # One row per required position holding the role index it has to be filled with
+        roles = np.repeat(np.arange(len(required)), required)
+        candidates = compatibility_2d[shift_index] & qualified[roles]
+        adjacency = [np.flatnonzero(row).tolist() for row in candidates]
+        bound += sum(1 for volunteers in adjacency if volunteers)
+
+        for role_index, volunteer_index in zip(roles, maximum_matching(adjacency, num_volunteers)):
+            if volunteer_index != -1:
+                assignments.append((shift_index, volunteer_index, int(role_index)))
+
+    return Solution(assignments=assignments, status=OPTIMAL, objective=len(assignments), bound=bound)
@@ -1,12 +1,27 @@
+import asyncio
+import functools
+import hashlib
 import logging
-import minizinc
+import os
+import numpy as np
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from sqlalchemy import orm
-from datetime import datetime
-from domain import ShiftRequestVolunteer, UnavailabilityTime
+from datetime import datetime, timedelta
+from typing import List, Tuple, Optional, TYPE_CHECKING
+from domain import ShiftRequestVolunteer, UnavailabilityTime, on_commit
 from repository.fcm_token_repository import FCMTokenRepository
+from repository.optimiser_solution_repository import OptimiserSolutionRepository
+from services.optimiser import decomposition, matching, options, presolve, symmetry
 from services.optimiser.calculator import Calculator
+from services.optimiser.solution import Solution, OPTIMAL
 from repository.shift_repository import ShiftRepository
 
+if TYPE_CHECKING:
+    # MiniZinc is imported on first use, this import only resolves the annotations
+    import minizinc
+
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +29,33 @@ logger = logging.getLogger(__name__)
 
 
 class Optimiser:
+    # The model formulations and engines the optimiser can solve with, see services/optimiser/options.py. The
+    # automatic engine selection uses the matching engine for problems of at least MATCHING_THRESHOLD
+    # (shift, volunteer, role) combinations, or whenever MiniZinc is not installed.
+    DENSE = options.DENSE
+    SPARSE = options.SPARSE
+    FORMULATIONS = options.FORMULATIONS
+    AUTO = options.AUTO
+    MINIZINC = options.MINIZINC
+    MATCHING = options.MATCHING
+    PORTFOLIO = options.PORTFOLIO
+    ENGINES = options.ENGINES
+    MATCHING_THRESHOLD = 10000
+
+    # Part of the fingerprint of stored solutions, increase it whenever a change to the models or engines changes which
+    # solutions are found for the same inputs.
+    MODEL_VERSION = 3
+
+    # The (name, MiniZinc solver, number of processes) configurations the portfolio engine races on the sparse
+    # formulation, a configuration without a solver is the matching engine. Solvers that are not installed are skipped.
+    PORTFOLIO_CONFIGURATIONS = (
+        ('gecode', 'gecode', None),
+        ('gecode-parallel', 'gecode', os.cpu_count()),
+        ('chuffed', 'chuffed', None),
+        ('coin-bc', 'coin-bc', None),
+        (MATCHING, None, None),
+    )
+
     # The calculator generates data structures for the optimiser to solve.
     calculator = None
 
@@ -23,16 +65,112 @@ class Optimiser:
             repository: ShiftRepository,
             debug: bool,
             fcm_token_repository: FCMTokenRepository = None,
+            formulation: str = DENSE,
+            parallel: bool = False,
+            max_workers: Optional[int] = None,
+            incremental: bool = False,
+            time_budget: Optional[float] = None,
+            engine: str = AUTO,
+            solution_repository: OptimiserSolutionRepository = None,
+            force: bool = False,
+            reduce: bool = True,
     ):
         """
         @param session: The SQLAlchemy session to use
         @param repository: The repository class for database operations.
         @param debug: If this should be executed in debug (printing) mode.
+        @param fcm_token_repository: The repository used to notify volunteers of their assignments.
+        @param formulation: The model formulation to solve with, one of Optimiser.FORMULATIONS.
+        @param parallel: If independent clusters of shifts should be solved as separate instances in parallel.
+        @param max_workers: The number of worker processes for parallel solving, defaults to the number of CPUs.
+        @param incremental: If existing bookings should be kept, so that only new shifts and open positions are
+        optimised around the time volunteers are already booked for.
+        @param time_budget: The number of seconds the solver may run for. When the budget runs out the best solution
+        found so far is used, by default the solver runs until the optimum is proven.
+        @param engine: The engine to solve with, one of Optimiser.ENGINES.
+        @param solution_repository: The repository optimal solutions are stored in by the fingerprint of their inputs,
+        so that solving the same inputs again returns the stored solution. Solutions are not stored when omitted.
+        @param force: If the problem should be solved even if a solution for the same inputs is stored.
+        @param reduce: If the roles, shifts and volunteers that cannot be part of any assignment are removed before
+        solving, see services/optimiser/presolve.py.
         """
-        self.calculator = Calculator(session)
+        if formulation not in self.FORMULATIONS:
+            raise ValueError(f"Unknown formulation {formulation}, expected one of {self.FORMULATIONS}")
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine {engine}, expected one of {self.ENGINES}")
+        # Seconds spent in each phase of the run, keyed by phase name
+        self.timings = {}
+        # The dimensions of the problem, known once the matrices have been calculated
+        self.dimensions = {}
+        with self.timed('load'):
+            self.calculator = Calculator(session, incremental)
         self.repository = repository
         self.debug = debug
         self.fcm_token_repository = fcm_token_repository
+        self.formulation = formulation
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.incremental = incremental
+        self.time_budget = time_budget
+        self.engine = engine
+        self.solution_repository = solution_repository
+        self.force = force
+        self.reduce = reduce
+        # The reduced problem of the last run, None if it was not reduced
+        self.reduction = None
+        # If the last solution was returned from the stored solutions instead of being solved
+        self.cached = False
+        # The portfolio configuration whose solution was used, None unless the portfolio engine was used
+        self.winner = None
+
+    @contextmanager
+    def timed(self, phase: str):
+        """
+        Records the wall time spent inside the block as the given phase of the run.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = round(time.perf_counter() - start, 4)
+
+    def summarise(self, solution: Solution) -> dict:
+        """
+        @return: The problem dimensions and the outcome of a solution, small enough to be stored with a job.
+        """
+        return {
+            'status': solution.status,
+            'objective': solution.objective,
+            'bound': solution.bound,
+            'gap': solution.gap,
+            'assignments': len(solution.assignments),
+            'shifts': self.calculator.get_shift_count(),
+            'volunteers': self.calculator.get_number_of_volunteers(),
+            'roles': self.calculator.get_number_of_roles(),
+            'positions': self.dimensions.get('positions'),
+            'compatible_pairs': self.dimensions.get('compatible_pairs'),
+            'reduction': self.reduction.summarise() if self.reduction is not None else None,
+            'incremental': self.incremental,
+            'engine': self.select_engine(),
+            'winner': self.winner,
+            'cached': self.cached,
+        }
+
+    def select_engine(self) -> str:
+        """
+        @return: The engine the problem is solved with, resolving the automatic selection by the size of the problem.
+        """
+        if self.engine != self.AUTO:
+            return self.engine
+        import minizinc
+        if minizinc.default_driver is None:
+            return self.MATCHING
+        if self.reduction is not None:
+            size = int(np.prod(self.reduction.shape))
+        else:
+            size = self.calculator.get_shift_count() * self.calculator.get_number_of_volunteers() \
+                * self.calculator.get_number_of_roles()
+        return self.MATCHING if size >= self.MATCHING_THRESHOLD else self.MINIZINC
 
     @staticmethod
     def generate_model_string():
@@ -41,6 +179,8 @@ class Optimiser:
         @return: The MiniZinc model as a string.
         """
         model_str = r"""
+        include "lex_greatereq.mzn";
+
         int: R;  % Number of roles
         set of int: ROLE = 1..R;
         
@@ -84,6 +224,17 @@ class Optimiser:
             possible_assignment[s, v, r] -> (compatibility[flat_index_sv(s, v)] /\ mastery[flat_index_vr(v, r)])
         );
         
+        % Volunteers compatible with the same shifts and qualified for the same roles are interchangeable, the
+        % assignments of each ordered pair of them are kept in lexicographic order so that their permutations are
+        % not searched
+        int: C;  % Number of ordered pairs of interchangeable volunteers
+        array[1..C] of VOLUNTEER: symmetric_first;
+        array[1..C] of VOLUNTEER: symmetric_second;
+        constraint forall(c in 1..C)(
+            lex_greatereq([possible_assignment[s, symmetric_first[c], r] | s in SHIFT, r in ROLE],
+                          [possible_assignment[s, symmetric_second[c], r] | s in SHIFT, r in ROLE])
+        );
+        
         % Soft skill requirement: Encourage, but do not require, filling each role
         var int: unfilled_roles;
         constraint unfilled_roles = sum(s in SHIFT, r in ROLE)(
@@ -102,135 +253,646 @@ class Optimiser:
         return model_str
 
     @staticmethod
-    def flatten_compatibility(compatibility_2d):
+    def generate_sparse_model_string():
+        """
+        Generate the position based MiniZinc model string for the optimiser. Every required position is a single
+        variable holding the index of the volunteer that fills it, or 0 when it is left unfilled.
+        @return: The MiniZinc model as a string.
+        """
+        model_str = r"""
+        include "alldifferent_except_0.mzn";
+        include "value_precede.mzn";
+
+        int: V;  % Number of volunteers
+        set of int: VOLUNTEER = 1..V;
+
+        int: S;  % Number of shifts
+        set of int: SHIFT = 1..S;
+
+        int: P;  % Number of required positions across all shifts
+        set of int: POSITION = 1..P;
+
+        % The shift each position belongs to
+        array[POSITION] of SHIFT: position_shift;
+
+        % The volunteers that are compatible with the shift and qualified for the role of each position
+        array[POSITION] of set of VOLUNTEER: candidates;
+
+        % Decision variable: the volunteer filling each position, 0 if the position is unfilled
+        array[POSITION] of var 0..V: assigned_volunteer;
+
+        % Only candidates can fill a position
+        constraint forall(p in POSITION)(
+            assigned_volunteer[p] in candidates[p] union {0}
+        );
+
+        % A volunteer should be assigned to at most one position per shift
+        constraint forall(s in SHIFT)(
+            alldifferent_except_0([assigned_volunteer[p] | p in POSITION where position_shift[p] = s])
+        );
+
+        % Volunteers that are candidates for the same positions are interchangeable, the first of each ordered pair of
+        % them is used before the second so their permutations are not searched
+        int: C;  % Number of ordered pairs of interchangeable volunteers
+        array[1..C] of VOLUNTEER: symmetric_first;
+        array[1..C] of VOLUNTEER: symmetric_second;
+        constraint forall(c in 1..C)(
+            value_precede(symmetric_first[c], symmetric_second[c], assigned_volunteer)
+        );
+
+        % Objective: Fill as many positions as possible
+        solve maximize sum(p in POSITION)(bool2int(assigned_volunteer[p] > 0));
+
+        output ["Assigned Volunteers:\n"] ++
+               [ "Position = " ++ show(p) ++ ", Volunteer = " ++ show(assigned_volunteer[p]) ++ "\n"
+                 | p in POSITION where fix(assigned_volunteer[p]) > 0
+               ];
+        """
+        return model_str
+
+    @classmethod
+    def fingerprint(cls, engine, formulation, compatibility_2d, mastery_2d, skill_requirements_2d) -> str:
+        """
+        Hashes everything that determines the solution of a run: the model version, engine, formulation and the
+        contents and shapes of the input matrices. The assignments of a solution are indexes into the matrices, so a
+        stored solution stays valid for any run with the same fingerprint.
+        @return: The hex digest of the inputs.
+        """
+        digest = hashlib.sha256(f"{cls.MODEL_VERSION}:{engine}:{formulation}".encode())
+        for matrix in (compatibility_2d, mastery_2d, skill_requirements_2d):
+            matrix = np.ascontiguousarray(matrix, dtype=np.int64)
+            digest.update(str(matrix.shape).encode())
+            digest.update(matrix.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def expand_positions(skill_requirements_2d) -> np.ndarray:
         """
-        Flattens a 2D compatibility matrix into a 1D list for MiniZinc.
+        Expands a skill requirement matrix into one row per required position.
 
-        :param compatibility_2d: A 2D list where each row represents a volunteer's compatibility with roles
-        :return: A 1D list representing the flattened compatibility matrix
+        :param skill_requirements_2d: A 2D array with the number of people required per shift and role
+        :return: An array of shape (positions, 2) holding the shift index and role index of every position
         """
-        return [item for sublist in compatibility_2d for item in sublist]
+        skill_requirements_2d = np.asarray(skill_requirements_2d, dtype=int)
+        shifts, roles = np.nonzero(skill_requirements_2d)
+        counts = skill_requirements_2d[shifts, roles]
+        return np.column_stack((np.repeat(shifts, counts), np.repeat(roles, counts))).reshape(-1, 2)
 
     @staticmethod
-    def flatten_skill_requirements(skill_requirements_2d):
+    def position_candidates(positions, compatibility_2d, mastery_2d) -> list:
         """
-        Flattens a 2D skill requirement matrix into a 1D list for MiniZinc.
+        Calculates the volunteers that can fill each position.
 
-        :param skill_requirements_2d: A 2D list where each row represents skill requirements per shift and role
-        :return: A 1D list representing the flattened skill requirements matrix
+        :param positions: The (shift index, role index) of every position
+        :param compatibility_2d: The (shifts, volunteers) compatibility matrix
+        :param mastery_2d: The (volunteers, roles) mastery matrix
+        :return: A list with a set of 1-based volunteer indexes for every position
         """
-        return [item for sublist in skill_requirements_2d for item in sublist]
+        compatibility_2d = np.asarray(compatibility_2d, dtype=bool)
+        mastery_2d = np.asarray(mastery_2d, dtype=bool)
+        return [set((np.flatnonzero(compatibility_2d[shift] & mastery_2d[:, role]) + 1).tolist())
+                for shift, role in positions]
 
-    def solve(self):
-        logger.info("Starting the solve process.")
+    @staticmethod
+    def flatten_compatibility(compatibility_2d) -> np.ndarray:
+        """
+        Flattens a 2D compatibility matrix into a 1D array for MiniZinc.
 
-        # Create the MiniZinc model and solver
-        gecode = minizinc.Solver.lookup("gecode")
-        model = minizinc.Model()
-        model.add_string(self.generate_model_string())
+        :param compatibility_2d: A 2D array where each row represents a shift's compatibility with volunteers
+        :return: A 1D array representing the flattened compatibility matrix
+        """
+        return np.ravel(compatibility_2d)
+
+    @staticmethod
+    def flatten_mastery(mastery_2d) -> np.ndarray:
+        """
+        Flattens a 2D mastery matrix into a 1D array for MiniZinc.
+
+        :param mastery_2d: A 2D array where each row represents the roles a volunteer can perform
+        :return: A 1D array representing the flattened mastery matrix
+        """
+        return np.ravel(mastery_2d)
 
+    @staticmethod
+    def flatten_skill_requirements(skill_requirements_2d) -> np.ndarray:
+        """
+        Flattens a 2D skill requirement matrix into a 1D array for MiniZinc.
+
+        :param skill_requirements_2d: A 2D array where each row represents skill requirements per shift and role
+        :return: A 1D array representing the flattened skill requirements matrix
+        """
+        return np.ravel(skill_requirements_2d)
 
+    def solve(self) -> Solution:
+        logger.info("Starting the solve process.")
 
         # Calculate the number of roles, volunteers, and shifts dynamically
         num_roles = self.calculator.get_number_of_roles()
-        num_positions = self.calculator.get_shift_position_count()
         num_volunteers = self.calculator.get_number_of_volunteers()
         num_shifts = self.calculator.get_shift_count()
 
         logger.info(f"Number of roles: {num_roles}, Number of volunteers: {num_volunteers}, Number of shifts: {num_shifts}")
 
         # Fetch compatibility matrix from the calculator
-        compatibility_2d = self.calculator.calculate_compatibility()
-        logger.info(f"Compatibility matrix (2D): {compatibility_2d}")
+        with self.timed('compatibility'):
+            compatibility_2d = self.calculator.calculate_compatibility()
+        logger.debug(f"Compatibility matrix (2D): {compatibility_2d}")
 
         # Fetch mastery matrix from the calculator
-        mastery_2d = self.calculator.calculate_mastery()
-        logger.info(f"Mastery matrix (2D): {mastery_2d}")
+        with self.timed('mastery'):
+            mastery_2d = self.calculator.calculate_mastery()
+        logger.debug(f"Mastery matrix (2D): {mastery_2d}")
 
         # Fetch skill requirements matrix from the calculator
-        skill_requirements_2d = self.calculator.calculate_skill_requirement()
-        logger.info(f"Skill requirements matrix (2D): {skill_requirements_2d}")
+        with self.timed('skill_requirement'):
+            skill_requirements_2d = self.calculator.calculate_skill_requirement()
+        logger.debug(f"Skill requirements matrix (2D): {skill_requirements_2d}")
+
+        self.dimensions = {
+            'positions': int(np.sum(skill_requirements_2d)),
+            'compatible_pairs': int(np.count_nonzero(compatibility_2d)),
+        }
+
+        self.reduction = None
+        if self.reduce:
+            with self.timed('presolve'):
+                self.reduction = presolve.reduce(compatibility_2d, mastery_2d, skill_requirements_2d)
+            logger.info(f"Presolve reduced the problem to {self.reduction.summarise()}.")
+
+        engine = self.select_engine()
+        logger.info(f"Solving with the {engine} engine.")
+
+        fingerprint = None
+        if self.solution_repository is not None:
+            with self.timed('cache'):
+                fingerprint = self.fingerprint(engine, self.formulation, compatibility_2d, mastery_2d,
+                                               skill_requirements_2d)
+                stored = None if self.force else self.solution_repository.get_solution(fingerprint)
+            if stored is not None:
+                logger.info(f"Using the stored solution for fingerprint {fingerprint}.")
+                self.cached = True
+                return Solution(**stored)
+
+        # The solver works on the reduced problem, its assignments are translated back to the full problem
+        reduction = self.reduction or presolve.Reduction(
+            compatibility_2d, mastery_2d, skill_requirements_2d, np.arange(num_shifts), np.arange(num_volunteers),
+            np.arange(num_roles), (num_shifts, num_volunteers, num_roles))
+
+        components = []
+        if self.parallel and engine == self.MINIZINC and not reduction.is_empty:
+            components = decomposition.shift_components(
+                [self.calculator._shifts_[shift].startTime for shift in reduction.shifts],
+                [self.calculator._shifts_[shift].endTime for shift in reduction.shifts],
+                decomposition.shift_candidates(reduction.compatibility_2d, reduction.mastery_2d,
+                                               reduction.skill_requirements_2d)
+            )
+            logger.info(f"Split {len(reduction.shifts)} shifts into {len(components)} independent clusters.")
+
+        # The deadline is absolute so that clusters waiting for a free worker process do not extend the budget
+        deadline = time.time() + self.time_budget if self.time_budget is not None else None
+        with self.timed('solve'):
+            if reduction.is_empty:
+                solution = self.solve_empty(engine, reduction)
+            elif engine == self.MATCHING:
+                solution = matching.solve(reduction.compatibility_2d, reduction.mastery_2d,
+                                          reduction.skill_requirements_2d)
+            elif engine == self.PORTFOLIO:
+                solution, self.winner = solve_portfolio(reduction.compatibility_2d, reduction.mastery_2d,
+                                                        reduction.skill_requirements_2d, deadline)
+                logger.info(f"The portfolio was won by {self.winner}.")
+            elif len(components) > 1:
+                solution = self.solve_components(components, reduction.compatibility_2d, reduction.mastery_2d,
+                                                 reduction.skill_requirements_2d, deadline)
+            else:
+                solution = solve_instance(self.formulation, reduction.compatibility_2d, reduction.mastery_2d,
+                                          reduction.skill_requirements_2d, deadline)
+        solution.assignments = reduction.expand(solution.assignments)
+        # Every (shift, role) pair the dense formulation no longer sees would have counted once towards its objective
+        if engine == self.MINIZINC and self.formulation == self.DENSE:
+            if solution.objective is not None:
+                solution.objective += reduction.removed_pairs
+            if solution.bound is not None:
+                solution.bound += reduction.removed_pairs
+
+        # The phases inside the solver, summed over the clusters when they were solved in parallel
+        self.timings.update(solution.timings)
+
+        # Only proven optima are stored, a solution stopped at its time budget may be improved by solving again
+        if fingerprint is not None and solution.status == OPTIMAL:
+            self.solution_repository.save_solution(fingerprint, solution.assignments, solution.status,
+                                                   solution.objective, solution.bound)
 
-        # Flatten the 2D compatibility, mastery, and skill requirements matrices
-        flattened_compatibility = self.flatten_compatibility(compatibility_2d)
-        flattened_mastery = self.flatten_compatibility(mastery_2d)
-        flattened_skill_requirements = self.flatten_skill_requirements(skill_requirements_2d)
+        if self.debug:
+            print(solution)
+
+        logger.info("Solve process completed.")
+        return solution
+
+    def solve_empty(self, engine: str, reduction: presolve.Reduction) -> Solution:
+        """
+        The solution of a problem in which no position can be filled, found without running an engine.
+        @return: An optimal solution without assignments.
+        """
+        shifts, _, roles = reduction.shape
+        # The dense formulation counts every (shift, role) pair that is left unfilled
+        objective = shifts * roles if engine == self.MINIZINC and self.formulation == self.DENSE else 0
+        return Solution(status=OPTIMAL, objective=objective, bound=objective)
 
-        logger.info(f"Flattened compatibility: {flattened_compatibility}")
-        logger.info(f"Flattened mastery: {flattened_mastery}")
-        logger.info(f"Flattened skill requirements: {flattened_skill_requirements}")
+    def solve_components(self, components, compatibility_2d, mastery_2d, skill_requirements_2d,
+                         deadline: Optional[float] = None) -> Solution:
+        """
+        Solves every cluster of shifts as its own MiniZinc instance in a pool of worker processes and merges the
+        assignments back into the indexes of the full problem.
+        @param components: The shift indexes of each independent cluster.
+        @param deadline: The time.time() at which every cluster has to stop solving, if any.
+        @return: The merged solution.
+        """
+        solutions = []
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(solve_instance, self.formulation, compatibility_2d[component], mastery_2d,
+                                       skill_requirements_2d[component], deadline) for component in components]
+            for component, future in zip(components, futures):
+                solution = future.result()
+                # Map the shift indexes of the cluster back to the full problem
+                solution.assignments = [(int(component[shift_index]), volunteer_index, role_index)
+                                        for shift_index, volunteer_index, role_index in solution.assignments]
+                solutions.append(solution)
+        return Solution.merge(solutions)
+
+    @classmethod
+    @contextmanager
+    def build_instance(cls, formulation, compatibility_2d, mastery_2d, skill_requirements_2d,
+                       solver_name: str = "gecode"):
+        """
+        Creates a MiniZinc instance of the given formulation with all data assigned. Every call gets its own instance,
+        so concurrent solves never wait on each other, only the solver and the model are shared.
+        @param solver_name: The MiniZinc solver the instance is solved with.
+        @return: A context manager yielding the instance, and for the sparse formulation the (shift index, role index)
+        of every position.
+        """
+        instance = new_instance(formulation, solver_name)
+        positions = None
+        if formulation == cls.SPARSE:
+            positions = cls.bind_sparse_data(instance, compatibility_2d, mastery_2d, skill_requirements_2d)
+        else:
+            cls.bind_dense_data(instance, compatibility_2d, mastery_2d, skill_requirements_2d)
+        yield instance, positions
+
+    @classmethod
+    def bind_dense_data(cls, instance, compatibility_2d, mastery_2d, skill_requirements_2d) -> None:
+        """
+        Assigns the data of the dense (shift, volunteer, role) formulation to a MiniZinc instance.
+        """
+        # Flatten the 2D compatibility, mastery, and skill requirements matrices
+        flattened_compatibility = cls.flatten_compatibility(compatibility_2d)
+        flattened_mastery = cls.flatten_mastery(mastery_2d)
+        flattened_skill_requirements = cls.flatten_skill_requirements(skill_requirements_2d)
 
-        # Create an instance
-        instance = minizinc.Instance(gecode, model)
+        logger.debug(f"Flattened compatibility: {flattened_compatibility}")
+        logger.debug(f"Flattened mastery: {flattened_mastery}")
+        logger.debug(f"Flattened skill requirements: {flattened_skill_requirements}")
 
         # Assign the dynamic values to the MiniZinc instance
-        instance["R"] = num_roles
+        num_shifts, num_volunteers = np.shape(compatibility_2d)
+        instance["R"] = np.shape(mastery_2d)[1]
         instance["V"] = num_volunteers
         instance["S"] = num_shifts
         instance["compatibility"] = flattened_compatibility
         instance["mastery"] = flattened_mastery
         instance["skill_requirements"] = flattened_skill_requirements
+        cls.bind_symmetry_data(instance, compatibility_2d, mastery_2d)
 
-        logger.info("Starting to solve the MiniZinc instance.")
-        # Solve the instance
-        result = instance.solve()
-
-        if self.debug:
-            print(result)
+    @classmethod
+    def bind_sparse_data(cls, instance, compatibility_2d, mastery_2d, skill_requirements_2d) -> np.ndarray:
+        """
+        Assigns the data of the sparse position based formulation to a MiniZinc instance.
+        @return: The (shift index, role index) of every position, in the order they are passed to MiniZinc.
+        """
+        positions = cls.expand_positions(skill_requirements_2d)
+        candidates = cls.position_candidates(positions, compatibility_2d, mastery_2d)
+        logger.info(f"Number of positions: {len(positions)}, "
+                    f"Number of candidates: {sum(len(candidate) for candidate in candidates)}")
 
-        logger.info("Solve process completed.")
-        return result
+        num_shifts, num_volunteers = np.shape(compatibility_2d)
+        instance["V"] = num_volunteers
+        instance["S"] = num_shifts
+        instance["P"] = len(positions)
+        # MiniZinc arrays are 1-based
+        instance["position_shift"] = (positions[:, 0] + 1).tolist()
+        instance["candidates"] = candidates
+        cls.bind_symmetry_data(instance, compatibility_2d, mastery_2d)
+        return positions
 
-    def save_result(self, result) -> None:
+    @staticmethod
+    def bind_symmetry_data(instance, compatibility_2d, mastery_2d) -> None:
+        """
+        Assigns the ordered pairs of interchangeable volunteers to a MiniZinc instance of either formulation.
+        """
+        classes = symmetry.interchangeable_volunteers(compatibility_2d, mastery_2d)
+        first, second = symmetry.ordered_pairs(classes)
+        logger.info(f"Number of interchangeable volunteer classes: {len(classes)}, "
+                    f"Number of interchangeable volunteers: {sum(len(members) for members in classes)}")
+        instance["C"] = len(first)
+        instance["symmetric_first"] = first
+        instance["symmetric_second"] = second
+
+    @classmethod
+    def objective_bound(cls, formulation, compatibility_2d, mastery_2d, skill_requirements_2d) -> int:
         """
-        Save the possible assignments to the database using the repository, checking for conflicts.
+        Calculates a bound on the objective of either formulation, used to report the optimality gap of a solution that
+        was stopped at its deadline.
+        @return: For the sparse formulation the number of positions that have at least one candidate, an upper bound
+        as every filled position needs a candidate. For the dense formulation the number of (shift, role) pairs, a
+        lower bound as every assignment that fills a role also counts towards the objective.
+        """
+        if formulation == cls.SPARSE:
+            positions = cls.expand_positions(skill_requirements_2d)
+            candidates = cls.position_candidates(positions, compatibility_2d, mastery_2d)
+            return sum(1 for candidate in candidates if candidate)
+        return int(np.size(skill_requirements_2d))
+
+    @classmethod
+    def decode_result(cls, formulation, result, positions=None) -> List[Tuple[int, int, int]]:
+        """
+        Decodes a MiniZinc result of either formulation into a list of assignments.
+        @param formulation: The formulation the result was solved with.
         @param result: The model result from MiniZinc
+        @param positions: The positions of the sparse formulation.
+        @return: A (shift index, volunteer index, role index) tuple for every assignment.
         """
-        try:
-            assignments = []
-            shifts_to_update = set()  # Keep track of shifts to update to PENDING status
+        if formulation == cls.SPARSE:
+            return [(int(shift_index), volunteer - 1, int(role_index))
+                    for (shift_index, role_index), volunteer in zip(positions, result["assigned_volunteer"])
+                    if volunteer > 0]
+
+        assignments = []
+        # Process the MiniZinc result by iterating over shifts, volunteers, and roles
+        for shift_index, shift_assignments in enumerate(result["possible_assignment"]):  # Iterate over shifts
+            for volunteer_index, volunteer_assignments in enumerate(shift_assignments):  # Iterate over volunteers
+                for role_index, is_assigned in enumerate(volunteer_assignments):  # Iterate over roles
+                    if is_assigned:  # If a volunteer is assigned to a role for this shift
+                        assignments.append((shift_index, volunteer_index, role_index))
+        return assignments
+
+    def save_result(self, result: Solution) -> None:
+        """
+        Save the possible assignments to the database using the repository, checking for conflicts. The assigned
+        volunteers are notified once the assignments are saved.
+        @param result: The solution returned by solve
+        """
+        if not result.found:
+            # Marking the shifts as pending would take them out of every later run with nobody assigned to them
+            logger.warning("No solution was found, the shifts are left unchanged.")
+            return
+        with self.timed('save'):
+            try:
+                assignments = []
+                # Keep track of shifts to update to PENDING status, every optimised shift is updated even if no one
+                # could be assigned to it.
+                shifts_to_update = {shift.id for shift in self.calculator._shifts_}
+
+                for shift_index, volunteer_index, role_index in result.assignments:
+                    shift = self.calculator._shifts_[shift_index]  # Directly access the shift by index
+                    user = self.calculator.get_volunteer_by_index(volunteer_index)
+                    role = self.calculator.get_role_by_index(role_index)
 
-            # Process the MiniZinc result by iterating over shifts, volunteers, and roles
-            for shift_index, shift_assignments in enumerate(result["possible_assignment"]):  # Iterate over shifts
-                shift = self.calculator._shifts_[shift_index]  # Directly access the shift by index
+                    # Collect assignment data
+                    assignments.append({
+                        'user_id': user.id,
+                        'shift_id': shift.id,
+                        'role_code': role.code,
+                        'shift_start': shift.startTime,
+                        'shift_end': shift.endTime
+                    })
 
-                shifts_to_update.add(shift.id)  # Collect shift IDs to update their status later
+                # Update shifts to PENDING status
+                self.repository.update_shifts_pending(shifts_to_update)
 
-                for volunteer_index, volunteer_assignments in enumerate(shift_assignments):  # Iterate over volunteers
-                    user = self.calculator.get_volunteer_by_index(volunteer_index)
+                # Use repository method to save all assignments in bulk, conflict checking is done there
+                saved = self.repository.save_shift_assignments(assignments)
+
+            except Exception as e:
+                logging.error(f"Error processing result data: {e}")
+                raise  # Rethrow the exception after logging
+
+        # Notifications are only sent once the assignments are committed, so none is sent for a rolled back one
+        on_commit(lambda: self.notify_assigned(saved))
 
-                    for role_index, is_assigned in enumerate(volunteer_assignments):  # Iterate over roles
-                        if is_assigned:  # If a volunteer is assigned to a role for this shift
-                            role = self.calculator.get_role_by_index(role_index)
-
-                            # Collect assignment data
-                            assignments.append({
-                                'user_id': user.id,
-                                'shift_id': shift.id,
-                                'role_code': role.code,
-                                'shift_start': shift.startTime,
-                                'shift_end': shift.endTime
-                            })
-
-                            # Send notification
-                            try:
-                                title = "New shift assignment"
-                                body = "You have been assigned to a new shift"
-                                self.fcm_token_repository.notify_user(
-                                    user_id=user.id,
-                                    title=title,
-                                    body=body
-                                )
-                            except Exception as e:
-                                logger.error(f"Error sending notification to user {user.id}: {e}")
-
-            # Update shifts to PENDING status
-            for shift_id in shifts_to_update:
-                self.repository.update_shift_pending(shift_id)
-
-            # Use repository method to save all assignments in bulk, conflict checking is done there
-            self.repository.save_shift_assignments(assignments)
-
-        except Exception as e:
-            logging.error(f"Error processing result data: {e}")
-            raise  # Rethrow the exception after logging
+    def notify_assigned(self, assignments: List[dict]) -> None:
+        """
+        Notifies every assigned volunteer once, however many shifts they were assigned to.
+        @param assignments: The saved assignments.
+        """
+        if self.fcm_token_repository is None or not assignments:
+            return
+        with self.timed('notify'):
+            try:
+                self.fcm_token_repository.notify_users(
+                    user_ids={assignment['user_id'] for assignment in assignments},
+                    title="New shift assignment",
+                    body="You have been assigned to a new shift"
+                )
+            except Exception as e:
+                logger.error(f"Error sending notifications to {len(assignments)} assigned volunteers: {e}")
+
+
+@functools.lru_cache(maxsize=None)
+def solver(name: str = "gecode") -> 'minizinc.Solver':
+    """
+    Looks up a solver configuration once per process, the lookup runs the MiniZinc executable. MiniZinc is imported on
+    first use, so processes that never solve with it do not pay for the import.
+    """
+    import minizinc
+    return minizinc.Solver.lookup(name)
+
+
+@functools.lru_cache(maxsize=None)
+def model(formulation: str) -> 'minizinc.Model':
+    """
+    Generates the model of a formulation once per process. The model is only read by the instances created from it,
+    the first of which stores the output type of the model on it. The FlatZinc cannot be reused as MiniZinc compiles
+    the data into it.
+    """
+    import minizinc
+    model = minizinc.Model()
+    if formulation == Optimiser.SPARSE:
+        model.add_string(Optimiser.generate_sparse_model_string())
+    else:
+        model.add_string(Optimiser.generate_model_string())
+    return model
+
+
+def new_instance(formulation: str, solver_name: str = "gecode") -> 'minizinc.Instance':
+    """
+    Creates an instance of a formulation for a single solve. Only the solver and the model are shared, an instance is
+    never shared: Instance.branch() holds a lock on its parent for as long as the branch is alive, so every solve in
+    the process would wait for the one before it.
+    @return: An instance without any data assigned.
+    """
+    import minizinc
+    return minizinc.Instance(solver(solver_name), model(formulation))
+
+
+def solve_instance(formulation, compatibility_2d, mastery_2d, skill_requirements_2d,
+                   deadline: Optional[float] = None) -> Solution:
+    """
+    Builds and solves a single MiniZinc instance. This is a module level function so that it can be run in a worker
+    process when independent clusters of shifts are solved in parallel.
+    @param deadline: The time.time() at which solving stops and the best solution found so far is returned.
+    @return: The decoded solution, shift indexes are relative to the given matrices.
+    """
+    timeout = None
+    if deadline is not None:
+        timeout = deadline - time.time()
+        if timeout <= 0:
+            logger.info("The time budget ran out before the MiniZinc instance could be solved.")
+            return Solution(bound=Optimiser.objective_bound(formulation, compatibility_2d, mastery_2d,
+                                                            skill_requirements_2d))
+        timeout = timedelta(seconds=timeout)
+    return asyncio.run(search(formulation, compatibility_2d, mastery_2d, skill_requirements_2d, timeout))
+
+
+async def search(formulation, compatibility_2d, mastery_2d, skill_requirements_2d, timeout: Optional[timedelta] = None,
+                 solver_name: str = "gecode", processes: Optional[int] = None) -> Solution:
+    """
+    Builds a MiniZinc instance and searches it with the given solver until it is solved or the timeout is reached.
+    @param solver_name: The MiniZinc solver to search with.
+    @param processes: The number of processes the solver may use, its default when omitted.
+    @return: The decoded solution, shift indexes are relative to the given matrices.
+    """
+    bound = Optimiser.objective_bound(formulation, compatibility_2d, mastery_2d, skill_requirements_2d)
+    start = time.perf_counter()
+    branch = Optimiser.build_instance(formulation, compatibility_2d, mastery_2d, skill_requirements_2d, solver_name)
+    with branch as (instance, positions):
+        timings = {'build': round(time.perf_counter() - start, 4)}
+
+        logger.info(f"Starting to solve the MiniZinc instance with {solver_name}.")
+        status, best, statistics = await stream_solutions(instance, timeout, processes)
+    # MiniZinc reports how long it took to flatten the model into FlatZinc and how long the solver searched
+    for phase, statistic in (('minizinc_flatten', 'flatTime'), ('search', 'solveTime')):
+        if statistic in statistics:
+            seconds = statistics[statistic]
+            timings[phase] = round(seconds.total_seconds() if isinstance(seconds, timedelta) else float(seconds), 4)
+
+    if best is None:
+        return Solution(status=status.name, bound=bound, timings=timings)
+    return Solution(
+        assignments=Optimiser.decode_result(formulation, best, positions),
+        status=status.name,
+        objective=best.objective,
+        bound=bound,
+        timings=timings
+    )
+
+
+def solve_portfolio(compatibility_2d, mastery_2d, skill_requirements_2d, deadline: Optional[float] = None,
+                    configurations=Optimiser.PORTFOLIO_CONFIGURATIONS) -> Tuple[Solution, Optional[str]]:
+    """
+    Races several solver configurations on the sparse formulation of the same problem. The first proven optimum is
+    used and the other configurations are stopped, their MiniZinc processes are terminated. Without a proven optimum
+    the best solution found by the deadline is used.
+    @param deadline: The time.time() at which every configuration has to stop solving, if any.
+    @param configurations: The (name, MiniZinc solver, number of processes) of every configuration to race.
+    @return: The solution that was used and the name of the configuration that found it, None if none did.
+    """
+    timeout = None
+    if deadline is not None:
+        timeout = deadline - time.time()
+        if timeout <= 0:
+            logger.info("The time budget ran out before the portfolio could be started.")
+            return Solution(bound=Optimiser.objective_bound(Optimiser.SPARSE, compatibility_2d, mastery_2d,
+                                                            skill_requirements_2d)), None
+    return asyncio.run(race(configurations, compatibility_2d, mastery_2d, skill_requirements_2d, timeout))
+
+
+# Seconds the portfolio waits past its deadline for the configurations to report the best solution they found
+PORTFOLIO_GRACE = 5
+
+
+async def race(configurations, compatibility_2d, mastery_2d, skill_requirements_2d,
+               timeout: Optional[float] = None) -> Tuple[Solution, Optional[str]]:
+    """
+    Runs every configuration concurrently, MiniZinc solvers as subprocesses and the matching engine in a thread.
+    @return: The best solution and the name of the configuration that found it.
+    """
+    tasks = {}
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    for name, solver_name, processes in configurations:
+        if solver_name is None:
+            work = loop.run_in_executor(None, matching.solve, compatibility_2d, mastery_2d, skill_requirements_2d)
+        else:
+            try:
+                solver(solver_name)
+            except Exception as e:
+                logger.info(f"Skipping the {name} configuration of the portfolio: {e}")
+                continue
+            work = search(Optimiser.SPARSE, compatibility_2d, mastery_2d, skill_requirements_2d,
+                          timedelta(seconds=timeout) if timeout is not None else None, solver_name, processes)
+        tasks[asyncio.ensure_future(work)] = name
+
+    best, winner = None, None
+    timings = {}
+    pending = set(tasks)
+    stop = time.perf_counter() + timeout + PORTFOLIO_GRACE if timeout is not None else None
+    try:
+        while pending and not (best is not None and best.status == OPTIMAL):
+            remaining = max(stop - time.perf_counter(), 0) if stop is not None else None
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                name = tasks[task]
+                timings[f'portfolio_{name}'] = round(time.perf_counter() - start, 4)
+                if task.exception() is not None:
+                    logger.error(f"The {name} configuration of the portfolio failed: {task.exception()}")
+                    continue
+                solution = task.result()
+                if is_better(solution, best):
+                    best, winner = solution, name
+    finally:
+        # Cancelling a MiniZinc search terminates its process, the matching engine cannot be interrupted
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in pending:
+            timings[f'portfolio_{tasks[task]}'] = round(time.perf_counter() - start, 4)
+
+    if best is None:
+        best = Solution(bound=Optimiser.objective_bound(Optimiser.SPARSE, compatibility_2d, mastery_2d,
+                                                        skill_requirements_2d))
+    best.timings = {**best.timings, **timings}
+    return best, winner
+
+
+def is_better(solution: Solution, best: Optional[Solution]) -> bool:
+    """
+    Compares solutions of the sparse formulation or the matching engine, whose objectives both count filled positions.
+    @return: If the solution is proven optimal where the best is not, or fills more positions.
+    """
+    if solution.objective is None:
+        return False
+    if best is None or best.objective is None:
+        return True
+    return (solution.status == OPTIMAL, solution.objective) > (best.status == OPTIMAL, best.objective)
+
+
+async def stream_solutions(instance, timeout: Optional[timedelta] = None, processes: Optional[int] = None):
+    """
+    Solves an instance in intermediate solutions mode, keeping only the best solution found so far so it is available
+    when the solver is stopped at the timeout.
+    @param processes: The number of processes the solver may use, its default when omitted.
+    @return: The final status of the solver, the result holding the best solution or None if no solution was found,
+    and the statistics reported by MiniZinc.
+    """
+    import minizinc
+    status = minizinc.Status.UNKNOWN
+    best = None
+    statistics = {}
+    async for result in instance.solutions(timeout=timeout, processes=processes, intermediate_solutions=True):
+        status = result.status
+        statistics.update(result.statistics)
+        if result.solution is not None:
+            best = result
+            logger.info(f"Found a solution with objective {result.objective}.")
+    return status, best, statistics
@@ -0,0 +1,20 @@
+"""
+The options an optimiser run accepts. They are kept apart from the optimiser itself so the API can validate requests
+without importing numpy, MiniZinc and the solver engines.
+"""
+
+# The model formulations the optimiser can solve with. The dense formulation has a boolean for every
+# (shift, volunteer, role) combination, the sparse formulation has a single variable for every required position
+# whose domain only contains the volunteers that are compatible with the shift and qualified for the role.
+DENSE = 'dense'
+SPARSE = 'sparse'
+FORMULATIONS = (DENSE, SPARSE)
+
+# The engines the optimiser can solve with. MiniZinc solves the model of the chosen formulation, the matching
+# engine finds the same optimum as the sparse formulation with a bipartite matching per shift and no subprocess, and
+# the portfolio races several MiniZinc solvers and the matching engine against each other.
+AUTO = 'auto'
+MINIZINC = 'minizinc'
+MATCHING = 'matching'
+PORTFOLIO = 'portfolio'
+ENGINES = (AUTO, MINIZINC, MATCHING, PORTFOLIO)
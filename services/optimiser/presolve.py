@@ -0,0 +1,98 @@
+"""
+Removes the parts of an optimisation problem that cannot take part in any assignment before it is solved.
+
+Roles that no shift requires, shifts without any required position and volunteers that could not fill a single
+position (compatible with no shift that requires one of their roles) only multiply the number of variables of the
+model. The reduced problem keeps index maps back into the full problem, so its solutions can be translated back to
+the original shifts, volunteers and roles.
+"""
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+from services.optimiser import decomposition
+
+
+@dataclass(frozen=True)
+class Reduction:
+    """
+    A reduced problem and the original index of every shift, volunteer and role it kept.
+    """
+    compatibility_2d: np.ndarray
+    mastery_2d: np.ndarray
+    skill_requirements_2d: np.ndarray
+    shifts: np.ndarray
+    volunteers: np.ndarray
+    roles: np.ndarray
+    # The (shifts, volunteers, roles) of the full problem
+    original_shape: Tuple[int, int, int]
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return len(self.shifts), len(self.volunteers), len(self.roles)
+
+    @property
+    def is_empty(self) -> bool:
+        """
+        @return: If no position can be filled, so there is nothing left to solve.
+        """
+        return 0 in self.shape
+
+    @property
+    def removed_pairs(self) -> int:
+        """
+        @return: The number of (shift, role) pairs of the full problem that are not part of the reduced one.
+        """
+        shifts, _, roles = self.original_shape
+        return shifts * roles - len(self.shifts) * len(self.roles)
+
+    def expand(self, assignments: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+        """
+        @param assignments: (shift index, volunteer index, role index) tuples of the reduced problem.
+        @return: The same assignments with the indexes of the full problem.
+        """
+        return [(int(self.shifts[shift_index]), int(self.volunteers[volunteer_index]), int(self.roles[role_index]))
+                for shift_index, volunteer_index, role_index in assignments]
+
+    def summarise(self) -> dict:
+        """
+        @return: The size of every dimension and of the (shift, volunteer, role) space before and after the reduction.
+        """
+        before, after = self.original_shape, self.shape
+        return {
+            'shifts': [before[0], after[0]],
+            'volunteers': [before[1], after[1]],
+            'roles': [before[2], after[2]],
+            'variables': [int(np.prod(before)), int(np.prod(after))],
+        }
+
+
+def reduce(compatibility_2d, mastery_2d, skill_requirements_2d) -> Reduction:
+    """
+    @param compatibility_2d: The (shifts, volunteers) compatibility matrix.
+    @param mastery_2d: The (volunteers, roles) mastery matrix.
+    @param skill_requirements_2d: The (shifts, roles) skill requirement matrix.
+    @return: The problem without the roles, shifts and volunteers that cannot be part of any assignment.
+    """
+    compatibility_2d = np.asarray(compatibility_2d)
+    mastery_2d = np.asarray(mastery_2d)
+    skill_requirements_2d = np.asarray(skill_requirements_2d)
+    original_shape = (compatibility_2d.shape[0], compatibility_2d.shape[1], mastery_2d.shape[1])
+
+    required = skill_requirements_2d > 0
+    roles = np.flatnonzero(required.any(axis=0))
+    shifts = np.flatnonzero(required.any(axis=1))
+    # Removing the other roles and shifts cannot change who is a candidate, so a single pass is enough
+    candidates = decomposition.shift_candidates(compatibility_2d[shifts], mastery_2d, skill_requirements_2d[shifts])
+    volunteers = np.flatnonzero(candidates.any(axis=0))
+
+    return Reduction(
+        compatibility_2d=compatibility_2d[np.ix_(shifts, volunteers)],
+        mastery_2d=mastery_2d[np.ix_(volunteers, roles)],
+        skill_requirements_2d=skill_requirements_2d[np.ix_(shifts, roles)],
+        shifts=shifts,
+        volunteers=volunteers,
+        roles=roles,
+        original_shape=original_shape,
+    )
@@ -0,0 +1,121 @@
+"""
+Closed-form evaluation of (possibly recurring) unavailability windows.
+
+An unavailability window repeats every period from its first occurrence onwards, the periodicity values match the ones
+stored on UnavailabilityTime: 1 = daily, 2 = weekly and 0 or 3 = one-off. Rather than stepping a window forward one
+period at a time, the index of the first occurrence that can touch a shift is computed arithmetically, which keeps the
+cost of a check constant no matter how long ago a recurring event started.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+
+DAILY = 1
+WEEKLY = 2
+ONE_OFF = 3
+# Some one-off windows are stored with 0 instead of 3, NON_RECURRING treats both values the same way
+NON_REPEATING = 0
+
+PERIODS = {
+    DAILY: timedelta(days=1),
+    WEEKLY: timedelta(weeks=1),
+}
+
+RECURRING = tuple(PERIODS.keys())
+NON_RECURRING = (ONE_OFF, NON_REPEATING)
+
+
+def period_of(periodicity: int) -> Optional[timedelta]:
+    """
+    @param periodicity: The periodicity value of an unavailability window.
+    @return: The time between occurrences, or None when the window does not repeat.
+    """
+    return PERIODS.get(periodicity)
+
+
+def next_occurrence(start: datetime, end: datetime, periodicity: int, after: datetime,
+                    closed: bool = True) -> Tuple[datetime, datetime]:
+    """
+    Finds the first occurrence of a window that has not finished by the given time.
+
+    @param start: The start of the first occurrence.
+    @param end: The end of the first occurrence.
+    @param periodicity: The periodicity value of the window.
+    @param after: The time the occurrence must still be running at (closed) or after (open).
+    @param closed: If an occurrence that ends exactly at `after` still counts.
+    @return: The start and end of the occurrence. For windows that do not repeat this is always the window itself.
+    """
+    period = period_of(periodicity)
+    if period is None or end > after or (closed and end == after):
+        return start, end
+    if closed:
+        # Smallest number of periods that moves the end of the window to or past `after`.
+        periods = -((end - after) // period)
+    else:
+        # Smallest number of periods that moves the end of the window strictly past `after`.
+        periods = (after - end) // period + 1
+    return start + periods * period, end + periods * period
+
+
+def overlaps(start: datetime, end: datetime, periodicity: int, shift_start: datetime, shift_end: datetime,
+             closed: bool = True) -> bool:
+    """
+    Checks if any occurrence of a window overlaps a shift.
+
+    @param start: The start of the first occurrence of the window.
+    @param end: The end of the first occurrence of the window.
+    @param periodicity: The periodicity value of the window, unknown values never overlap.
+    @param shift_start: The start of the shift.
+    @param shift_end: The end of the shift.
+    @param closed: If windows that only touch the shift at their boundaries count as overlapping.
+    @return: True if the volunteer is unavailable for (part of) the shift.
+    """
+    if periodicity not in RECURRING and periodicity not in NON_RECURRING:
+        return False
+    occurrence_start, occurrence_end = next_occurrence(start, end, periodicity, shift_start, closed)
+    if closed:
+        return occurrence_start <= shift_end and occurrence_end >= shift_start
+    return occurrence_start < shift_end and occurrence_end > shift_start
+
+
+def overlaps_many(starts, ends, periodicities, shift_starts, shift_ends, closed: bool = True) -> np.ndarray:
+    """
+    Vectorised version of `overlaps`. All arguments are broadcast against each other, so passing column vectors of
+    windows and row vectors of shifts yields a (windows, shifts) matrix in a single call.
+
+    @param starts: The start of the first occurrence of each window.
+    @param ends: The end of the first occurrence of each window.
+    @param periodicities: The periodicity value of each window.
+    @param shift_starts: The start of each shift.
+    @param shift_ends: The end of each shift.
+    @param closed: If windows that only touch a shift at their boundaries count as overlapping.
+    @return: A boolean array, True where a window overlaps a shift.
+    """
+    starts = np.asarray(starts, dtype='datetime64[us]').astype(np.int64)
+    ends = np.asarray(ends, dtype='datetime64[us]').astype(np.int64)
+    shift_starts = np.asarray(shift_starts, dtype='datetime64[us]').astype(np.int64)
+    shift_ends = np.asarray(shift_ends, dtype='datetime64[us]').astype(np.int64)
+    periodicities = np.asarray(periodicities, dtype=np.int64)
+
+    periods = np.zeros(periodicities.shape, dtype=np.int64)
+    for periodicity, period in PERIODS.items():
+        periods[periodicities == periodicity] = period // timedelta(microseconds=1)
+    known = np.isin(periodicities, RECURRING + NON_RECURRING)
+
+    # Number of whole periods the window has to move forward before it can reach the start of the shift.
+    behind = shift_starts - ends
+    safe_periods = np.where(periods > 0, periods, 1)
+    if closed:
+        count = -(-behind // safe_periods)
+    else:
+        count = behind // safe_periods + 1
+    count = np.where(periods > 0, np.maximum(count, 0), 0)
+
+    occurrence_starts = starts + count * periods
+    occurrence_ends = ends + count * periods
+    if closed:
+        overlapping = (occurrence_starts <= shift_ends) & (occurrence_ends >= shift_starts)
+    else:
+        overlapping = (occurrence_starts < shift_ends) & (occurrence_ends > shift_starts)
+    return overlapping & known
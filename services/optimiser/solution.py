@@ -0,0 +1,67 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Statuses follow the names of minizinc.Status so results of different engines can be compared.
+OPTIMAL = 'OPTIMAL_SOLUTION'
+SATISFIED = 'SATISFIED'
+UNKNOWN = 'UNKNOWN'
+
+
+@dataclass
+class Solution:
+    """
+    The decoded result of solving (part of) an optimisation problem.
+    """
+    # A (shift index, volunteer index, role index) tuple for every assignment.
+    assignments: List[Tuple[int, int, int]] = field(default_factory=list)
+    status: str = UNKNOWN
+    objective: Optional[float] = None
+    # The best objective any solution could reach, used to report how far a solution stopped at a deadline may be from
+    # the optimum.
+    bound: Optional[float] = None
+    # Seconds spent in the phases of solving, e.g. building the instance and the search, keyed by phase name.
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def found(self) -> bool:
+        """
+        @return: If the engine found a solution, False when it was stopped before finding any.
+        """
+        return self.status in (OPTIMAL, SATISFIED) or bool(self.assignments)
+
+    @property
+    def gap(self) -> Optional[float]:
+        """
+        @return: The relative distance between the objective and its bound, 0 for a proven optimum and None when the
+        solution has no objective.
+        """
+        if self.status == OPTIMAL:
+            return 0.0
+        if self.objective is None or self.bound is None:
+            return None
+        return abs(self.bound - self.objective) / max(abs(self.bound), 1)
+
+    @staticmethod
+    def merge(solutions: List['Solution']) -> 'Solution':
+        """
+        Combines the solutions of independent sub-problems. The merged status is only optimal if every part is, and the
+        timings are summed over the parts.
+        """
+        merged = Solution(status=OPTIMAL, bound=0)
+        for solution in solutions:
+            merged.assignments.extend(solution.assignments)
+            if solution.status != OPTIMAL and merged.status in (OPTIMAL, SATISFIED):
+                merged.status = solution.status
+            if solution.objective is not None:
+                merged.objective = (merged.objective or 0) + solution.objective
+            for phase, seconds in solution.timings.items():
+                merged.timings[phase] = round(merged.timings.get(phase, 0) + seconds, 4)
+            if solution.bound is None or merged.bound is None:
+                merged.bound = None
+            else:
+                merged.bound += solution.bound
+        merged.assignments.sort()
+        return merged
+
+    def __str__(self):
+        return f"{self.status}: {len(self.assignments)} assignments, objective {self.objective}, gap {self.gap}"
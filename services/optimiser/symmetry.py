@@ -0,0 +1,44 @@
+"""
+Finds volunteers that are interchangeable in an optimisation problem.
+
+Two volunteers with the same compatibility column and the same mastery row can swap every assignment without changing
+whether a solution is feasible or how good it is. Without further constraints the solver explores every permutation of
+such volunteers, so the models order the volunteers of each class: the dense formulation requires their assignments to
+be lexicographically decreasing and the sparse formulation requires each of them to be used before the next one.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+
+def interchangeable_volunteers(compatibility_2d, mastery_2d) -> List[np.ndarray]:
+    """
+    Groups the volunteers by their compatibility with every shift and their mastery of every role.
+
+    @param compatibility_2d: The (shifts, volunteers) compatibility matrix.
+    @param mastery_2d: The (volunteers, roles) mastery matrix.
+    @return: The sorted volunteer indexes of every class of at least two volunteers, ordered by their first volunteer.
+    """
+    compatibility_2d = np.asarray(compatibility_2d, dtype=bool)
+    mastery_2d = np.asarray(mastery_2d, dtype=bool)
+    if mastery_2d.shape[0] < 2:
+        return []
+    # One row per volunteer, packed into bytes so that identical rows can be found by hashing them
+    signatures = np.packbits(np.hstack((compatibility_2d.T, mastery_2d)), axis=1)
+    classes = {}
+    for volunteer, signature in enumerate(signatures):
+        classes.setdefault(signature.tobytes(), []).append(volunteer)
+    return [np.array(members) for members in classes.values() if len(members) > 1]
+
+
+def ordered_pairs(classes: List[np.ndarray]) -> Tuple[List[int], List[int]]:
+    """
+    @param classes: The classes of interchangeable volunteers.
+    @return: The 1-based indexes of every pair of consecutive volunteers in a class, as the MiniZinc models order
+    them: the first volunteer of each pair comes before the second.
+    """
+    first, second = [], []
+    for members in classes:
+        first.extend((members[:-1] + 1).tolist())
+        second.extend((members[1:] + 1).tolist())
+    return first, second
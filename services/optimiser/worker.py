@@ -0,0 +1,108 @@
+"""
+Runs queued optimiser jobs outside of the web process, so that the latency of /v2/optimiser does not depend on how
+long the solver takes.
+
+Usage:
+    python -m services.optimiser.worker [--poll-interval SECONDS] [--stale-after SECONDS] [--once]
+"""
+import argparse
+import logging
+import time
+from datetime import timedelta
+
+from domain import unit_of_work
+from repository.fcm_token_repository import FCMTokenRepository
+from repository.optimiser_job_repository import OptimiserJobRepository
+from repository.optimiser_run_repository import OptimiserRunRepository
+from repository.optimiser_solution_repository import OptimiserSolutionRepository
+from repository.shift_repository import ShiftRepository
+from services.optimiser.optimiser import Optimiser
+
+logger = logging.getLogger(__name__)
+
+
+def run_job(job_id: int, options: dict, job_repository: OptimiserJobRepository,
+            shift_repository: ShiftRepository, fcm_token_repository: FCMTokenRepository,
+            run_repository: OptimiserRunRepository = None) -> None:
+    """
+    Runs the optimiser for a claimed job and records the outcome on the job.
+
+    @param job_id: The id of the job, it must already be marked as running.
+    @param options: The arguments the optimiser should be run with.
+    @param run_repository: The repository the dimensions and timings of the run are recorded with, if any.
+    """
+    optimiser = None
+    try:
+        # The optimiser and every repository it uses share one session, so a run commits all of its changes at once
+        with unit_of_work() as session:
+            optimiser = Optimiser(
+                session=session,
+                repository=shift_repository,
+                debug=options.get('debug', False),
+                fcm_token_repository=fcm_token_repository,
+                formulation=options.get('formulation', Optimiser.DENSE),
+                parallel=options.get('parallel', False),
+                incremental=options.get('incremental', False),
+                time_budget=options.get('time_budget'),
+                engine=options.get('engine', Optimiser.AUTO),
+                solution_repository=OptimiserSolutionRepository(),
+                force=options.get('force', False)
+            )
+            solution = optimiser.solve()
+            if not solution.found:
+                raise RuntimeError(f"No solution was found: {solution.status}")
+            optimiser.save_result(solution)
+            summary = optimiser.summarise(solution)
+        job_repository.complete_job(job_id, optimiser.timings, summary)
+        if run_repository is not None:
+            run_repository.create_run(options, summary, optimiser.timings, job_id)
+        logger.info(f"Optimiser job {job_id} completed: {solution}")
+    except Exception as e:
+        logger.error(f"Optimiser job {job_id} failed: {e}")
+        timings = optimiser.timings if optimiser is not None else None
+        job_repository.fail_job(job_id, str(e), timings)
+        if run_repository is not None:
+            run_repository.create_run(options, None, timings, job_id, error=str(e))
+
+
+def run_next_job(job_repository: OptimiserJobRepository, shift_repository: ShiftRepository,
+                 fcm_token_repository: FCMTokenRepository, run_repository: OptimiserRunRepository = None) -> bool:
+    """
+    Claims and runs the oldest queued job.
+    @return: True if a job was run, False if the queue was empty.
+    """
+    job = job_repository.claim_next_job()
+    if job is None:
+        return False
+    job_id, options = job
+    logger.info(f"Running optimiser job {job_id} with options {options}")
+    run_job(job_id, options, job_repository, shift_repository, fcm_token_repository, run_repository)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--poll-interval', type=float, default=2.0,
+                        help='Seconds to wait before checking an empty queue again.')
+    parser.add_argument('--stale-after', type=float, default=3600.0,
+                        help='Seconds after which a running job left behind by a stopped worker is marked as failed.')
+    parser.add_argument('--once', action='store_true', help='Run the queued jobs and exit once the queue is empty.')
+    args = parser.parse_args()
+
+    job_repository = OptimiserJobRepository()
+    shift_repository = ShiftRepository()
+    fcm_token_repository = FCMTokenRepository()
+    run_repository = OptimiserRunRepository()
+
+    logger.info("Optimiser worker started.")
+    job_repository.fail_stale_jobs(timedelta(seconds=args.stale_after))
+    while True:
+        if run_next_job(job_repository, shift_repository, fcm_token_repository, run_repository):
+            continue
+        if args.once:
+            break
+        time.sleep(args.poll_interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,6 @@
 import json
 
-import boto3
 import base64
-from botocore.exceptions import ClientError
 
 
 class SecretService:
@@ -19,6 +17,10 @@ class SecretService:
         if self.secret != {}:
             return self.secret
 
+        # boto3 is only imported once a secret is retrieved, it is slow to import and most processes never need it
+        import boto3
+        from botocore.exceptions import ClientError
+
         # Create a Secrets Manager client
         session = boto3.session.Session()
         client = session.client(
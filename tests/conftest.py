@@ -2,11 +2,15 @@ import os
 
 os.environ.setdefault("SQLALCHEMY_DATABASE_URI", 'sqlite:///:memory:')
 import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
 from application import app
 from domain.base import Engine, Base, Session
+from domain.entity.shift_request import ShiftRequest
 from domain.entity.user import User
+from domain.type.shift_status import ShiftStatus
 from domain.type.user_type import UserType
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 @pytest.fixture(scope='session', autouse=True)
@@ -34,6 +38,58 @@ def transactional_test(create_test_database, request):
         connection.close()
 
 
+@pytest.fixture
+def session():
+    session = Session()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Returns a context manager that collects every SQL statement executed while it is open.
+    """
+    @contextmanager
+    def counting():
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, 'before_cursor_execute', count)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, 'before_cursor_execute', count)
+
+    return counting
+
+
+@pytest.fixture
+def make_user():
+    """
+    Returns a builder of unsaved users, the prefix keeps the email and mobile number of every test unique.
+    """
+    def make(prefix, name, role=UserType.VOLUNTEER):
+        return User(role=role, first_name=prefix, last_name=name, email=f'{prefix}-{name}',
+                    mobile_number=f'{prefix}-{name}')
+
+    return make
+
+
+@pytest.fixture
+def make_shift():
+    """
+    Returns a builder of unsaved shift requests.
+    """
+    def make(user_id, title, start, hours=4, status=ShiftStatus.SUBMITTED):
+        return ShiftRequest(user_id=user_id, title=title, startTime=start, endTime=start + timedelta(hours=hours),
+                            status=status)
+
+    return make
+
+
 @pytest.fixture(scope='session')
 def test_client():
     with app.test_client() as testing_client:
@@ -0,0 +1,5 @@
+def test_get_pool_metrics(test_client):
+    response = test_client.get('/v2/metrics/pool')
+    assert response.status_code == 200
+    assert {'pool', 'checkouts', 'checkins', 'checkout_seconds', 'max_checkout_seconds'} <= response.json.keys()
+    assert response.json['checkouts'] >= response.json['checkins']
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from domain import session_scope, OptimiserJob
+
+from repository.optimiser_job_repository import OptimiserJobRepository
+from repository.optimiser_run_repository import OptimiserRunRepository
+from services.optimiser import worker
+from services.optimiser.solution import Solution, OPTIMAL
+
+
+def test_post_optimiser_queues_job(test_client):
+    response = test_client.post('/v2/optimiser', json={'formulation': 'sparse'})
+    assert response.status_code == 202
+    job_id = response.json['job_id']
+
+    response = test_client.get(f'/v2/optimiser/{job_id}')
+    assert response.status_code == 200
+    assert response.json['status'] == 'queued'
+    assert response.json['options']['formulation'] == 'sparse'
+
+
+def test_get_unknown_optimiser_job(test_client):
+    response = test_client.get('/v2/optimiser/999999')
+    assert response.status_code == 404
+
+
+def test_worker_runs_queued_job():
+    job_repository = OptimiserJobRepository()
+    job_id = job_repository.create_job({'formulation': 'dense'})
+
+    with patch.object(worker, 'Optimiser') as optimiser_class:
+        optimiser = optimiser_class.return_value
+        optimiser.solve.return_value = Solution([(0, 0, 0)], OPTIMAL, 1)
+        optimiser.summarise.return_value = {'status': OPTIMAL, 'assignments': 1}
+        optimiser.timings = {'solve': 0.5}
+
+        assert worker.run_next_job(job_repository, None, None)
+        optimiser.save_result.assert_called_once_with(optimiser.solve.return_value)
+
+    job = job_repository.get_job(job_id)
+    assert job['status'] == 'done'
+    assert job['timings'] == {'solve': 0.5}
+    assert job['result'] == {'status': OPTIMAL, 'assignments': 1}
+    assert job_repository.claim_next_job() is None
+
+
+def test_worker_records_failed_job():
+    job_repository = OptimiserJobRepository()
+    job_id = job_repository.create_job({})
+
+    with patch.object(worker, 'Optimiser') as optimiser_class:
+        optimiser_class.return_value.solve.side_effect = RuntimeError('solver crashed')
+        optimiser_class.return_value.timings = {}
+        assert worker.run_next_job(job_repository, None, None)
+
+    job = job_repository.get_job(job_id)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'solver crashed'
+
+
+def test_worker_records_run_history(test_client):
+    job_repository = OptimiserJobRepository()
+    job_id = job_repository.create_job({'engine': 'matching'})
+
+    with patch.object(worker, 'Optimiser') as optimiser_class:
+        optimiser = optimiser_class.return_value
+        optimiser.solve.return_value = Solution([(0, 0, 0)], OPTIMAL, 1)
+        optimiser.summarise.return_value = {'status': OPTIMAL, 'assignments': 1, 'shifts': 1, 'volunteers': 2,
+                                            'roles': 1, 'positions': 1, 'compatible_pairs': 2}
+        optimiser.timings = {'load': 0.25, 'solve': 0.5, 'search': 0.4, 'save': 0.25}
+        assert worker.run_next_job(job_repository, None, None, OptimiserRunRepository())
+
+    response = test_client.get('/v2/optimiser/runs?limit=1')
+    assert response.status_code == 200
+    run = response.json[0]
+    assert run['job_id'] == job_id
+    assert run['status'] == OPTIMAL
+    assert run['compatible_pairs'] == 2
+    assert run['timings']['search'] == 0.4
+    # Phases inside the solve are not counted twice
+    assert run['total_seconds'] == 1.0
+
+
+def test_post_optimiser_uses_the_defaults_without_a_body(test_client):
+    response = test_client.post('/v2/optimiser')
+    assert response.status_code == 202
+
+    response = test_client.get(f"/v2/optimiser/{response.json['job_id']}")
+    assert response.json['options']['formulation'] == 'dense'
+
+
+def test_post_optimiser_rejects_an_unknown_formulation(test_client):
+    response = test_client.post('/v2/optimiser', json={'formulation': 'cubic'})
+    assert response.status_code == 400
+
+
+def test_post_optimiser_rejects_an_unknown_engine(test_client):
+    response = test_client.post('/v2/optimiser', json={'engine': 'quantum'})
+    assert response.status_code == 400
+
+
+def test_post_optimiser_rejects_a_time_budget_that_is_not_positive(test_client):
+    for time_budget in (0, -5):
+        response = test_client.post('/v2/optimiser', json={'time_budget': time_budget})
+        assert response.status_code == 400
+
+
+def test_worker_fails_a_job_without_a_solution():
+    job_repository = OptimiserJobRepository()
+    job_id = job_repository.create_job({'time_budget': 1})
+
+    with patch.object(worker, 'Optimiser') as optimiser_class:
+        optimiser = optimiser_class.return_value
+        optimiser.solve.return_value = Solution(bound=1)
+        optimiser.timings = {}
+        assert worker.run_next_job(job_repository, None, None)
+        optimiser.save_result.assert_not_called()
+
+    job = job_repository.get_job(job_id)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'No solution was found: UNKNOWN'
+
+
+def test_worker_fails_jobs_abandoned_while_running():
+    job_repository = OptimiserJobRepository()
+    abandoned_id = job_repository.create_job({})
+    running_id = job_repository.create_job({})
+    assert job_repository.claim_next_job()[0] == abandoned_id
+    assert job_repository.claim_next_job()[0] == running_id
+    with session_scope() as session:
+        session.query(OptimiserJob).filter(OptimiserJob.id == abandoned_id) \
+            .update({OptimiserJob.started_at: datetime.now() - timedelta(hours=2)})
+
+    assert job_repository.fail_stale_jobs(timedelta(hours=1)) == 1
+
+    assert job_repository.get_job(abandoned_id)['status'] == 'failed'
+    assert job_repository.get_job(running_id)['status'] == 'running'
@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, inspect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run(tmp_path, *args):
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'bootstrap.db'}")
+    subprocess.run([sys.executable, *args], cwd=ROOT, env=env, check=True, capture_output=True)
+    engine = create_engine(f"sqlite:///{tmp_path / 'bootstrap.db'}")
+    try:
+        return set(inspect(engine).get_table_names())
+    finally:
+        engine.dispose()
+
+
+def test_schema_is_only_created_by_the_bootstrap_command(tmp_path):
+    assert run(tmp_path, '-c', 'import application') == set()
+    assert {'user', 'shift_request', 'optimiser_job'} <= run(tmp_path, '-m', 'domain.bootstrap')
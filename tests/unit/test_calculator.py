@@ -0,0 +1,193 @@
+from datetime import datetime
+
+import pytest
+
+from domain import (UserType, ShiftStatus, UnavailabilityTime, Role, UserRole, ShiftPosition,
+                    ShiftRequestVolunteer, ShiftVolunteerStatus)
+from services.optimiser.calculator import Calculator
+
+
+@pytest.fixture
+def roster(session, make_user, make_shift):
+    admin = make_user('calc', 'admin', UserType.ROOT_ADMIN)
+    volunteers = [make_user('calc', str(i)) for i in range(3)]
+    session.add(admin)
+    session.add_all(volunteers)
+    session.flush()
+    shifts = [make_shift(admin.id, 'morning', datetime(2024, 5, 1, 8)),
+              make_shift(admin.id, 'evening', datetime(2024, 5, 1, 18))]
+    session.add_all(shifts)
+    session.flush()
+    return volunteers, shifts
+
+
+@pytest.fixture
+def roles(session):
+    roles = [Role(code='calcDriver', name='Driver'), Role(code='calcLeader', name='Leader'),
+             Role(code='calcRetired', name='Retired', deleted=True)]
+    session.add_all(roles)
+    session.flush()
+    return roles
+
+
+def test_compatibility_marks_overlapping_windows(session, roster):
+    volunteers, shifts = roster
+    session.add_all([
+        # Overlaps the morning shift only
+        UnavailabilityTime(userId=volunteers[0].id, start=datetime(2024, 5, 1, 11), end=datetime(2024, 5, 1, 13),
+                           periodicity=3),
+        # A long window that covers both shifts, preceded by a short one that covers neither
+        UnavailabilityTime(userId=volunteers[1].id, start=datetime(2024, 4, 30, 1), end=datetime(2024, 4, 30, 2),
+                           periodicity=3),
+        UnavailabilityTime(userId=volunteers[1].id, start=datetime(2024, 5, 1, 0), end=datetime(2024, 5, 2, 0),
+                           periodicity=3),
+        # Touches the evening shift boundary without overlapping, and a deleted window that would overlap
+        UnavailabilityTime(userId=volunteers[2].id, start=datetime(2024, 5, 1, 22), end=datetime(2024, 5, 1, 23),
+                           periodicity=3),
+        UnavailabilityTime(userId=volunteers[2].id, start=datetime(2024, 5, 1, 9), end=datetime(2024, 5, 1, 10),
+                           periodicity=3, status=False),
+    ])
+    session.flush()
+
+    calculator = Calculator(session)
+    compatibility = calculator.calculate_compatibility()
+    columns = [calculator._users_.index(volunteer) for volunteer in volunteers]
+    rows = [calculator._shifts_.index(shift) for shift in shifts]
+
+    assert compatibility.shape == (calculator.get_shift_count(), calculator.get_number_of_volunteers())
+    assert compatibility[rows][:, columns].tolist() == [
+        [False, False, True],
+        [True, False, True],
+    ]
+
+
+def test_compatibility_expands_recurring_windows(session, roster):
+    volunteers, shifts = roster
+    session.add_all([
+        # Every morning since 2020, and every Wednesday evening (2024-05-01 is a Wednesday) since 2023
+        UnavailabilityTime(userId=volunteers[0].id, start=datetime(2020, 1, 1, 7), end=datetime(2020, 1, 1, 9),
+                           periodicity=1),
+        UnavailabilityTime(userId=volunteers[1].id, start=datetime(2023, 1, 4, 17), end=datetime(2023, 1, 4, 19),
+                           periodicity=2),
+    ])
+    session.flush()
+
+    calculator = Calculator(session)
+    compatibility = calculator.calculate_compatibility()
+    columns = [calculator._users_.index(volunteer) for volunteer in volunteers]
+    rows = [calculator._shifts_.index(shift) for shift in shifts]
+
+    assert compatibility[rows][:, columns].tolist() == [
+        [False, True, True],
+        [True, False, True],
+    ]
+
+def test_mastery_scatters_user_roles(session, roster, roles):
+    volunteers, _ = roster
+    driver, leader, retired = roles
+    session.add_all([
+        UserRole(user_id=volunteers[0].id, role_id=driver.id),
+        UserRole(user_id=volunteers[0].id, role_id=leader.id),
+        UserRole(user_id=volunteers[1].id, role_id=leader.id),
+        UserRole(user_id=volunteers[2].id, role_id=retired.id),
+    ])
+    session.flush()
+
+    calculator = Calculator(session)
+    mastery = calculator.calculate_mastery()
+    rows = [calculator._users_.index(volunteer) for volunteer in volunteers]
+    columns = [calculator.get_roles().index(role) for role in (driver, leader)]
+
+    assert mastery.dtype == bool
+    assert mastery.shape == (calculator.get_number_of_volunteers(), calculator.get_number_of_roles())
+    assert retired not in calculator.get_roles()
+    assert mastery[rows][:, columns].tolist() == [
+        [True, True],
+        [False, True],
+        [False, False],
+    ]
+
+
+def test_skill_requirement_counts_positions(session, roster, roles):
+    _, shifts = roster
+    driver, leader, retired = roles
+    session.add_all([
+        ShiftPosition(shift_id=shifts[0].id, role_code=driver.code),
+        ShiftPosition(shift_id=shifts[0].id, role_code=leader.code),
+        ShiftPosition(shift_id=shifts[0].id, role_code=leader.code),
+        ShiftPosition(shift_id=shifts[1].id, role_code=driver.code),
+        ShiftPosition(shift_id=shifts[1].id, role_code=retired.code),
+    ])
+    session.flush()
+
+    calculator = Calculator(session)
+    requirements = calculator.calculate_skill_requirement()
+    rows = [calculator._shifts_.index(shift) for shift in shifts]
+    columns = [calculator.get_roles().index(role) for role in (driver, leader)]
+
+    assert requirements.shape == (calculator.get_shift_count(), calculator.get_number_of_roles())
+    assert requirements[rows][:, columns].tolist() == [
+        [1, 2],
+        [1, 0],
+    ]
+
+
+@pytest.fixture
+def bookings(session, roster, roles, make_shift):
+    volunteers, shifts = roster
+    driver = roles[0]
+    # An optimised shift overlapping the morning shift with one of its two positions booked, and a full shift
+    partly_booked = make_shift(shifts[0].user_id, 'noon', datetime(2024, 5, 1, 11), 3, ShiftStatus.PENDING)
+    fully_booked = make_shift(shifts[0].user_id, 'night', datetime(2024, 5, 1, 23), 4, ShiftStatus.PENDING)
+    session.add_all([partly_booked, fully_booked])
+    session.flush()
+    positions = [ShiftPosition(shift_id=partly_booked.id, role_code=driver.code),
+                 ShiftPosition(shift_id=partly_booked.id, role_code=driver.code),
+                 ShiftPosition(shift_id=fully_booked.id, role_code=driver.code),
+                 ShiftPosition(shift_id=shifts[0].id, role_code=driver.code)]
+    session.add_all(positions)
+    session.flush()
+    session.add_all([
+        ShiftRequestVolunteer(user_id=volunteers[0].id, request_id=partly_booked.id, position_id=positions[0].id,
+                              status=ShiftVolunteerStatus.PENDING),
+        ShiftRequestVolunteer(user_id=volunteers[1].id, request_id=fully_booked.id, position_id=positions[2].id,
+                              status=ShiftVolunteerStatus.ACCEPTED),
+        # A rejected booking leaves the position open and the volunteer available
+        ShiftRequestVolunteer(user_id=volunteers[2].id, request_id=partly_booked.id, position_id=positions[1].id,
+                              status=ShiftVolunteerStatus.REJECTED),
+    ])
+    session.flush()
+    return partly_booked, fully_booked
+
+
+def test_incremental_mode_only_optimises_open_positions(session, roster, roles, bookings):
+    _, shifts = roster
+    partly_booked, fully_booked = bookings
+
+    assert partly_booked not in Calculator(session)._shifts_
+
+    calculator = Calculator(session, incremental=True)
+    assert partly_booked in calculator._shifts_
+    assert fully_booked not in calculator._shifts_
+    assert all(shift in calculator._shifts_ for shift in shifts)
+
+    requirements = calculator.calculate_skill_requirement()
+    rows = [calculator._shifts_.index(shift) for shift in (shifts[0], partly_booked)]
+    assert requirements[rows, calculator.get_roles().index(roles[0])].tolist() == [1, 1]
+
+
+def test_incremental_mode_blocks_booked_time(session, roster, roles, bookings):
+    volunteers, shifts = roster
+    partly_booked, _ = bookings
+
+    calculator = Calculator(session, incremental=True)
+    compatibility = calculator.calculate_compatibility()
+    columns = [calculator._users_.index(volunteer) for volunteer in volunteers]
+    rows = [calculator._shifts_.index(shift) for shift in (shifts[0], shifts[1], partly_booked)]
+
+    # The first volunteer is booked at noon, which overlaps the morning shift
+    assert compatibility[rows][:, columns].tolist() == [
+        [False, True, True],
+        [True, True, True],
+        [False, True, True],
+    ]
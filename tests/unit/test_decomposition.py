@@ -0,0 +1,54 @@
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from services.optimiser import decomposition
+from services.optimiser.solution import Solution, OPTIMAL, SATISFIED
+
+
+class TestDecomposition(unittest.TestCase):
+
+    def test_shift_candidates_require_compatibility_and_a_required_role(self):
+        compatibility = np.array([[True, True, True],
+                                  [True, False, True]])
+        mastery = np.array([[True, False],
+                            [True, False],
+                            [False, True]])
+        skill_requirements = np.array([[1, 0],
+                                       [0, 2]])
+        self.assertEqual(decomposition.shift_candidates(compatibility, mastery, skill_requirements).tolist(),
+                         [[True, True, False],
+                          [False, False, True]])
+
+    def test_components_join_overlapping_shifts_that_share_volunteers(self):
+        starts = [datetime(2024, 5, 1, 8), datetime(2024, 5, 1, 10), datetime(2024, 5, 1, 12),
+                  datetime(2024, 5, 1, 9), datetime(2024, 5, 2, 8)]
+        ends = [datetime(2024, 5, 1, 12), datetime(2024, 5, 1, 14), datetime(2024, 5, 1, 16),
+                datetime(2024, 5, 1, 11), datetime(2024, 5, 2, 12)]
+        candidates = np.array([[True, False, False],
+                               [True, True, False],
+                               [False, True, False],
+                               # Overlaps the first two shifts but shares no volunteer with them
+                               [False, False, True],
+                               # Shares volunteers but never overlaps
+                               [True, True, True]])
+
+        components = decomposition.shift_components(starts, ends, candidates)
+        self.assertEqual([component.tolist() for component in components], [[0, 1, 2], [3], [4]])
+
+    def test_merge_keeps_the_weakest_status(self):
+        merged = Solution.merge([Solution([(2, 0, 0)], OPTIMAL, 1), Solution([(0, 1, 1)], SATISFIED, 2)])
+        self.assertEqual(merged.assignments, [(0, 1, 1), (2, 0, 0)])
+        self.assertEqual(merged.status, SATISFIED)
+        self.assertEqual(merged.objective, 3)
+
+    def test_merge_sums_bounds(self):
+        merged = Solution.merge([Solution([], SATISFIED, 1, bound=2), Solution([], OPTIMAL, 2, bound=2)])
+        self.assertEqual(merged.bound, 4)
+        self.assertEqual(merged.gap, 0.25)
+        self.assertIsNone(Solution.merge([Solution(bound=2), Solution()]).bound)
+
+
+if __name__ == '__main__':
+    unittest.main()
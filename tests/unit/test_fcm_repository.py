@@ -101,6 +101,22 @@ class TestFCMTokenRepository(unittest.TestCase):
         # Assert that the correct exception is raised
         self.assertEqual(str(context.exception), "Either user_id or fcm_token_list must be provided")
 
+    @patch('repository.fcm_token_repository.session_scope')
+    def test_get_fcm_tokens_groups_by_user(self, mock_session_scope):
+        mock_session = MagicMock()
+        mock_session_scope.return_value.__enter__.return_value = mock_session
+        mock_session.query.return_value.filter.return_value.all.return_value = [
+            (6, "mock_token_1"), (7, "mock_token_2"), (6, "mock_token_3")
+        ]
+
+        fcm_token_repo = FCMTokenRepository()
+        tokens = fcm_token_repo.get_fcm_tokens([6, 7, 8])
+
+        # All users are loaded with a single query
+        mock_session.query.assert_called_once()
+        self.assertEqual(tokens, {6: ["mock_token_1", "mock_token_3"], 7: ["mock_token_2"]})
+        self.assertEqual(fcm_token_repo.get_fcm_tokens([]), {})
+
 
 if __name__ == '__main__':
     unittest.main()
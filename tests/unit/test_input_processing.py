@@ -0,0 +1,109 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from domain import (User, UserType, AssetRequest, AssetRequestVehicle, AssetRequestVolunteer, Role, Qualification,
+                    UnavailabilityTime)
+from services.optimiser import input_processing
+
+
+@pytest.fixture
+def request_id(session, make_user):
+    user = make_user('input', 'requester')
+    roles = [Role(code=f'input{i}', name=f'Input {i}') for i in range(2)]
+    qualifications = [Qualification(name=f'Input {i}') for i in range(2)]
+    session.add_all([user] + roles + qualifications)
+    session.flush()
+    request = AssetRequest(user_id=user.id, title='input')
+    session.add(request)
+    session.flush()
+    vehicles = [AssetRequestVehicle(request_id=request.id, from_date_time=datetime(2024, 5, 1, 8 + hour),
+                                    to_date_time=datetime(2024, 5, 1, 12 + hour)) for hour in (0, 2)]
+    session.add_all(vehicles)
+    session.flush()
+    # Added out of vehicle order, so the position order of the requirement matrices differs from the id order
+    session.add_all([
+        AssetRequestVolunteer(vehicle_id=vehicles[1].id, role_id=roles[1].id, qualification_id=qualifications[0].id),
+        AssetRequestVolunteer(vehicle_id=vehicles[0].id, role_id=roles[0].id, qualification_id=None),
+        AssetRequestVolunteer(vehicle_id=vehicles[0].id, role_id=roles[1].id, qualification_id=qualifications[1].id),
+    ])
+    session.flush()
+    return request.id
+
+
+def test_request_inputs(session, request_id):
+    inputs = input_processing.load_request_inputs(session, request_id)
+    R, Q = session.query(Role).count(), session.query(Qualification).count()
+    # Roles and qualifications are indexed by their id
+    role = session.query(Role.id).filter(Role.code == 'input0').scalar() - 1
+    qualification = session.query(Qualification.id).filter(Qualification.name == 'Input 0').scalar() - 1
+    assert (inputs.A, inputs.P, inputs.R, inputs.Q) == (2, 3, R, Q)
+
+    expected = np.full((2, 3, R), False)
+    expected[1, 2, role + 1] = expected[0, 0, role] = expected[0, 1, role + 1] = True
+    assert (inputs.rolerequirements == expected).all()
+    expected = np.full((2, 3, Q), False)
+    expected[1, 2, qualification] = expected[0, 1, qualification + 1] = True
+    assert (inputs.qualrequirements == expected).all()
+    # Ordered by position id, the first position belongs to the second vehicle
+    assert inputs.posrequirements.tolist() == [[False, True], [True, False], [True, False]]
+
+    assert input_processing.get_input_P(session, request_id) == 3
+    assert input_processing.get_input_rolerequirements(session, request_id) is inputs.rolerequirements
+    with pytest.raises(ValueError):
+        inputs.rolerequirements[0, 0, 0] = True
+
+
+def test_request_inputs_use_a_fixed_number_of_queries(session, request_id, count_queries):
+    with count_queries() as statements:
+        for function in (input_processing.get_input_A, input_processing.get_input_P,
+                         input_processing.get_input_qualrequirements, input_processing.get_input_rolerequirements,
+                         input_processing.get_input_posrequirements):
+            function(session, request_id)
+        input_processing.get_input_R(session)
+        input_processing.get_input_Q(session)
+    assert len(statements) == 3
+
+
+def test_request_inputs_see_later_changes(session, request_id):
+    inputs = input_processing.load_request_inputs(session, request_id)
+    R = input_processing.get_input_R(session)
+    # Pending changes are seen before they are flushed
+    session.add(AssetRequestVehicle(request_id=request_id, from_date_time=datetime(2024, 5, 2, 8),
+                                    to_date_time=datetime(2024, 5, 2, 12)))
+    assert input_processing.get_input_A(session, request_id) == inputs.A + 1
+    session.add(Role(code='inputLater', name='Later'))
+    session.flush()
+    assert input_processing.get_input_R(session) == R + 1
+
+
+def test_availability_and_clashes(session, request_id, make_user):
+    volunteers = [make_user('available', str(i)) for i in range(4)]
+    session.add_all(volunteers)
+    session.flush()
+    session.add_all([
+        # Only touches the start of the first vehicle
+        UnavailabilityTime(userId=volunteers[0].id, start=datetime(2024, 5, 1, 7), end=datetime(2024, 5, 1, 8),
+                           periodicity=3),
+        # Recurs daily from a week earlier and reaches the second vehicle only
+        UnavailabilityTime(userId=volunteers[1].id, start=datetime(2024, 4, 24, 13), end=datetime(2024, 4, 24, 15),
+                           periodicity=1),
+        # Deleted
+        UnavailabilityTime(userId=volunteers[2].id, start=datetime(2024, 5, 1, 0), end=datetime(2024, 5, 2, 0),
+                           periodicity=3, status=False),
+        # Long before the request
+        UnavailabilityTime(userId=volunteers[2].id, start=datetime(2024, 4, 1, 8), end=datetime(2024, 4, 1, 18),
+                           periodicity=3),
+    ])
+    session.flush()
+
+    volunteer_ids = [user_id for user_id, in session.query(User.id).filter(User.role == UserType.VOLUNTEER)
+                     .order_by(User.id)]
+    availability = input_processing.get_input_availability(session, request_id)
+    assert availability.shape == (len(volunteer_ids), 2)
+    rows = {user_id: row for user_id, row in zip(volunteer_ids, availability.tolist())}
+    assert [rows[volunteer.id] for volunteer in volunteers] == [[False, True], [True, False], [True, True],
+                                                                [True, True]]
+
+    assert input_processing.get_input_clashes(session, request_id).tolist() == [[False, True], [True, False]]
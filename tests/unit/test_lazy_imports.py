@@ -0,0 +1,17 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.importtime import LAZY_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_application_does_not_import_lazy_dependencies():
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI='sqlite:///:memory:')
+    probe = 'import json, sys; import application; print(json.dumps(sorted(sys.modules)))'
+    output = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, env=env, check=True, capture_output=True,
+                            text=True)
+    modules = set(json.loads(output.stdout.strip().splitlines()[-1]))
+    assert [module for module in LAZY_MODULES if module in modules] == []
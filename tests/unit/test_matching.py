@@ -0,0 +1,59 @@
+import itertools
+import unittest
+from collections import Counter
+
+import numpy as np
+
+from services.optimiser import matching
+from services.optimiser.solution import OPTIMAL
+
+
+def brute_force_filled(compatibility, mastery, skill):
+    """
+    Reference implementation that tries every assignment of candidates to the positions of each shift.
+    """
+    filled = 0
+    for shift, required in enumerate(skill):
+        roles = [role for role, count in enumerate(required) for _ in range(count)]
+        options = [[volunteer for volunteer in range(compatibility.shape[1])
+                    if compatibility[shift, volunteer] and mastery[volunteer, role]] + [None] for role in roles]
+        best = 0
+        for choice in itertools.product(*options):
+            chosen = [volunteer for volunteer in choice if volunteer is not None]
+            if len(chosen) == len(set(chosen)):
+                best = max(best, len(chosen))
+        filled += best
+    return filled
+
+
+class TestMatching(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(7)
+
+    def test_maximum_matching_uses_augmenting_paths(self):
+        # A greedy matching would give the first position the only volunteer the second position can have.
+        self.assertEqual(matching.maximum_matching([[0, 1], [0]], 2), [1, 0])
+
+    def test_solve_matches_brute_force(self):
+        for _ in range(300):
+            shifts, volunteers, roles = self.rng.integers(1, 4, size=3)
+            compatibility = self.rng.random((shifts, volunteers)) < 0.7
+            mastery = self.rng.random((volunteers, roles)) < 0.5
+            skill = self.rng.integers(0, 3, size=(shifts, roles))
+
+            solution = matching.solve(compatibility, mastery, skill)
+            self.assertEqual(solution.status, OPTIMAL)
+            self.assertEqual(solution.objective, brute_force_filled(compatibility, mastery, skill))
+
+            for shift, volunteer, role in solution.assignments:
+                self.assertTrue(compatibility[shift, volunteer] and mastery[volunteer, role])
+            per_shift = [(shift, volunteer) for shift, volunteer, _ in solution.assignments]
+            self.assertEqual(len(per_shift), len(set(per_shift)))
+            filled = Counter((shift, role) for shift, _, role in solution.assignments)
+            for (shift, role), count in filled.items():
+                self.assertLessEqual(count, skill[shift, role])
+
+
+if __name__ == '__main__':
+    unittest.main()
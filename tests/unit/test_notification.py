@@ -1,6 +1,6 @@
 import unittest
 import os
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 from repository.fcm_token_repository import FCMTokenRepository
 from services.notification_service import NotificationService
 
@@ -64,6 +64,34 @@ class TestNotificationService(unittest.TestCase):
         # Ensure that messaging.send was called twice (once for each token)
         self.assertEqual(mock_send.call_count, 2)
 
+    @patch('firebase_admin.initialize_app')
+    @patch('firebase_admin.credentials.Certificate')
+    @patch('firebase_admin.messaging.send_each_for_multicast')
+    def test_send_multicast_in_batches(self, mock_send_each, mock_certificate, mock_initialize_app):
+        mock_send_each.side_effect = lambda message: MagicMock(success_count=len(message.tokens), failure_count=0)
+        tokens = [f'mock_token_{i}' for i in range(1201)]
+
+        delivered = NotificationService().send_multicast(tokens, "Test Title", "Test Body")
+
+        # FCM accepts at most 500 tokens per multicast message
+        self.assertEqual(delivered, 1201)
+        self.assertEqual(sorted(len(call[0][0].tokens) for call in mock_send_each.call_args_list), [201, 500, 500])
+        self.assertTrue(all(call[0][0].notification.title == "Test Title" for call in mock_send_each.call_args_list))
+
+    @patch('firebase_admin.initialize_app')
+    @patch('firebase_admin.credentials.Certificate')
+    @patch.object(NotificationService, 'send_multicast')
+    @patch.object(FCMTokenRepository, 'get_fcm_tokens')
+    def test_notify_users_sends_one_multicast(self, mock_get_fcm_tokens, mock_send_multicast, mock_certificate,
+                                             mock_initialize_app):
+        mock_get_fcm_tokens.return_value = {6: ['mock_token_1', 'mock_token_2'], 7: ['mock_token_3']}
+
+        FCMTokenRepository().notify_users([6, 7, 6], title="Test Title", body="Test Body")
+
+        mock_get_fcm_tokens.assert_called_once_with([6, 7, 6])
+        mock_send_multicast.assert_called_once_with(['mock_token_1', 'mock_token_2', 'mock_token_3'], "Test Title",
+                                                    "Test Body", None)
+
 
 if __name__ == '__main__':
     unittest.main()
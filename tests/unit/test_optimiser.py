@@ -0,0 +1,319 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta, datetime
+from unittest.mock import patch, MagicMock
+
+import minizinc
+import numpy as np
+import pytest
+
+from domain import User, Role, UserRole, ShiftRequest, ShiftPosition
+from repository.optimiser_solution_repository import OptimiserSolutionRepository
+from repository.shift_repository import ShiftRepository
+from services.optimiser import optimiser as optimiser_module
+from services.optimiser.optimiser import Optimiser, solve_instance, stream_solutions, solve_portfolio
+from services.optimiser.solution import Solution, OPTIMAL, SATISFIED, UNKNOWN
+
+
+def test_expand_positions_repeats_required_roles():
+    positions = Optimiser.expand_positions([[1, 0, 2],
+                                            [0, 0, 0],
+                                            [0, 1, 0]])
+    assert positions.tolist() == [[0, 0], [0, 2], [0, 2], [2, 1]]
+
+
+def test_position_candidates_are_compatible_and_qualified():
+    positions = np.array([[0, 0], [1, 1]])
+    compatibility = np.array([[True, True, False],
+                              [False, True, True]])
+    mastery = np.array([[True, False],
+                        [False, True],
+                        [True, True]])
+    assert Optimiser.position_candidates(positions, compatibility, mastery) == [{1}, {2, 3}]
+
+
+def test_sparse_result_is_decoded_into_assignments():
+    positions = np.array([[0, 0], [0, 2], [1, 1]])
+    assert Optimiser.decode_result(Optimiser.SPARSE, {"assigned_volunteer": [3, 0, 1]}, positions) == \
+           [(0, 2, 0), (1, 0, 1)]
+
+
+def test_dense_result_is_decoded_into_assignments():
+    result = {"possible_assignment": [[[False, True], [False, False]],
+                                      [[False, False], [True, False]]]}
+    assert Optimiser.decode_result(Optimiser.DENSE, result) == [(0, 0, 1), (1, 1, 0)]
+
+
+def test_unknown_formulation_is_rejected(session):
+    with pytest.raises(ValueError):
+        Optimiser(session=session, repository=ShiftRepository(), debug=False, formulation='cubic')
+
+
+class StreamingInstance:
+    """
+    Stands in for a MiniZinc instance that finds two improving solutions before it is stopped at its timeout.
+    """
+
+    def __init__(self):
+        self.arguments = None
+
+    async def solutions(self, **kwargs):
+        self.arguments = kwargs
+        for objective in (1, 2):
+            yield minizinc.Result(minizinc.Status.SATISFIED, type('Solution', (), {'objective': objective})(), {})
+        yield minizinc.Result(minizinc.Status.SATISFIED, None, {'flatTime': timedelta(seconds=0.5)})
+
+
+def test_stream_solutions_keeps_the_best_solution():
+    instance = StreamingInstance()
+    status, best, statistics = asyncio.run(stream_solutions(instance, timeout=None))
+    assert status == minizinc.Status.SATISFIED
+    assert best.objective == 2
+    assert statistics['flatTime'] == timedelta(seconds=0.5)
+    assert instance.arguments['intermediate_solutions']
+
+
+def test_objective_bound_counts_positions_with_candidates():
+    compatibility = np.array([[True, False], [False, False]])
+    mastery = np.array([[True], [True]])
+    skill = np.array([[2], [1]])
+    assert Optimiser.objective_bound(Optimiser.SPARSE, compatibility, mastery, skill) == 2
+    assert Optimiser.objective_bound(Optimiser.DENSE, compatibility, mastery, skill) == 2
+
+
+def test_expired_deadline_returns_without_solving():
+    solution = solve_instance(Optimiser.SPARSE, np.ones((1, 1), dtype=bool), np.ones((1, 1), dtype=bool),
+                              np.ones((1, 1), dtype=int), deadline=time.time() - 1)
+    assert solution.status == UNKNOWN
+    assert solution.assignments == []
+    assert solution.bound == 1
+
+
+def test_solution_gap():
+    assert Solution(status=OPTIMAL, objective=3, bound=4).gap == 0
+    assert Solution(status=SATISFIED, objective=3, bound=4).gap == 0.25
+    assert Solution(status=UNKNOWN, bound=4).gap is None
+
+
+def test_engine_selection(session):
+    optimiser = Optimiser(session=session, repository=ShiftRepository(), debug=False)
+    calculator = optimiser.calculator
+    calculator._shifts_, calculator._users_, calculator._roles_ = [None] * 100, [None] * 10, [None] * 10
+    # MiniZinc is not installed here, so the automatic selection always falls back to the matching engine
+    assert optimiser.select_engine() == Optimiser.MATCHING
+    optimiser.engine = Optimiser.MINIZINC
+    assert optimiser.select_engine() == Optimiser.MINIZINC
+    with pytest.raises(ValueError):
+        Optimiser(session=session, repository=ShiftRepository(), debug=False, engine='quantum')
+
+
+class FakeDriver:
+    """
+    Answers the model analysis in place of the MiniZinc executable.
+    """
+    parsed_version = (2, 5, 5)
+
+    def __init__(self):
+        self.analyses = 0
+
+    def _run(self, args, solver=None):
+        self.analyses += 1
+        interface = {'method': 'max', 'has_output_item': False, 'input': {}, 'output': {}}
+        return MagicMock(stdout=json.dumps(interface).encode())
+
+
+@pytest.fixture
+def minizinc_driver():
+    optimiser_module.solver.cache_clear()
+    optimiser_module.model.cache_clear()
+    driver = FakeDriver()
+    with patch.object(minizinc, 'default_driver', driver), patch.object(minizinc.Solver, 'lookup') as lookup:
+        yield driver, lookup
+    optimiser_module.solver.cache_clear()
+    optimiser_module.model.cache_clear()
+
+
+def test_solver_and_model_are_set_up_once_per_formulation(minizinc_driver):
+    driver, lookup = minizinc_driver
+    for _ in range(3):
+        optimiser_module.new_instance(Optimiser.SPARSE)
+        optimiser_module.new_instance(Optimiser.DENSE)
+    lookup.assert_called_once_with('gecode')
+    assert optimiser_module.model.cache_info().misses == 2
+    # The first instance of each model stores its output type on the model, so later ones do not analyse it again
+    assert driver.analyses == 2
+
+
+def test_overlapping_instances_do_not_wait_on_each_other(minizinc_driver):
+    compatibility, mastery, skill = np.ones((2, 3), dtype=bool), np.ones((3, 1), dtype=bool), np.ones((2, 1))
+    instances = []
+
+    def overlap():
+        with Optimiser.build_instance(Optimiser.SPARSE, compatibility, mastery, skill) as (first, _):
+            with Optimiser.build_instance(Optimiser.SPARSE, compatibility, mastery, skill) as (second, _):
+                instances.extend((first, second))
+
+    # A lock held by the first instance would block the thread forever
+    thread = threading.Thread(target=overlap, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert instances[0] is not instances[1]
+    assert minizinc_driver[0].analyses == 1
+
+
+def test_fingerprint_depends_on_inputs():
+    compatibility, mastery, skill = np.ones((2, 3), dtype=bool), np.ones((3, 1), dtype=bool), np.ones((2, 1))
+    fingerprint = Optimiser.fingerprint(Optimiser.MATCHING, Optimiser.SPARSE, compatibility, mastery, skill)
+    assert fingerprint == Optimiser.fingerprint(Optimiser.MATCHING, Optimiser.SPARSE, compatibility.copy(),
+                                                mastery, skill.astype(int))
+    compatibility[0, 0] = False
+    assert fingerprint != Optimiser.fingerprint(Optimiser.MATCHING, Optimiser.SPARSE, compatibility, mastery, skill)
+    # The same values in a different shape are different inputs
+    assert Optimiser.fingerprint(Optimiser.MATCHING, Optimiser.SPARSE, np.ones((3, 2), dtype=bool), mastery, skill) \
+           != Optimiser.fingerprint(Optimiser.MATCHING, Optimiser.SPARSE, np.ones((2, 3), dtype=bool), mastery, skill)
+
+
+def test_repeated_runs_use_the_stored_solution(session, make_user, make_shift):
+    volunteer = make_user('cache', 'volunteer')
+    role = Role(code='cacheDriver', name='Driver')
+    session.add_all([volunteer, role])
+    session.flush()
+    shift = make_shift(volunteer.id, 'cache', datetime(2024, 5, 1, 8))
+    session.add_all([shift, UserRole(user_id=volunteer.id, role_id=role.id)])
+    session.flush()
+    session.add(ShiftPosition(shift_id=shift.id, role_code=role.code))
+    session.flush()
+
+    def run(force=False):
+        optimiser = Optimiser(session=session, repository=ShiftRepository(), debug=False, engine=Optimiser.MATCHING,
+                              solution_repository=OptimiserSolutionRepository(), force=force)
+        return optimiser, optimiser.solve()
+
+    first_optimiser, first = run()
+    second_optimiser, second = run()
+    forced_optimiser, _ = run(force=True)
+
+    assert len(first.assignments) == 1
+    assert not first_optimiser.cached
+    assert second_optimiser.cached
+    assert 'solve' not in second_optimiser.timings
+    assert second.assignments == first.assignments
+    assert second.status == OPTIMAL
+    assert not forced_optimiser.cached
+
+
+def test_save_result_notifies_each_volunteer_once_after_saving(session):
+    repository = MagicMock()
+    fcm_token_repository = MagicMock()
+    repository.save_shift_assignments.side_effect = lambda assignments: assignments[:2]
+    fcm_token_repository.notify_users.side_effect = \
+        lambda **kwargs: repository.save_shift_assignments.assert_called_once()
+
+    optimiser = Optimiser(session=session, repository=repository, debug=False,
+                          fcm_token_repository=fcm_token_repository)
+    calculator = optimiser.calculator
+    calculator._shifts_ = [ShiftRequest(id=1, startTime=datetime(2024, 5, 1, 8), endTime=datetime(2024, 5, 1, 12)),
+                           ShiftRequest(id=2, startTime=datetime(2024, 5, 2, 8), endTime=datetime(2024, 5, 2, 12))]
+    calculator._users_ = [User(id=10), User(id=11)]
+    calculator._roles_ = [Role(code='driver')]
+
+    optimiser.save_result(Solution([(0, 0, 0), (1, 0, 0), (1, 1, 0)], OPTIMAL))
+
+    # The last assignment was not saved, so only the first volunteer is notified
+    fcm_token_repository.notify_users.assert_called_once_with(user_ids={10}, title="New shift assignment",
+                                                              body="You have been assigned to a new shift")
+    fcm_token_repository.notify_user.assert_not_called()
+    assert 'notify' in optimiser.timings
+
+
+def test_expired_budget_leaves_the_shifts_unchanged(session, make_user, make_shift):
+    volunteer = make_user('budget', 'volunteer')
+    role = Role(code='budgetDriver', name='Driver')
+    session.add_all([volunteer, role])
+    session.flush()
+    shift = make_shift(volunteer.id, 'budget', datetime(2024, 5, 1, 8))
+    session.add_all([shift, UserRole(user_id=volunteer.id, role_id=role.id)])
+    session.flush()
+    session.add(ShiftPosition(shift_id=shift.id, role_code=role.code))
+    session.flush()
+    repository = MagicMock()
+
+    optimiser = Optimiser(session=session, repository=repository, debug=False, engine=Optimiser.MINIZINC,
+                          time_budget=0)
+    solution = optimiser.solve()
+    optimiser.save_result(solution)
+
+    assert solution.status == UNKNOWN and not solution.found
+    repository.update_shifts_pending.assert_not_called()
+    repository.save_shift_assignments.assert_not_called()
+
+
+def portfolio_search(delays):
+    """
+    Stands in for searching a MiniZinc instance, each solver finds a solution filling one position after its delay.
+    """
+    cancelled = []
+
+    async def search(formulation, compatibility, mastery, skill, timeout, solver_name, processes):
+        try:
+            await asyncio.sleep(delays[solver_name])
+        except asyncio.CancelledError:
+            cancelled.append(solver_name)
+            raise
+        return Solution([(0, 0, 0)], SATISFIED, 1, timings={'search': delays[solver_name]})
+
+    return search, cancelled
+
+
+def test_portfolio_uses_the_first_proven_optimum():
+    search, cancelled = portfolio_search({'gecode': 10})
+    configurations = (('gecode', 'gecode', None), ('chuffed', 'chuffed', None), (Optimiser.MATCHING, None, None))
+
+    def lookup(name):
+        if name == 'chuffed':
+            raise LookupError("not installed")
+
+    with patch.object(optimiser_module, 'search', search), patch.object(optimiser_module, 'solver', lookup):
+        solution, winner = solve_portfolio(np.ones((1, 2), dtype=bool), np.ones((2, 1), dtype=bool),
+                                           np.array([[2]]), configurations=configurations)
+
+    assert winner == Optimiser.MATCHING
+    assert solution.status == OPTIMAL and solution.objective == 2
+    # The slower solver was stopped once the matching engine proved its optimum
+    assert cancelled == ['gecode']
+    assert 'portfolio_matching' in solution.timings and 'portfolio_gecode' in solution.timings
+
+
+def test_portfolio_uses_the_best_solution_at_the_deadline():
+    search, cancelled = portfolio_search({'gecode': 0.01, 'chuffed': 10})
+    configurations = (('gecode', 'gecode', None), ('chuffed', 'chuffed', None))
+
+    with patch.object(optimiser_module, 'search', search), patch.object(optimiser_module, 'solver'), \
+            patch.object(optimiser_module, 'PORTFOLIO_GRACE', 0):
+        solution, winner = solve_portfolio(np.ones((1, 1), dtype=bool), np.ones((1, 1), dtype=bool),
+                                           np.array([[1]]), deadline=time.time() + 0.2, configurations=configurations)
+
+    assert winner == 'gecode'
+    assert solution.status == SATISFIED and solution.assignments == [(0, 0, 0)]
+    assert cancelled == ['chuffed']
+
+
+def test_portfolio_configurations_of_the_same_solver_run_side_by_side(minizinc_driver):
+    instances = []
+
+    async def solutions(instance, timeout=None, processes=None):
+        instances.append(instance)
+        await asyncio.sleep(0.01)
+        return minizinc.Status.UNKNOWN, None, {}
+
+    configurations = (('gecode', 'gecode', None), ('gecode-parallel', 'gecode', 4))
+    with patch.object(optimiser_module, 'stream_solutions', solutions):
+        solution, winner = solve_portfolio(np.ones((1, 2), dtype=bool), np.ones((2, 1), dtype=bool),
+                                           np.array([[1]]), deadline=time.time() + 5, configurations=configurations)
+
+    assert winner is None and solution.objective is None
+    assert len(instances) == 2 and instances[0] is not instances[1]
+    assert {'portfolio_gecode', 'portfolio_gecode-parallel'} <= solution.timings.keys()
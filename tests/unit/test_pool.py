@@ -0,0 +1,53 @@
+import builtins
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError
+
+from domain.pool import PoolMetrics, MeteredQueuePool, pool_metrics, pool_options
+
+
+def test_pool_options_are_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv('SQLALCHEMY_POOL_SIZE', '8')
+    monkeypatch.setenv('SQLALCHEMY_POOL_PRE_PING', 'false')
+    options = pool_options()
+    assert options['pool_size'] == 8
+    assert options['max_overflow'] == 10
+    assert options['pool_recycle'] == 3600
+    assert options['pool_pre_ping'] is False
+
+
+def test_pool_events_are_counted(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=MeteredQueuePool, pool_size=1,
+                           max_overflow=0, pool_timeout=0.01)
+    metrics = PoolMetrics()
+    metrics.attach(engine)
+    attempts, timeouts = pool_metrics.checkout_attempts, pool_metrics.timeouts
+
+    with engine.connect() as connection:
+        connection.execute(text('select 1'))
+        assert metrics.snapshot(engine.pool)['checked_out'] == 1
+        # The only connection is checked out, so the second checkout times out
+        with pytest.raises(TimeoutError):
+            engine.connect()
+    with engine.connect() as connection:
+        connection.execute(text('select 1'))
+
+    snapshot = metrics.snapshot(engine.pool)
+    assert (snapshot['connects'], snapshot['checkouts'], snapshot['checkins']) == (1, 2, 2)
+    assert snapshot['checked_out'] == 0
+    assert pool_metrics.checkout_attempts - attempts == 3
+    assert pool_metrics.timeouts - timeouts == 1
+    engine.dispose()
+
+
+def test_driver_timeouts_are_not_pool_timeouts():
+    def connect():
+        raise builtins.TimeoutError('connection timed out')
+
+    engine = create_engine('sqlite://', creator=connect, poolclass=MeteredQueuePool)
+    timeouts = pool_metrics.timeouts
+    with pytest.raises(builtins.TimeoutError):
+        engine.connect()
+    assert pool_metrics.timeouts == timeouts
+    engine.dispose()
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from services.optimiser import matching, presolve
+
+
+class TestPresolve(unittest.TestCase):
+
+    def test_unusable_roles_shifts_and_volunteers_are_removed(self):
+        # The second role is never required, the second shift has no positions, the third volunteer is only
+        # compatible with the second shift and the fourth only holds the second role
+        compatibility = np.array([[True, True, False, True],
+                                  [True, False, True, True],
+                                  [False, True, False, True]])
+        mastery = np.array([[True, False, True],
+                            [False, False, True],
+                            [True, True, True],
+                            [False, True, False]])
+        skill_requirements = np.array([[1, 0, 1],
+                                       [0, 0, 0],
+                                       [0, 0, 2]])
+        reduction = presolve.reduce(compatibility, mastery, skill_requirements)
+
+        self.assertEqual(reduction.shifts.tolist(), [0, 2])
+        self.assertEqual(reduction.volunteers.tolist(), [0, 1])
+        self.assertEqual(reduction.roles.tolist(), [0, 2])
+        self.assertEqual(reduction.skill_requirements_2d.tolist(), [[1, 1], [0, 2]])
+        self.assertEqual(reduction.summarise(), {'shifts': [3, 2], 'volunteers': [4, 2], 'roles': [3, 2],
+                                                 'variables': [36, 8]})
+        self.assertEqual(reduction.removed_pairs, 5)
+        self.assertEqual(reduction.expand([(1, 1, 1)]), [(2, 1, 2)])
+        self.assertFalse(reduction.is_empty)
+
+    def test_nothing_to_solve(self):
+        reduction = presolve.reduce(np.ones((2, 3), dtype=bool), np.zeros((3, 2), dtype=bool), np.ones((2, 2)))
+        self.assertTrue(reduction.is_empty)
+        self.assertEqual(reduction.shape, (2, 0, 2))
+
+    def test_reduced_problems_fill_as_many_positions(self):
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            shifts, volunteers, roles = rng.integers(1, 8, size=3)
+            compatibility = rng.random((shifts, volunteers)) < 0.4
+            mastery = rng.random((volunteers, roles)) < 0.3
+            skill_requirements = rng.integers(0, 3, size=(shifts, roles)) * (rng.random((shifts, roles)) < 0.3)
+            reduction = presolve.reduce(compatibility, mastery, skill_requirements)
+
+            full = matching.solve(compatibility, mastery, skill_requirements)
+            if reduction.is_empty:
+                self.assertEqual(full.assignments, [])
+                continue
+            reduced = matching.solve(reduction.compatibility_2d, reduction.mastery_2d,
+                                     reduction.skill_requirements_2d)
+            self.assertEqual(reduced.objective, full.objective)
+            for shift, volunteer, role in reduction.expand(reduced.assignments):
+                self.assertTrue(compatibility[shift, volunteer] and mastery[volunteer, role])
+                self.assertGreater(skill_requirements[shift, role], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
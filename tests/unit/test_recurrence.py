@@ -0,0 +1,85 @@
+import random
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from services.optimiser import recurrence
+
+
+def brute_force_overlaps(start, end, periodicity, shift_start, shift_end, closed):
+    """
+    Reference implementation that steps through every occurrence of the window up to the end of the shift.
+    """
+    if periodicity not in recurrence.RECURRING + recurrence.NON_RECURRING:
+        return False
+    period = recurrence.period_of(periodicity)
+    while start <= shift_end:
+        if closed and start <= shift_end and end >= shift_start:
+            return True
+        if not closed and start < shift_end and end > shift_start:
+            return True
+        if period is None:
+            return False
+        start, end = start + period, end + period
+    return False
+
+
+class TestRecurrence(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(42)
+        self.origin = datetime(2020, 1, 1)
+
+    def random_window(self, max_hours):
+        # Minute resolution makes boundary collisions between windows and shifts likely.
+        start = self.origin + timedelta(minutes=self.rng.randrange(60 * 24 * 365 * 2))
+        return start, start + timedelta(minutes=self.rng.randrange(0, 60 * max_hours))
+
+    def test_overlaps_matches_brute_force(self):
+        for _ in range(3000):
+            start, end = self.random_window(36)
+            shift_start, shift_end = self.random_window(12)
+            periodicity = self.rng.choice([0, 1, 2, 3, 4])
+            closed = self.rng.choice([True, False])
+            with self.subTest(start=start, end=end, periodicity=periodicity, shift=(shift_start, shift_end)):
+                self.assertEqual(
+                    recurrence.overlaps(start, end, periodicity, shift_start, shift_end, closed),
+                    brute_force_overlaps(start, end, periodicity, shift_start, shift_end, closed)
+                )
+
+    def test_overlaps_many_matches_brute_force(self):
+        windows = [self.random_window(36) + (self.rng.choice([0, 1, 2, 3, 4]),) for _ in range(40)]
+        shifts = [self.random_window(12) for _ in range(60)]
+        starts, ends, periodicities = (np.array(column)[:, None] for column in zip(*windows))
+        shift_starts, shift_ends = (np.array(column)[None, :] for column in zip(*shifts))
+
+        for closed in (True, False):
+            result = recurrence.overlaps_many(starts.astype('datetime64[us]'), ends.astype('datetime64[us]'),
+                                              periodicities.astype(int), shift_starts.astype('datetime64[us]'),
+                                              shift_ends.astype('datetime64[us]'), closed)
+            expected = [[brute_force_overlaps(w_start, w_end, periodicity, s_start, s_end, closed)
+                         for s_start, s_end in shifts] for w_start, w_end, periodicity in windows]
+            self.assertEqual(result.tolist(), expected)
+
+    def test_daily_window_years_ago_blocks_today(self):
+        start = datetime(2015, 3, 1, 9)
+        shift = (datetime(2024, 5, 1, 10), datetime(2024, 5, 1, 11))
+        self.assertTrue(recurrence.overlaps(start, start + timedelta(hours=2), recurrence.DAILY, *shift))
+        self.assertFalse(recurrence.overlaps(start, start + timedelta(hours=2), recurrence.ONE_OFF, *shift))
+
+    def test_weekly_window_other_weekday_does_not_block(self):
+        # 2024-05-01 is a Wednesday, the window repeats every Friday
+        start = datetime(2024, 3, 1, 0)
+        shift = (datetime(2024, 5, 1, 8), datetime(2024, 5, 1, 16))
+        self.assertFalse(recurrence.overlaps(start, start + timedelta(hours=24), recurrence.WEEKLY, *shift))
+
+    def test_window_touching_shift_only_counts_when_closed(self):
+        start, end = datetime(2024, 5, 1, 6), datetime(2024, 5, 1, 8)
+        shift = (datetime(2024, 5, 2, 8), datetime(2024, 5, 2, 10))
+        self.assertTrue(recurrence.overlaps(start, end, recurrence.DAILY, *shift, closed=True))
+        self.assertFalse(recurrence.overlaps(start, end, recurrence.DAILY, *shift, closed=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+from domain import ShiftPosition, Role, ShiftRequestVolunteer, ShiftVolunteerStatus, UnavailabilityTime
+from repository.shift_repository import ShiftRepository
+
+
+@pytest.fixture
+def roster(session, make_user, make_shift):
+    volunteers = [make_user('save', str(i)) for i in range(3)]
+    role = Role(code='saveDriver', name='Driver')
+    session.add_all(volunteers + [role])
+    session.flush()
+    shifts = [make_shift(volunteers[0].id, f'save {hour}', datetime(2024, 5, 1, hour)) for hour in (8, 10, 18)]
+    session.add_all(shifts)
+    session.flush()
+    positions = [ShiftPosition(shift_id=shift.id, role_code=role.code) for shift in shifts for _ in range(2)]
+    session.add_all(positions)
+    session.flush()
+    return volunteers, shifts, positions, role
+
+
+def assignment(user, shift, role):
+    return {'user_id': user.id, 'shift_id': shift.id, 'role_code': role.code, 'shift_start': shift.startTime,
+            'shift_end': shift.endTime}
+
+
+def test_save_shift_assignments_skips_conflicts(session, roster):
+    volunteers, shifts, positions, role = roster
+    # The third volunteer is already accepted on the evening shift
+    session.add(ShiftRequestVolunteer(user_id=volunteers[2].id, request_id=shifts[2].id, position_id=positions[4].id,
+                                      status=ShiftVolunteerStatus.ACCEPTED))
+    session.flush()
+
+    saved = ShiftRepository().save_shift_assignments([
+        assignment(volunteers[0], shifts[0], role),
+        # Overlaps the shift the first volunteer is assigned to earlier in the batch
+        assignment(volunteers[0], shifts[1], role),
+        assignment(volunteers[1], shifts[0], role),
+        # Every position of the morning shift is taken by now
+        assignment(volunteers[2], shifts[0], role),
+        # Holding the other position of the evening shift is not a conflict, as with a single assignment
+        assignment(volunteers[2], shifts[2], role),
+        # Which fills the last open position of the evening shift
+        assignment(volunteers[1], shifts[2], role),
+    ])
+
+    assert [(a['user_id'], a['shift_id']) for a in saved] == [
+        (volunteers[0].id, shifts[0].id), (volunteers[1].id, shifts[0].id), (volunteers[2].id, shifts[2].id)]
+
+    records = session.query(ShiftRequestVolunteer.user_id, ShiftRequestVolunteer.position_id) \
+        .filter(ShiftRequestVolunteer.status == ShiftVolunteerStatus.ACCEPTED) \
+        .order_by(ShiftRequestVolunteer.id) \
+        .all()
+    assert records == [(volunteers[2].id, positions[4].id), (volunteers[0].id, positions[0].id),
+                       (volunteers[1].id, positions[1].id), (volunteers[2].id, positions[5].id)]
+    assert session.query(UnavailabilityTime).filter(UnavailabilityTime.is_shift == True).count() == 3
+
+
+def test_save_shift_assignments_uses_a_fixed_number_of_queries(session, roster, count_queries):
+    volunteers, shifts, _, role = roster
+    with count_queries() as small:
+        ShiftRepository().save_shift_assignments([assignment(volunteers[0], shifts[0], role)])
+    with count_queries() as large:
+        ShiftRepository().save_shift_assignments([
+            assignment(volunteers[1], shifts[0], role),
+            assignment(volunteers[1], shifts[2], role),
+            assignment(volunteers[2], shifts[1], role),
+            assignment(volunteers[2], shifts[2], role),
+        ])
+    assert len(small) == len(large)
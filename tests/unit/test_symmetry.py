@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from services.optimiser import symmetry
+from services.optimiser.optimiser import Optimiser
+
+
+class TestSymmetry(unittest.TestCase):
+
+    def test_volunteers_are_grouped_by_compatibility_and_mastery(self):
+        compatibility = np.array([[True, True, False, True, True],
+                                  [False, False, True, False, False]])
+        mastery = np.array([[True, False],
+                            [True, False],
+                            [True, False],
+                            [True, True],
+                            [True, False]])
+        classes = symmetry.interchangeable_volunteers(compatibility, mastery)
+        self.assertEqual([members.tolist() for members in classes], [[0, 1, 4]])
+        self.assertEqual(symmetry.ordered_pairs(classes), ([1, 2], [2, 5]))
+
+    def test_no_classes_without_interchangeable_volunteers(self):
+        self.assertEqual(symmetry.interchangeable_volunteers(np.eye(3, dtype=bool), np.ones((3, 1), dtype=bool)), [])
+        self.assertEqual(symmetry.interchangeable_volunteers(np.ones((2, 1), dtype=bool), np.ones((1, 1))), [])
+        self.assertEqual(symmetry.ordered_pairs([]), ([], []))
+
+    def test_pairs_are_bound_to_both_formulations(self):
+        compatibility = np.ones((2, 3), dtype=bool)
+        mastery = np.ones((3, 1), dtype=bool)
+        skill_requirements = np.ones((2, 1), dtype=int)
+        for bind in (Optimiser.bind_dense_data, Optimiser.bind_sparse_data):
+            instance = {}
+            bind(instance, compatibility, mastery, skill_requirements)
+            self.assertEqual((instance["C"], instance["symmetric_first"], instance["symmetric_second"]),
+                             (2, [1, 2], [2, 3]))
+        for model in (Optimiser.generate_model_string(), Optimiser.generate_sparse_model_string()):
+            self.assertIn("array[1..C] of VOLUNTEER: symmetric_first;", model)
+
+
+if __name__ == '__main__':
+    unittest.main()
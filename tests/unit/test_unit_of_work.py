@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from domain import User, ShiftStatus, session_scope, unit_of_work, on_commit
+from repository.shift_repository import ShiftRepository
+
+
+def test_session_scopes_join_the_unit_of_work(make_user):
+    with unit_of_work() as session:
+        with session_scope() as joined:
+            assert joined.query(User).session is session
+            # Committing a joined scope only flushes, the unit of work is still open
+            joined.add(make_user('unit', 'joined'))
+            joined.commit()
+            assert session.in_transaction()
+        with unit_of_work() as nested:
+            assert nested.query(User).session is session
+
+
+def test_rolling_back_a_joined_scope_keeps_the_rest_of_the_unit(make_user):
+    with unit_of_work() as session:
+        session.add(make_user('unit', 'kept'))
+        session.flush()
+        with pytest.raises(RuntimeError):
+            with session_scope() as joined:
+                joined.add(make_user('unit', 'discarded'))
+                joined.flush()
+                raise RuntimeError()
+        names = {user.last_name for user in session.query(User).filter(User.first_name == 'unit')}
+    assert names == {'kept'}
+
+
+def test_callbacks_run_after_commit():
+    calls = []
+    with unit_of_work():
+        on_commit(lambda: calls.append('committed'))
+        assert calls == []
+    assert calls == ['committed']
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work():
+            on_commit(lambda: calls.append('rolled back'))
+            raise RuntimeError()
+    assert calls == ['committed']
+
+
+def test_update_shifts_pending_updates_every_shift(make_user, make_shift):
+    with unit_of_work() as session:
+        admin = make_user('unit', 'admin')
+        session.add(admin)
+        session.flush()
+        shifts = [make_shift(admin.id, f'unit {i}', datetime(2024, 5, 1, 8)) for i in range(3)]
+        session.add_all(shifts)
+        session.flush()
+
+        assert ShiftRepository().update_shifts_pending([shift.id for shift in shifts[:2]]) == 2
+        session.expire_all()
+        assert [shift.status for shift in shifts] == [ShiftStatus.PENDING, ShiftStatus.PENDING, ShiftStatus.SUBMITTED]